@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Measures the number of AMI events parsed per second from recorded traffic.
+
+Usage: python benchmarks/bench_ami_parser.py [-c CHUNK_SIZE] [-n REPEAT] [traffic_file]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from xivo_cti.ami.stream_parser import AMIStreamParser
+
+DEFAULT_TRAFFIC_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ami_traffic.log')
+
+
+class LegacyParser(object):
+    # the split-and-dict parsing previously done in AMI.handle_event
+
+    def __init__(self):
+        self._input_buffer = ''
+
+    def feed(self, input_data):
+        full_idata = self._input_buffer + input_data
+        raw_events = full_idata.split('\r\n\r\n')
+        self._input_buffer = raw_events.pop()
+
+        events = []
+        for raw_event in raw_events:
+            decoded_event = raw_event.decode('utf8', 'replace')
+            event = {}
+            for line in decoded_event.split('\r\n'):
+                if '\n' not in line and line != '--END COMMAND--':
+                    key_value = line.split(': ', 1)
+                    if len(key_value) == 2:
+                        key, value = key_value
+                        event[key.strip()] = value
+            events.append(event)
+        return events
+
+
+class StreamParser(object):
+
+    def __init__(self):
+        self._parser = AMIStreamParser()
+
+    def feed(self, input_data):
+        return [self._parser.parse_event(raw_event) for raw_event in self._parser.feed(input_data)]
+
+
+class FilteringStreamParser(StreamParser):
+    # skips the events nobody listens to, like AMI.handle_event does
+
+    handled_events = frozenset(['Newchannel', 'Newstate', 'NewCallerid', 'Dial', 'Bridge',
+                                'Unlink', 'Hangup', 'HangupRequest', 'ExtensionStatus'])
+
+    def feed(self, input_data):
+        events = []
+        for raw_event in self._parser.feed(input_data):
+            event_name = self._parser.peek_event_name(raw_event)
+            if event_name is None or event_name in self.handled_events:
+                events.append(self._parser.parse_event(raw_event))
+        return events
+
+
+def run(parser, chunks):
+    start = time.time()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('traffic_file', nargs='?', default=DEFAULT_TRAFFIC_FILE)
+    parser.add_argument('-c', '--chunk-size', type=int, default=65536)
+    parser.add_argument('-n', '--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.traffic_file, 'rb') as f:
+        traffic = f.read() * args.repeat
+    chunks = [traffic[i:i + args.chunk_size] for i in xrange(0, len(traffic), args.chunk_size)]
+
+    nb_events = traffic.count('\r\n\r\n')
+
+    print '%d events, %d bytes in %d chunks of %d bytes' % (nb_events, len(traffic), len(chunks), args.chunk_size)
+    for name, factory in [('legacy', LegacyParser),
+                          ('stream', StreamParser),
+                          ('filtered', FilteringStreamParser)]:
+        elapsed = run(factory(), chunks)
+        print '%-8s %.3f s: %10.0f events/s' % (name, elapsed, nb_events / elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Measures the CallStorage operations with a load of concurrent calls, half of
+them going through a local channel.
+
+Usage: python benchmarks/bench_call_storage.py [-n CALLS]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from xivo.asterisk.extension import Extension
+from xivo_cti.model.endpoint_status import EndpointStatus
+from xivo_cti.services.call.call import _Channel
+from xivo_cti.services.call.storage import CallStorage
+
+
+class NullNotifier(object):
+
+    def notify(self, event):
+        pass
+
+
+class LegacyCallStorage(CallStorage):
+    # the lookups previously done by scanning all the calls
+
+    def find_all_calls_for_extension(self, extension):
+        return [call for call in self._calls.itervalues()
+                if call.source.extension == extension or call.destination.extension == extension]
+
+    def _find_call_matching(self, local_channel_prefix, get_channel):
+        for uid, call in self._calls.iteritems():
+            if get_channel(call)._channel.startswith(local_channel_prefix):
+                return uid
+        raise LookupError()
+
+
+def extension(number):
+    return Extension(str(number), 'default', True)
+
+
+def new_calls(storage, count):
+    for i in xrange(count):
+        source = _Channel(extension(10000 + i), 'SIP/src%d-%08x' % (i, i))
+        if i % 2:
+            destination = _Channel(extension(20000 + i), 'SIP/dst%d-%08x' % (i, i))
+            storage.new_call('%d.1' % i, '%d.2' % i, source, destination)
+        else:
+            local = 'Local/%d@default-%08x' % (20000 + i, i)
+            storage.new_call('%d.1' % i, None, source, _Channel(extension(''), local + ';1'))
+            destination = _Channel(extension(20000 + i), 'SIP/dst%d-%08x' % (i, i))
+            storage.new_call('%d.2' % i, None, _Channel(extension(''), local + ';2'), destination)
+
+
+def update_endpoint_statuses(storage, count):
+    for i in xrange(count):
+        storage.update_endpoint_status(extension(10000 + i), EndpointStatus.ringing)
+        storage.update_endpoint_status(extension(20000 + i), EndpointStatus.ringing)
+
+
+def merge_local_channels(storage, count):
+    for i in xrange(0, count, 2):
+        storage.merge_local_channels('Local/%d@default-%08x;' % (20000 + i, i))
+
+
+def end_calls(storage, count):
+    for i in xrange(count):
+        storage.end_call('%d.1' % i)
+        storage.end_call('%d.2' % i)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    print '%d concurrent calls' % args.calls
+    for storage_class in [LegacyCallStorage, CallStorage]:
+        storage = storage_class(NullNotifier(), NullNotifier())
+        for name, function in [('new_call', new_calls),
+                               ('update_endpoint_status', update_endpoint_statuses),
+                               ('merge_local_channels', merge_local_channels),
+                               ('end_call', end_calls)]:
+            start = time.time()
+            function(storage, args.calls)
+            elapsed = time.time() - start
+            print '%-17s %-22s %8.3f s' % (storage_class.__name__, name, elapsed)
+
+
+if __name__ == '__main__':
+    main()
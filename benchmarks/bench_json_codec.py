@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+
+"""
+Measures the number of CTI messages decoded and encoded per second.
+
+Usage: python benchmarks/bench_json_codec.py [-n COUNT]
+"""
+
+import argparse
+import cjson
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from xivo_cti.cti import json_codec
+
+ASCII_LINE = '{"class": "ipbxcommand", "command": "dial", "destination": "exten:xivo/1234", "commandid": 1234567}'
+UTF8_LINE = '{"class": "directory", "pattern": "Fran\xc3\xa7ois \xe6\x9d\xb1", "commandid": 1234567}'
+MESSAGE = {'class': 'getlist',
+           'listname': 'phones',
+           'function': 'updatestatus',
+           'tipbxid': 'xivo',
+           'tid': '42',
+           'status': {'hintstatus': '0', 'channels': [], 'queues': [], 'groups': []}}
+
+
+class LegacyCodec(object):
+    # the decoding and encoding previously done in interface_cti.serialJson
+
+    name = 'legacy'
+
+    def decode(self, linein):
+        return cjson.decode(linein.decode('utf-8').replace('\\/', '/'))
+
+    def encode(self, obj):
+        obj['timenow'] = time.time()
+        return cjson.encode(obj)
+
+
+class TimenowCodec(object):
+    # adds timenow without modifying the message, like CTIMessageEncoder
+
+    def __init__(self, codec):
+        self.name = codec.name
+        self._codec = codec
+
+    def decode(self, linein):
+        return self._codec.decode(linein)
+
+    def encode(self, obj):
+        return self._codec.encode(dict(obj, timenow=time.time()))
+
+
+def run(function, arg, count):
+    start = time.time()
+    for _ in xrange(count):
+        function(arg)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    codecs = [LegacyCodec()]
+    for backend in ['cjson', 'json']:
+        try:
+            codecs.append(TimenowCodec(json_codec.new_codec(backend)))
+        except ValueError:
+            pass
+
+    print '%d messages' % args.count
+    for codec in codecs:
+        for name, function, arg in [('decode ascii', codec.decode, ASCII_LINE),
+                                    ('decode utf-8', codec.decode, UTF8_LINE),
+                                    ('encode', codec.encode, MESSAGE)]:
+            elapsed = run(function, arg, args.count)
+            print '%-8s %-14s %.3f s: %10.0f msgs/s' % (codec.name, name, elapsed, args.count / elapsed)
+
+
+if __name__ == '__main__':
+    main()
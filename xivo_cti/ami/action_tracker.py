@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import itertools
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+ACTION_ID = 'ActionID'
+EVENT = 'Event'
+MESSAGE = 'Message'
+RESPONSE = 'Response'
+
+
+class PendingAction(object):
+    """
+    The result of an AMI action, available once the response and, for the
+    actions answering with a list of events, the completion event have been
+    received.
+    """
+
+    PENDING = 'pending'
+    SUCCESS = 'success'
+    ERROR = 'error'
+    TIMEOUT = 'timeout'
+
+    def __init__(self, action_id, complete_event=None):
+        self.action_id = action_id
+        self.complete_event = complete_event
+        self.status = self.PENDING
+        self.response = None
+        self.events = []
+        self._callbacks = []
+        self._timeout_task = None
+
+    def add_callback(self, callback):
+        """
+        callback is called with this pending action once it is done, right
+        away if it is already done.
+        """
+        if self.done():
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+        return self
+
+    def done(self):
+        return self.status != self.PENDING
+
+    def succeeded(self):
+        return self.status == self.SUCCESS
+
+    def error_message(self):
+        if self.status == self.TIMEOUT:
+            return 'timeout'
+        if self.response:
+            return self.response.get(MESSAGE)
+        return None
+
+    def _resolve(self, status):
+        self.status = status
+        if self._timeout_task:
+            self._timeout_task.cancel()
+            self._timeout_task = None
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception('Error in callback of AMI action %s', self.action_id)
+
+
+class AMIActionTracker(object):
+    """
+    Correlates the AMI responses and events with the actions that caused them
+    using their ActionID.
+    """
+
+    DEFAULT_TIMEOUT = 30
+
+    def __init__(self, ami_class, task_scheduler):
+        self._ami_class = ami_class
+        self._task_scheduler = task_scheduler
+        self._pending = {}
+        self._collecting = set()
+        self._prefix = 'cti-%d-' % os.getpid()
+        self._counter = itertools.count(1)
+
+    def send(self, action, args, complete_event=None, timeout=DEFAULT_TIMEOUT):
+        action_id = '%s%d' % (self._prefix, next(self._counter))
+        pending_action = self.track(action_id, complete_event, timeout)
+        self._ami_class.setactionid(action_id)
+        self._ami_class.sendcommand(action, args)
+        return pending_action
+
+    def track(self, action_id, complete_event=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Tracks an action sent with the given action_id, events are collected
+        until complete_event is received when it is not None.
+        """
+        pending_action = PendingAction(action_id, complete_event)
+        pending_action._timeout_task = self._task_scheduler.schedule(timeout, self._on_timeout, action_id)
+        self._pending[action_id] = pending_action
+        if complete_event is not None:
+            self._collecting.add(action_id)
+        return pending_action
+
+    def is_collecting(self):
+        return bool(self._collecting)
+
+    def collects(self, action_id):
+        return action_id in self._collecting
+
+    def handle_response(self, response):
+        action_id = response.get(ACTION_ID)
+        pending_action = self._pending.get(action_id)
+        if pending_action is None:
+            return
+
+        pending_action.response = response
+        if response.get(RESPONSE) == 'Error':
+            self._resolve(pending_action, PendingAction.ERROR)
+        elif pending_action.complete_event is None:
+            self._resolve(pending_action, PendingAction.SUCCESS)
+
+    def handle_event(self, event):
+        action_id = event.get(ACTION_ID)
+        if action_id not in self._collecting:
+            return
+
+        pending_action = self._pending[action_id]
+        if event.get(EVENT) == pending_action.complete_event:
+            self._resolve(pending_action, PendingAction.SUCCESS)
+        else:
+            pending_action.events.append(event)
+
+    def clear(self):
+        self._pending.clear()
+        self._collecting.clear()
+
+    def _on_timeout(self, action_id):
+        pending_action = self._pending.get(action_id)
+        if pending_action is None:
+            return
+
+        logger.warning('AMI action %s timed out', action_id)
+        pending_action._timeout_task = None
+        self._resolve(pending_action, PendingAction.TIMEOUT)
+
+    def _resolve(self, pending_action, status):
+        del self._pending[pending_action.action_id]
+        self._collecting.discard(pending_action.action_id)
+        pending_action._resolve(status)
@@ -25,16 +25,20 @@ class AMICallbackHandler(object):
     def __init__(self):
         self._callbacks = defaultdict(list)
         self._userevent_callbacks = defaultdict(list)
+        self._dispatch_table = {}
+        self._observers = set()
 
     def register_callback(self, event_name, function):
         key = event_name.lower()
         if function not in self._callbacks[key]:
             self._callbacks[key].append(function)
+            self._on_callbacks_changed()
 
     def register_userevent_callback(self, userevent_name, function):
         key = userevent_name.lower()
         if function not in self._userevent_callbacks[key]:
             self._userevent_callbacks[key].append(function)
+            self._on_callbacks_changed()
 
     def unregister_callback(self, event_name, function):
         callback_key = event_name.lower()
@@ -42,16 +46,40 @@ class AMICallbackHandler(object):
             self._callbacks[callback_key].remove(function)
             if not self._callbacks[callback_key]:
                 self._callbacks.pop(callback_key)
+            self._on_callbacks_changed()
+
+    def attach_observer(self, callback):
+        self._observers.add(callback)
+
+    def detach_observer(self, callback):
+        self._observers.discard(callback)
+
+    def get_event_names(self):
+        event_names = set(self._callbacks)
+        if self._userevent_callbacks:
+            event_names.add('userevent')
+        return event_names
+
+    def _on_callbacks_changed(self):
+        self._dispatch_table.clear()
+        for observer in self._observers:
+            observer()
 
     def get_callbacks(self, event):
-        event_name = event['Event'].lower()
-        callbacks = self._callbacks.get(event_name, [])
+        return list(self.get_callbacks_by_name(event['Event'], event.get('UserEvent')))
 
-        if event_name == 'userevent':
-            key = event['UserEvent'].lower()
-            callbacks = list(callbacks)
-            callbacks.extend(self._userevent_callbacks.get(key, []))
+    def get_callbacks_by_name(self, event_name, userevent_name=None):
+        key = (event_name, userevent_name)
+        callbacks = self._dispatch_table.get(key)
+        if callbacks is None:
+            callbacks = self._dispatch_table[key] = self._build_callbacks(event_name, userevent_name)
+        return callbacks
 
+    def _build_callbacks(self, event_name, userevent_name):
+        event_name = event_name.lower()
+        callbacks = tuple(self._callbacks.get(event_name, []))
+        if event_name == 'userevent' and userevent_name is not None:
+            callbacks += tuple(self._userevent_callbacks.get(userevent_name.lower(), []))
         return callbacks
 
     @classmethod
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AMIEventFilter(object):
+    """
+    Asks Asterisk to only send the events that are handled.
+
+    Asterisk filters can only be added to a session, so event names that
+    are not handled anymore keep being received until the next login.
+    """
+
+    # the AMI of asterisk does not accept longer header lines
+    MAX_FILTER_LENGTH = 900
+
+    def __init__(self, ami_class):
+        self._ami_class = ami_class
+        self._started = False
+        self._sent_event_names = set()
+
+    def start(self, event_names):
+        self._started = True
+        self._sent_event_names = set()
+        self.update(event_names)
+
+    def stop(self):
+        self._started = False
+
+    def update(self, event_names):
+        if not self._started:
+            return
+
+        new_event_names = set(name.lower() for name in event_names) - self._sent_event_names
+        if not new_event_names:
+            return
+
+        logger.info('Adding AMI event filters for %s', ', '.join(sorted(new_event_names)))
+        for pattern in self._build_patterns(sorted(new_event_names)):
+            self._ami_class.sendcommand('Filter', [('Operation', 'Add'),
+                                                   ('Filter', pattern)])
+        self._sent_event_names.update(new_event_names)
+
+    def _build_patterns(self, event_names):
+        patterns = []
+        alternatives = []
+        length = 0
+        for event_name in event_names:
+            alternative = _case_insensitive(event_name)
+            if alternatives and length + len(alternative) > self.MAX_FILTER_LENGTH:
+                patterns.append(_event_pattern(alternatives))
+                alternatives = []
+                length = 0
+            alternatives.append(alternative)
+            length += len(alternative) + 1
+        if alternatives:
+            patterns.append(_event_pattern(alternatives))
+        return patterns
+
+
+def _event_pattern(alternatives):
+    # Asterisk filters are POSIX extended regular expressions matched against
+    # the whole event, starting with "Event: <name>\r\n"
+    return 'Event: (%s)[[:space:]]' % '|'.join(alternatives)
+
+
+def _case_insensitive(event_name):
+    # event names are case insensitive for the callback handler but not for
+    # the regular expressions of asterisk
+    return ''.join('[%s%s]' % (c.upper(), c.lower()) if c.isalpha() else c
+                   for c in event_name)
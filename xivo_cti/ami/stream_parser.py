@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AMIStreamParser(object):
+
+    EVENT_SEPARATOR = '\r\n\r\n'
+    EVENT_HEADER = 'Event: '
+    LINE_SEPARATOR = u'\r\n'
+    FIELD_SEPARATOR = u': '
+    MAX_CACHED_KEYS = 4096
+
+    def __init__(self):
+        self._keys = {}
+        self._reset_pending()
+
+    def feed(self, data):
+        """
+        Returns the raw events completed by data.
+
+        Only the newly received bytes are scanned for the event separator,
+        the bytes of an incomplete event are kept until it is complete.
+        """
+        return self._split_events(data)
+
+    def peek_event_name(self, raw_event):
+        """
+        Returns the name of the event without parsing its other fields or
+        None if raw_event does not start with an Event header.
+        """
+        if not raw_event.startswith(self.EVENT_HEADER):
+            return None
+        return self._field_value(raw_event, len(self.EVENT_HEADER))
+
+    def peek_field(self, raw_event, field_name):
+        marker = '\r\n%s: ' % field_name
+        start = raw_event.find(marker)
+        if start == -1:
+            return None
+        return self._field_value(raw_event, start + len(marker))
+
+    def _field_value(self, raw_event, start):
+        end = raw_event.find('\r\n', start)
+        if end == -1:
+            return raw_event[start:]
+        return raw_event[start:end]
+
+    def parse_event(self, raw_event):
+        event = {}
+        keys = self._keys
+        for line in raw_event.decode('utf8', 'replace').split(self.LINE_SEPARATOR):
+            if u'\n' in line or line == u'--END COMMAND--':  # occurs when requesting "module reload xxx.so"
+                continue
+            raw_key, separator, value = line.partition(self.FIELD_SEPARATOR)
+            if separator:
+                key = keys.get(raw_key)
+                if key is None:
+                    key = self._new_key(raw_key)
+                event[key] = value
+            elif line.startswith('Asterisk Call Manager'):
+                logger.info('%s', line)
+        return event
+
+    def _split_events(self, data):
+        separator = self.EVENT_SEPARATOR
+        index = (self._tail + data).find(separator)
+        if index == -1:
+            self._append_pending(data)
+            return []
+
+        index += self._pending_len - len(self._tail)
+        if self._chunks:
+            self._chunks.append(data)
+            data = ''.join(self._chunks)
+        self._reset_pending()
+
+        raw_events = []
+        start = 0
+        while index != -1:
+            raw_events.append(data[start:index])
+            start = index + len(separator)
+            index = data.find(separator, start)
+
+        if start < len(data):
+            self._append_pending(data[start:])
+        return raw_events
+
+    def _append_pending(self, data):
+        if not data:
+            return
+        self._chunks.append(data)
+        self._pending_len += len(data)
+        tail_len = len(self.EVENT_SEPARATOR) - 1
+        if len(data) >= tail_len:
+            self._tail = data[-tail_len:]
+        else:
+            self._tail = (self._tail + data)[-tail_len:]
+
+    def _reset_pending(self):
+        self._chunks = []
+        self._pending_len = 0
+        self._tail = ''
+
+    def _new_key(self, raw_key):
+        # header names are shared between events instead of being copied in each of them
+        key = raw_key.strip()
+        if len(self._keys) < self.MAX_CACHED_KEYS:
+            self._keys[raw_key] = key
+        return key
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from mock import Mock
+from xivo_cti.ami.action_tracker import AMIActionTracker
+from xivo_cti.ami.action_tracker import PendingAction
+from xivo_cti.task_scheduler import _TaskScheduler
+
+
+class TestAMIActionTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.ami_class = Mock()
+        self.time_function = Mock(return_value=0.0)
+        self.task_scheduler = _TaskScheduler(self.time_function)
+        self.tracker = AMIActionTracker(self.ami_class, self.task_scheduler)
+        self.callback = Mock()
+
+    def test_send(self):
+        pending_action = self.tracker.send('Ping', [])
+
+        self.ami_class.setactionid.assert_called_once_with(pending_action.action_id)
+        self.ami_class.sendcommand.assert_called_once_with('Ping', [])
+        self.assertFalse(pending_action.done())
+
+    def test_send_uses_new_action_ids(self):
+        pending_action_1 = self.tracker.send('Ping', [])
+        pending_action_2 = self.tracker.send('Ping', [])
+
+        self.assertNotEqual(pending_action_1.action_id, pending_action_2.action_id)
+
+    def test_response_success(self):
+        pending_action = self.tracker.track('42').add_callback(self.callback)
+        response = {'Response': 'Success', 'ActionID': '42'}
+
+        self.tracker.handle_response(response)
+
+        self.callback.assert_called_once_with(pending_action)
+        self.assertTrue(pending_action.succeeded())
+        self.assertEqual(pending_action.response, response)
+
+    def test_response_error(self):
+        pending_action = self.tracker.track('42').add_callback(self.callback)
+
+        self.tracker.handle_response({'Response': 'Error', 'ActionID': '42', 'Message': 'No such channel'})
+
+        self.callback.assert_called_once_with(pending_action)
+        self.assertEqual(pending_action.status, PendingAction.ERROR)
+        self.assertEqual(pending_action.error_message(), 'No such channel')
+
+    def test_response_unknown_action_id(self):
+        self.tracker.track('42').add_callback(self.callback)
+
+        self.tracker.handle_response({'Response': 'Success', 'ActionID': '43'})
+        self.tracker.handle_response({'Response': 'Success'})
+
+        self.assertFalse(self.callback.called)
+
+    def test_collected_events(self):
+        pending_action = self.tracker.track('42', 'QueueStatusComplete').add_callback(self.callback)
+        member_1 = {'Event': 'QueueMember', 'ActionID': '42', 'Name': 'Agent/1'}
+        member_2 = {'Event': 'QueueMember', 'ActionID': '42', 'Name': 'Agent/2'}
+
+        self.assertTrue(self.tracker.is_collecting())
+        self.assertTrue(self.tracker.collects('42'))
+
+        self.tracker.handle_response({'Response': 'Success', 'ActionID': '42'})
+        self.tracker.handle_event(member_1)
+        self.tracker.handle_event({'Event': 'QueueMember', 'ActionID': '43'})
+        self.tracker.handle_event(member_2)
+
+        self.assertFalse(self.callback.called)
+
+        self.tracker.handle_event({'Event': 'QueueStatusComplete', 'ActionID': '42'})
+
+        self.callback.assert_called_once_with(pending_action)
+        self.assertTrue(pending_action.succeeded())
+        self.assertEqual(pending_action.events, [member_1, member_2])
+        self.assertFalse(self.tracker.is_collecting())
+
+    def test_collected_events_error(self):
+        pending_action = self.tracker.track('42', 'QueueStatusComplete').add_callback(self.callback)
+
+        self.tracker.handle_response({'Response': 'Error', 'ActionID': '42'})
+
+        self.callback.assert_called_once_with(pending_action)
+        self.assertEqual(pending_action.status, PendingAction.ERROR)
+        self.assertFalse(self.tracker.collects('42'))
+
+    def test_timeout(self):
+        pending_action = self.tracker.track('42', timeout=5).add_callback(self.callback)
+
+        self.time_function.return_value = 6.0
+        self.task_scheduler.run()
+
+        self.callback.assert_called_once_with(pending_action)
+        self.assertEqual(pending_action.status, PendingAction.TIMEOUT)
+        self.assertEqual(pending_action.error_message(), 'timeout')
+
+        self.tracker.handle_response({'Response': 'Success', 'ActionID': '42'})
+
+        self.assertEqual(self.callback.call_count, 1)
+
+    def test_response_cancels_timeout(self):
+        self.tracker.track('42', timeout=5)
+
+        self.tracker.handle_response({'Response': 'Success', 'ActionID': '42'})
+
+        self.assertEqual(self.task_scheduler.timeout(), None)
+
+    def test_add_callback_when_done(self):
+        pending_action = self.tracker.track('42')
+        self.tracker.handle_response({'Response': 'Success', 'ActionID': '42'})
+
+        pending_action.add_callback(self.callback)
+
+        self.callback.assert_called_once_with(pending_action)
+
+    def test_callback_exception(self):
+        failing_callback = Mock(side_effect=Exception())
+        self.tracker.track('42').add_callback(failing_callback).add_callback(self.callback)
+
+        self.tracker.handle_response({'Response': 'Success', 'ActionID': '42'})
+
+        self.assertTrue(self.callback.called)
+
+    def test_clear(self):
+        self.tracker.track('42', 'QueueStatusComplete').add_callback(self.callback)
+
+        self.tracker.clear()
+        self.tracker.handle_response({'Response': 'Success', 'ActionID': '42'})
+
+        self.assertFalse(self.tracker.is_collecting())
+        self.assertFalse(self.callback.called)
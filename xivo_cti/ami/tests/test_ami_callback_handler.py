@@ -154,6 +154,72 @@ class TestAMICallbackHandler(unittest.TestCase):
         self.assertEqual(sorted([callback1, callback2]), sorted(callbacks1))
         self.assertEqual(sorted([callback1, callback2]), sorted(callbacks2))
 
+    def test_get_callbacks_by_name(self):
+        callback = Mock()
+        self.handler.register_callback('NewChannel', callback)
+
+        callbacks = self.handler.get_callbacks_by_name('Newchannel')
+
+        self.assertEqual(callbacks, (callback,))
+        self.assertEqual(self.handler.get_callbacks_by_name('Hangup'), ())
+
+    def test_get_callbacks_by_name_userevent(self):
+        callback1 = Mock()
+        callback2 = Mock()
+        self.handler.register_callback('UserEvent', callback1)
+        self.handler.register_userevent_callback('Foobar', callback2)
+
+        callbacks = self.handler.get_callbacks_by_name('UserEvent', 'Foobar')
+
+        self.assertEqual(callbacks, (callback1, callback2))
+        self.assertEqual(self.handler.get_callbacks_by_name('UserEvent'), (callback1,))
+
+    def test_get_callbacks_by_name_after_registration_change(self):
+        callback1 = Mock()
+        callback2 = Mock()
+        self.handler.register_callback('Hangup', callback1)
+        self.handler.get_callbacks_by_name('Hangup')
+
+        self.handler.register_callback('Hangup', callback2)
+
+        self.assertEqual(self.handler.get_callbacks_by_name('Hangup'), (callback1, callback2))
+
+        self.handler.unregister_callback('Hangup', callback1)
+
+        self.assertEqual(self.handler.get_callbacks_by_name('Hangup'), (callback2,))
+
+    def test_get_event_names(self):
+        self.handler.register_callback('NewChannel', Mock())
+        self.handler.register_callback('Hangup', Mock())
+
+        self.assertEqual(self.handler.get_event_names(), set(['newchannel', 'hangup']))
+
+    def test_get_event_names_userevent(self):
+        self.handler.register_userevent_callback('Foobar', Mock())
+
+        self.assertEqual(self.handler.get_event_names(), set(['userevent']))
+
+    def test_observer_notified_on_change(self):
+        observer = Mock()
+        callback = Mock()
+        self.handler.attach_observer(observer)
+
+        self.handler.register_callback('Hangup', callback)
+        self.handler.register_callback('Hangup', callback)
+        self.handler.register_userevent_callback('Foobar', callback)
+        self.handler.unregister_callback('Hangup', callback)
+
+        self.assertEqual(observer.call_count, 3)
+
+    def test_detach_observer(self):
+        observer = Mock()
+        self.handler.attach_observer(observer)
+        self.handler.detach_observer(observer)
+
+        self.handler.register_callback('Hangup', Mock())
+
+        self.assertFalse(observer.called)
+
     def _new_event(self, event_name):
         return {'Event': event_name}
 
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import re
+import unittest
+
+from mock import Mock
+from xivo_cti.ami.event_filter import AMIEventFilter
+
+
+class TestAMIEventFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.ami_class = Mock()
+        self.event_filter = AMIEventFilter(self.ami_class)
+
+    def test_update_before_start(self):
+        self.event_filter.update(['Hangup'])
+
+        self.assertFalse(self.ami_class.sendcommand.called)
+
+    def test_start(self):
+        self.event_filter.start(['Hangup', 'NewChannel'])
+
+        self.ami_class.sendcommand.assert_called_once_with(
+            'Filter', [('Operation', 'Add'),
+                       ('Filter', 'Event: ([Hh][Aa][Nn][Gg][Uu][Pp]|[Nn][Ee][Ww][Cc][Hh][Aa][Nn][Nn][Ee][Ll])[[:space:]]')])
+
+    def test_update_only_sends_new_event_names(self):
+        self.event_filter.start(['Hangup'])
+        self.ami_class.reset_mock()
+
+        self.event_filter.update(['hangup', 'Dial'])
+
+        self.ami_class.sendcommand.assert_called_once_with(
+            'Filter', [('Operation', 'Add'), ('Filter', 'Event: ([Dd][Ii][Aa][Ll])[[:space:]]')])
+
+    def test_update_nothing_new(self):
+        self.event_filter.start(['Hangup'])
+        self.ami_class.reset_mock()
+
+        self.event_filter.update(['Hangup'])
+
+        self.assertFalse(self.ami_class.sendcommand.called)
+
+    def test_update_after_stop(self):
+        self.event_filter.start(['Hangup'])
+        self.event_filter.stop()
+        self.ami_class.reset_mock()
+
+        self.event_filter.update(['Dial'])
+
+        self.assertFalse(self.ami_class.sendcommand.called)
+
+    def test_start_resends_everything(self):
+        self.event_filter.start(['Hangup'])
+        self.ami_class.reset_mock()
+
+        self.event_filter.start(['Hangup'])
+
+        self.assertEqual(self.ami_class.sendcommand.call_count, 1)
+
+    def test_long_filters_are_split(self):
+        event_names = ['Event%s' % i for i in range(200)]
+
+        self.event_filter.start(event_names)
+
+        patterns = [c[0][1][1][1] for c in self.ami_class.sendcommand.call_args_list]
+        self.assertTrue(len(patterns) > 1)
+        for pattern in patterns:
+            self.assertTrue(len(pattern) < 1000)
+        for event_name in event_names:
+            event = 'Event: %s\r\nPrivilege: call,all\r\n' % event_name
+            self.assertEqual(len([p for p in patterns if re.search(p.replace('[[:space:]]', r'\s'), event)]), 1)
+
+    def test_pattern_does_not_match_longer_event_name(self):
+        self.event_filter.start(['Hangup'])
+
+        pattern = self.ami_class.sendcommand.call_args[0][1][1][1].replace('[[:space:]]', r'\s')
+        self.assertTrue(re.search(pattern, 'Event: Hangup\r\nChannel: SIP/abc\r\n'))
+        self.assertFalse(re.search(pattern, 'Event: HangupRequest\r\nChannel: SIP/abc\r\n'))
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from hamcrest import assert_that
+from hamcrest import contains
+from hamcrest import equal_to
+from hamcrest import same_instance
+from xivo_cti.ami.stream_parser import AMIStreamParser
+
+
+class TestAMIStreamParser(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = AMIStreamParser()
+
+    def test_feed_complete_events(self):
+        data = 'Event: Foo\r\nChannel: SIP/abc\r\n\r\nResponse: Success\r\nActionID: 123\r\n\r\n'
+
+        raw_events = self.parser.feed(data)
+
+        assert_that(raw_events, contains('Event: Foo\r\nChannel: SIP/abc',
+                                         'Response: Success\r\nActionID: 123'))
+
+    def test_feed_incomplete_event(self):
+        raw_events = self.parser.feed('Event: Foo\r\nChannel: SIP/abc\r\n')
+
+        assert_that(raw_events, equal_to([]))
+
+        raw_events = self.parser.feed('\r\n')
+
+        assert_that(raw_events, contains('Event: Foo\r\nChannel: SIP/abc'))
+
+    def test_feed_byte_by_byte(self):
+        data = 'Event: Foo\r\nChannel: SIP/abc\r\n\r\nEvent: Bar\r\n\r\nEvent: Baz'
+
+        raw_events = []
+        for byte in data:
+            raw_events.extend(self.parser.feed(byte))
+
+        assert_that(raw_events, contains('Event: Foo\r\nChannel: SIP/abc', 'Event: Bar'))
+
+    def test_feed_separator_split_across_chunks(self):
+        raw_events = self.parser.feed('Event: Foo\r\n\r')
+        raw_events.extend(self.parser.feed('\nEvent: Bar\r\n\r\n'))
+
+        assert_that(raw_events, contains('Event: Foo', 'Event: Bar'))
+
+    def test_peek_event_name(self):
+        assert_that(self.parser.peek_event_name('Event: Foo\r\nChannel: SIP/abc'), equal_to('Foo'))
+        assert_that(self.parser.peek_event_name('Event: Foo'), equal_to('Foo'))
+        assert_that(self.parser.peek_event_name('Response: Success\r\nEvent: Foo'), equal_to(None))
+
+    def test_peek_field(self):
+        raw_event = 'Event: UserEvent\r\nUserEvent: Foo\r\nBar: baz'
+
+        assert_that(self.parser.peek_field(raw_event, 'UserEvent'), equal_to('Foo'))
+        assert_that(self.parser.peek_field(raw_event, 'Bar'), equal_to('baz'))
+        assert_that(self.parser.peek_field(raw_event, 'Channel'), equal_to(None))
+
+    def test_parse_event_decodes_values(self):
+        raw_event = 'Event: Foobar\r\nCallerIDName: LASTNAME Firstnam\xe9'
+
+        event = self.parser.parse_event(raw_event)
+
+        assert_that(event, equal_to({'Event': u'Foobar',
+                                     'CallerIDName': u'LASTNAME Firstnam\ufffd'}))
+
+    def test_parse_event_ignores_command_output(self):
+        raw_event = 'Response: Follows\r\nPrivilege: Command\r\nfoo: bar\nbaz\r\n--END COMMAND--'
+
+        event = self.parser.parse_event(raw_event)
+
+        assert_that(event, equal_to({'Response': 'Follows', 'Privilege': 'Command'}))
+
+    def test_parse_event_reuses_keys(self):
+        event_1 = self.parser.parse_event('Event: Foo\r\nChannel' + ': SIP/abc')
+        event_2 = self.parser.parse_event('Event: Bar\r\nChannel' + ': SIP/def')
+
+        key_1 = [key for key in event_1 if key == 'Channel'][0]
+        key_2 = [key for key in event_2 if key == 'Channel'][0]
+        assert_that(key_1, same_instance(key_2))
@@ -297,14 +297,14 @@ class AMI_1_8(object):
     def ami_messagewaiting(self, event):
         try:
             full_mailbox = event['Mailbox']
-            for mailbox_id, mailbox in self.innerdata.xod_config['voicemails'].keeplist.iteritems():
-                if full_mailbox == mailbox['fullmailbox']:
-                    previous_status = self.innerdata.xod_status['voicemails'][mailbox_id]
-                    old = event.get('Old') or previous_status['old']
-                    new = event.get('New') or previous_status['new']
-                    waiting = event.get('Waiting') or previous_status['waiting']
-                    logger.info("Voicemail event received. mailbox:%s new:%s old:%s waiting:%s", full_mailbox, new, old, waiting)
-                    self.innerdata.voicemailupdate(full_mailbox, new, old, waiting)
+            mailbox_id = self.innerdata.xod_config['voicemails'].find_by('fullmailbox', full_mailbox)
+            if mailbox_id is not None:
+                previous_status = self.innerdata.xod_status['voicemails'][mailbox_id]
+                old = event.get('Old') or previous_status['old']
+                new = event.get('New') or previous_status['new']
+                waiting = event.get('Waiting') or previous_status['waiting']
+                logger.info("Voicemail event received. mailbox:%s new:%s old:%s waiting:%s", full_mailbox, new, old, waiting)
+                self.innerdata.voicemailupdate(full_mailbox, new, old, waiting)
             if 'Old' not in event and 'New' not in event:
                 logger.info("Voicemail event did not contain 'old' and 'new' count. retrieving mailbox count")
                 params = {'mode': 'vmupdate',
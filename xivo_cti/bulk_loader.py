@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import logging
+import threading
+import time
+
+from concurrent import futures
+
+logger = logging.getLogger('bulk_loader')
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def load_lists(lists, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Initializes the lists, a dict of list name: AnyList.
+
+    The items of the lists are fetched concurrently, each worker thread using
+    its own database session, then the lists are built in the calling thread.
+    """
+    start_time = time.time()
+    keeplists = fetch_lists(lists, max_workers)
+
+    for listname in sorted(keeplists):
+        init_start_time = time.time()
+        lists[listname].init_data(keeplists[listname])
+        logger.info('%s: built in %.3f seconds', listname, time.time() - init_start_time)
+    logger.info('%d lists loaded in %.3f seconds', len(lists), time.time() - start_time)
+
+
+def fetch_lists(lists, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Returns the items of each list fetched concurrently, {list name: items}.
+    """
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetches = dict((listname, executor.submit(_fetch, anylist))
+                       for listname, anylist in lists.iteritems())
+
+    keeplists = {}
+    for listname in sorted(fetches):
+        keeplist, fetch_time = fetches[listname].result()
+        logger.info('%s: %d items fetched in %.3f seconds', listname, len(keeplist), fetch_time)
+        keeplists[listname] = keeplist
+    return keeplists
+
+
+def fetch_lists_in_background(lists, callback, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Fetches the items of the lists in another thread, callback is called from
+    that thread with the result of fetch_lists.
+    """
+    thread = threading.Thread(target=_fetch_lists_in_background, args=(lists, callback, max_workers))
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def _fetch_lists_in_background(lists, callback, max_workers):
+    try:
+        keeplists = fetch_lists(lists, max_workers)
+    except Exception:
+        logger.exception('Could not fetch the lists')
+    else:
+        callback(keeplists)
+
+
+def _fetch(anylist):
+    start_time = time.time()
+    keeplist = anylist.fetch_data()
+    return keeplist, time.time() - start_time
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+from collections import defaultdict
+from xivo.asterisk.line_identity import identity_from_channel
+
+
+class ChannelStore(dict):
+    """
+    The channels by name, indexed by unique id, line identity, relation and
+    bridged peer.
+
+    The indexes are updated when a channel is added or removed, reindex
+    must be called when the relations or the peer of a channel change.
+    """
+
+    def __init__(self):
+        dict.__init__(self)
+        self._indexed_keys = {}
+        self._by_unique_id = {}
+        self._by_identity = defaultdict(set)
+        self._by_relation = defaultdict(set)
+        self._by_peer = defaultdict(set)
+
+    def __setitem__(self, name, channel):
+        if name in self:
+            self._unindex(name)
+        dict.__setitem__(self, name, channel)
+        self._index(name, channel)
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self._unindex(name)
+
+    def pop(self, name, *default):
+        if name in self:
+            self._unindex(name)
+        return dict.pop(self, name, *default)
+
+    def clear(self):
+        dict.clear(self)
+        self._indexed_keys.clear()
+        self._by_unique_id.clear()
+        self._by_identity.clear()
+        self._by_relation.clear()
+        self._by_peer.clear()
+
+    def reindex(self, name):
+        if name in self:
+            self._unindex(name)
+            self._index(name, self[name])
+
+    def find_by_unique_id(self, unique_id):
+        return self._by_unique_id.get(unique_id)
+
+    def find_by_identity(self, identity):
+        return sorted(self._by_identity.get(identity, ()))
+
+    def find_by_relation(self, relation):
+        return sorted(self._by_relation.get(relation, ()))
+
+    def find_by_peer(self, peer):
+        return sorted(self._by_peer.get(peer, ()))
+
+    def _index(self, name, channel):
+        identity = identity_from_channel(name)
+        relations = tuple(channel.relations)
+        keys = (channel.unique_id, identity, relations, channel.peerchannel)
+        self._indexed_keys[name] = keys
+
+        if channel.unique_id is not None:
+            self._by_unique_id[channel.unique_id] = name
+        self._by_identity[identity].add(name)
+        for relation in relations:
+            self._by_relation[relation].add(name)
+        if channel.peerchannel:
+            self._by_peer[channel.peerchannel].add(name)
+
+    def _unindex(self, name):
+        unique_id, identity, relations, peer = self._indexed_keys.pop(name)
+
+        if self._by_unique_id.get(unique_id) == name:
+            del self._by_unique_id[unique_id]
+        _discard(self._by_identity, identity, name)
+        for relation in relations:
+            _discard(self._by_relation, relation, name)
+        if peer:
+            _discard(self._by_peer, peer, name)
+
+
+def _discard(index, key, name):
+    names = index.get(key)
+    if names is not None:
+        names.discard(name)
+        if not names:
+            del index[key]
@@ -23,6 +23,14 @@ from xivo_cti import BUFSIZE_LARGE
 
 
 class ClientConnection(object):
+
+    STATE_IDLE = 'idle'
+    STATE_SENDING = 'sending'
+    STATE_CLOSED = 'closed'
+
+    # small messages are joined to be sent in one call up to this size
+    MAX_COALESCED_SIZE = 64 * 1024
+
     class CloseException(Exception):
         def __init__(self, errno= -1):
             self.args = (errno,)
@@ -31,10 +39,16 @@ class ClientConnection(object):
         self.socket = socket
         self.address = address
         self.socket.setblocking(0)
+        # the queued strings may be shared with other connections, they are
+        # never modified and the bytes already sent of the first one are
+        # skipped using sendoffset instead of slicing it
         self.sendqueue = deque()
+        self.sendoffset = 0
+        self._queued_bytes = 0
         self.readbuff = ''
         self.isClosed = False
         self.separator = sep
+        self._observers = []
 
     # useful for select
     def fileno(self):
@@ -48,25 +62,50 @@ class ClientConnection(object):
         if not self.isClosed:
             self.isClosed = True
             self.socket.close()
+            self._notify_observers(self.STATE_CLOSED)
+
+    def attach_observer(self, callback):
+        if callback not in self._observers:
+            self._observers.append(callback)
+
+    def detach_observer(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    def _notify_observers(self, state):
+        # observers are notified in the order they were attached and may be
+        # detached while being notified
+        for observer in list(self._observers):
+            observer(self, state)
 
     def append_queue(self, data):
         if self.isClosed:
             raise self.CloseException()
         if data:
+            need_sending = self.need_sending()
             self.sendqueue.append(data)
+            self._queued_bytes += len(data)
+            if not need_sending:
+                self._notify_observers(self.STATE_SENDING)
 
     # to be called when the socket is ready for writing
     def process_sending(self):
         while self.sendqueue:
-            data = self.sendqueue.popleft()
+            self._coalesce_sendqueue()
+            data = self.sendqueue[0]
             try:
-                n = self.socket.send(data)
-                if n < len(data):  # there is some data left to be sent
-                    self.sendqueue.appendleft(data[n:])
+                if self.sendoffset:
+                    n = self.socket.send(buffer(data, self.sendoffset))
+                else:
+                    n = self.socket.send(data)
+                self.sendoffset += n
+                self._queued_bytes -= n
+                if self.sendoffset == len(data):
+                    self.sendqueue.popleft()
+                    self.sendoffset = 0
             except socket.error, (_errno, string):
                 if _errno == errno.EAGAIN:
-                    self.sendqueue.appendleft(data)  # try next time !
-                    return
+                    return  # try next time !
                 elif _errno in [errno.EPIPE, errno.ECONNRESET, errno.ENOTCONN, errno.ETIMEDOUT, errno.EHOSTUNREACH]:
                     self.close()
                     raise self.CloseException(_errno)
@@ -74,6 +113,38 @@ class ClientConnection(object):
                     raise self.CloseException(_errno)
                 else:
                     raise socket.error(_errno, string)
+        self._notify_observers(self.STATE_IDLE)
+        if self.need_sending():
+            # an observer queued data when notified, the observers notified
+            # after it have been told that the connection is idle
+            self._notify_observers(self.STATE_SENDING)
+
+    def queued_bytes(self):
+        return self._queued_bytes
+
+    def drop_queue(self):
+        # the partially sent data must be completed to keep the stream valid
+        if self.sendoffset:
+            data = self.sendqueue.popleft()
+            self.sendqueue.clear()
+            self.sendqueue.append(data)
+            self._queued_bytes = len(data) - self.sendoffset
+        else:
+            self.sendqueue.clear()
+            self._queued_bytes = 0
+
+    def _coalesce_sendqueue(self):
+        queue = self.sendqueue
+        if len(queue) < 2 or self.sendoffset or len(queue[0]) + len(queue[1]) > self.MAX_COALESCED_SIZE:
+            return
+
+        chunks = [queue.popleft()]
+        size = len(chunks[0])
+        while queue and size + len(queue[0]) <= self.MAX_COALESCED_SIZE:
+            data = queue.popleft()
+            chunks.append(data)
+            size += len(data)
+        queue.appendleft(''.join(chunks))
 
     # do we have some data to be sent ?
     def need_sending(self):
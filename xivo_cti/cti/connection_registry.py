@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+from collections import defaultdict
+
+
+class ConnectionRegistry(object):
+    """
+    Indexes the CTI interfaces by peer address and, once their user is
+    known, by user id, context, CTI profile and agent id.
+    """
+
+    def __init__(self):
+        self._interfaces_by_peer = {}
+        self._peers = {}
+        self._interfaces_by_user_id = defaultdict(set)
+        self._user_ids = {}
+        self._users = {}
+        self._user_ids_by_context = defaultdict(set)
+        self._user_ids_by_agent_id = defaultdict(set)
+
+    def add(self, interface_cti, peername):
+        peer = _format_peer(peername)
+        self._interfaces_by_peer[peer] = interface_cti
+        self._peers[interface_cti] = peer
+
+    def remove(self, interface_cti):
+        peer = self._peers.pop(interface_cti, None)
+        if self._interfaces_by_peer.get(peer) is interface_cti:
+            del self._interfaces_by_peer[peer]
+        self._remove_interface_user(interface_cti)
+
+    def set_user(self, interface_cti, user):
+        """
+        Called when the user of the interface is known, i.e. on login.
+        """
+        self._remove_interface_user(interface_cti)
+        user_id = str(user['id'])
+        self._user_ids[interface_cti] = user_id
+        self._interfaces_by_user_id[user_id].add(interface_cti)
+        if user_id not in self._users:
+            self._index_user(user_id, user)
+
+    def update_user(self, user):
+        """
+        Called when the configuration of a user changes.
+        """
+        user_id = str(user['id'])
+        if user_id in self._users:
+            self._unindex_user(user_id)
+            self._index_user(user_id, user)
+
+    def remove_user(self, user_id):
+        for interface_cti in list(self._interfaces_by_user_id.get(user_id, ())):
+            self._remove_interface_user(interface_cti)
+
+    def find_by_peer(self, peer):
+        """
+        peer is formatted as "<address>:<port>".
+        """
+        return self._interfaces_by_peer.get(peer)
+
+    def find_by_user_id(self, user_id):
+        return list(self._interfaces_by_user_id.get(user_id, ()))
+
+    def find(self, tomatch, user_match):
+        """
+        Returns the interfaces of the users matching the criteria of
+        Safe.user_match. user_match is called to check the queue and group
+        memberships.
+        """
+        return [interface_cti
+                for user_id in self._find_user_ids(tomatch, user_match)
+                for interface_cti in self._interfaces_by_user_id[user_id]]
+
+    def _find_user_ids(self, tomatch, user_match):
+        if 'desttype' in tomatch and 'destid' in tomatch:
+            dest_type, dest_id = tomatch['desttype'], tomatch['destid']
+            if dest_type == 'user':
+                user_ids = self._user_ids_in(set([str(dest_id)]))
+            elif dest_type == 'agent':
+                user_ids = self._user_ids_by_agent_id.get(int(dest_id), ())
+            elif dest_type in ('queue', 'group') and dest_id:
+                return [user_id for user_id in self._user_ids_in_contexts(tomatch)
+                        if user_match(user_id, tomatch)]
+            else:
+                return []
+        else:
+            user_ids = self._user_ids_in_contexts(tomatch)
+
+        return [user_id for user_id in user_ids if self._match_filters(user_id, tomatch)]
+
+    def _user_ids_in(self, user_ids):
+        return user_ids.intersection(self._users)
+
+    def _user_ids_in_contexts(self, tomatch):
+        if 'contexts' not in tomatch:
+            return self._users.keys()
+        user_ids = set()
+        for context in tomatch['contexts']:
+            user_ids.update(self._user_ids_by_context.get(context, ()))
+        return user_ids
+
+    def _match_filters(self, user_id, tomatch):
+        context, profile_id, _ = self._users[user_id]
+        if 'profileids' in tomatch and profile_id not in tomatch['profileids']:
+            return False
+        if 'contexts' in tomatch and context not in tomatch['contexts']:
+            return False
+        return True
+
+    def _remove_interface_user(self, interface_cti):
+        user_id = self._user_ids.pop(interface_cti, None)
+        if user_id is None:
+            return
+        interfaces_cti = self._interfaces_by_user_id[user_id]
+        interfaces_cti.discard(interface_cti)
+        if not interfaces_cti:
+            del self._interfaces_by_user_id[user_id]
+            self._unindex_user(user_id)
+
+    def _index_user(self, user_id, user):
+        context, agent_id = user.get('context'), user.get('agentid')
+        self._users[user_id] = (context, user.get('cti_profile_id'), agent_id)
+        self._user_ids_by_context[context].add(user_id)
+        if agent_id:
+            self._user_ids_by_agent_id[agent_id].add(user_id)
+
+    def _unindex_user(self, user_id):
+        context, _, agent_id = self._users.pop(user_id)
+        _discard(self._user_ids_by_context, context, user_id)
+        if agent_id:
+            _discard(self._user_ids_by_agent_id, agent_id, user_id)
+
+
+def _format_peer(peername):
+    return '%s:%d' % tuple(peername[:2])
+
+
+def _discard(index, key, value):
+    values = index.get(key)
+    if values is not None:
+        values.discard(value)
+        if not values:
+            del index[key]
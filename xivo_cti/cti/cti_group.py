@@ -19,6 +19,9 @@ import logging
 
 from collections import deque
 from xivo_cti.client_connection import ClientConnection
+from xivo_cti.cti.status_update import copy_status_update
+from xivo_cti.cti.status_update import merge_status_update
+from xivo_cti.cti.status_update import status_update_key
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +33,7 @@ class CTIGroup(object):
         self._flusher = flusher
         self._interfaces = set()
         self._buffer = deque()
+        self._status_updates = {}
 
     def add(self, interface_cti):
         if interface_cti.state() == interface_cti.STATE_DISCONNECTED:
@@ -50,14 +54,36 @@ class CTIGroup(object):
         if not self._buffer:
             self._flusher.add(self)
 
-        self._buffer.append(self._cti_msg_encoder.encode(msg))
+        key = status_update_key(msg)
+        if key is None:
+            self._close_status_updates(msg.get('listname'))
+            self._buffer.append((msg, self._cti_msg_encoder.encode(msg)))
+        elif key in self._status_updates:
+            merge_status_update(self._status_updates[key], msg)
+        else:
+            # encoded on flush, the status updates of the same object sent
+            # until then are merged in it
+            status_update = copy_status_update(msg)
+            self._status_updates[key] = status_update
+            self._buffer.append((status_update, None))
+
+    def _close_status_updates(self, listname):
+        # the status updates sent after another message of the same list,
+        # e.g. a delconfig, must not be merged with the previous ones
+        if not listname or not self._status_updates:
+            return
+        for key in self._status_updates.keys():
+            if key[0] == listname:
+                del self._status_updates[key]
 
     def flush(self):
-        data = self._reset_buffer()
+        messages = self._reset_buffer()
+        # the same string is queued on every connection, it is never copied
+        data = ''.join(encoded_msg for _, encoded_msg in messages)
         closed_interfaces = []
         for interface_cti in self._interfaces:
             try:
-                interface_cti.send_encoded_message(data)
+                interface_cti.send_encoded_message(data, messages)
             except ClientConnection.CloseException:
                 logger.warning('Error while calling send_encoded_message: connection closed', exc_info=True)
                 closed_interfaces.append(interface_cti)
@@ -66,9 +92,12 @@ class CTIGroup(object):
             self._interfaces.remove(closed_interface)
 
     def _reset_buffer(self):
-        data = ''.join(self._buffer)
+        encode = self._cti_msg_encoder.encode
+        messages = [(msg, encode(msg) if encoded_msg is None else encoded_msg)
+                    for msg, encoded_msg in self._buffer]
         self._buffer.clear()
-        return data
+        self._status_updates.clear()
+        return messages
 
 
 class CTIGroupFactory(object):
@@ -15,12 +15,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
-import cjson
 import time
 
+from xivo_cti.cti import json_codec
+
 
 class CTIMessageEncoder(object):
 
+    def __init__(self, codec=None):
+        self._codec = codec or json_codec.default_codec()
+
     def encode(self, msg):
-        msg['timenow'] = time.time()
-        return cjson.encode(msg) + '\n'
+        # the callers sending a message to many connections encode it once,
+        # the messages are not cached here since they may be changed and sent
+        # again before the next flush
+        return self._codec.encode(dict(msg, timenow=time.time())) + '\n'
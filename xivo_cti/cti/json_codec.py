@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+JSON encoding and decoding of the CTI messages.
+
+The cjson backend is used when available, the json module of the standard
+library is the fallback. Both decode the utf-8 encoded lines received from
+the clients and encode to ascii strings.
+"""
+
+import json
+import re
+
+try:
+    import cjson
+except ImportError:
+    cjson = None
+
+_NON_ASCII = re.compile(r'[\x80-\xff]')
+
+
+class CJSONCodec(object):
+
+    name = 'cjson'
+
+    def decode(self, data):
+        # cjson decodes byte strings as latin-1 and does not unescape "\/",
+        # the lines that do not need it are decoded without a unicode copy
+        if isinstance(data, str) and _NON_ASCII.search(data) is None and '\\/' not in data:
+            return cjson.decode(data)
+        if isinstance(data, str):
+            data = data.decode('utf-8')
+        return cjson.decode(data.replace(u'\\/', u'/'))
+
+    def encode(self, obj):
+        return cjson.encode(obj)
+
+
+class StdlibJSONCodec(object):
+
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder()
+
+    def decode(self, data):
+        return json.loads(data)
+
+    def encode(self, obj):
+        return self._encoder.encode(obj)
+
+
+_BACKENDS = [('cjson', CJSONCodec, cjson is not None),
+             ('json', StdlibJSONCodec, True)]
+
+
+def new_codec(backend=None):
+    """
+    Returns a codec using the given backend or the fastest one available.
+    """
+    for name, codec_class, available in _BACKENDS:
+        if backend is not None and name != backend:
+            continue
+        if available:
+            return codec_class()
+    raise ValueError('JSON backend %s is not available' % backend)
+
+
+_default_codec = None
+
+
+def default_codec():
+    global _default_codec
+    if _default_codec is None:
+        _default_codec = new_codec()
+    return _default_codec
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import logging
+
+from collections import OrderedDict
+from xivo_cti.client_connection import ClientConnection
+from xivo_cti.cti.status_update import copy_status_update
+from xivo_cti.cti.status_update import merge_status_update
+from xivo_cti.cti.status_update import status_update_key
+
+logger = logging.getLogger(__name__)
+
+POLICY_COALESCE = 'coalesce'
+POLICY_RESYNC = 'resync'
+POLICY_DISCONNECT = 'disconnect'
+
+RESYNC_REQUIRED_MESSAGE = {'class': 'resync_required'}
+
+
+class SendQueuePolicy(object):
+    """
+    Limits the number of bytes waiting to be sent to a client.
+
+    When the limit is reached, the status updates are coalesced until the
+    client has read its queue, or the queue is replaced by a message telling
+    the client to fetch its lists again, or the client is disconnected.
+    """
+
+    def __init__(self, connection, encode, max_bytes, policy):
+        self._connection = connection
+        self._encode = encode
+        self._max_bytes = max_bytes
+        self._policy = policy
+        self._coalesced = OrderedDict()
+        self._coalesced_bytes = 0
+        self._nb_coalesced = 0
+        self._resync_required = False
+
+    def is_slow(self):
+        return bool(self._coalesced) or self._resync_required
+
+    def queued_bytes(self):
+        return self._connection.queued_bytes() + self._coalesced_bytes
+
+    def send(self, data, messages=None):
+        """
+        messages are the (msg, encoded_msg) pairs data is made of, they are
+        needed to coalesce the status updates.
+        """
+        if self._coalesced:
+            self._coalesce(data, messages)
+        elif self._resync_required:
+            return
+        elif self._max_bytes and self._connection.queued_bytes() + len(data) > self._max_bytes:
+            self._on_limit_reached(data, messages)
+        else:
+            self._connection.append_queue(data)
+
+    def on_connection_idle(self):
+        self._resync_required = False
+        if not self._coalesced:
+            return
+
+        logger.info('%s: sending %d coalesced messages', self._connection.getpeername(), len(self._coalesced))
+        coalesced = self._coalesced
+        self._coalesced = OrderedDict()
+        self._coalesced_bytes = 0
+        data = ''.join(msg if isinstance(msg, str) else self._encode(msg) for msg in coalesced.itervalues())
+        self._connection.append_queue(data)
+
+    def _on_limit_reached(self, data, messages):
+        logger.warning('%s: %d bytes waiting to be sent, applying policy %s',
+                       self._connection.getpeername(), self._connection.queued_bytes(), self._policy)
+        if self._policy == POLICY_COALESCE:
+            self._coalesce(data, messages)
+        elif self._policy == POLICY_RESYNC:
+            self._resync_required = True
+            self._connection.drop_queue()
+            self._connection.append_queue(self._encode(dict(RESYNC_REQUIRED_MESSAGE)))
+        else:
+            self._disconnect()
+
+    def _coalesce(self, data, messages):
+        if messages is None:
+            messages = [(None, data)]
+
+        for msg, encoded_msg in messages:
+            key = status_update_key(msg) if msg is not None else None
+            if key is None:
+                self._nb_coalesced += 1
+                self._coalesced[self._nb_coalesced] = encoded_msg
+                self._coalesced_bytes += len(encoded_msg)
+            elif key in self._coalesced:
+                merge_status_update(self._coalesced[key], msg)
+            else:
+                self._coalesced[key] = copy_status_update(msg)
+                self._coalesced_bytes += len(encoded_msg)
+
+        # the messages that can not be coalesced are still kept
+        if self._max_bytes and self._coalesced_bytes > self._max_bytes:
+            self._disconnect()
+
+    def _disconnect(self):
+        logger.warning('%s: disconnecting slow client', self._connection.getpeername())
+        self._coalesced = OrderedDict()
+        self._coalesced_bytes = 0
+        self._connection.close()
+        raise ClientConnection.CloseException()
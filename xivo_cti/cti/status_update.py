@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Helpers for the getlist updatestatus messages, whose status is a delta of
+the status of the (listname, tid) object.
+"""
+
+
+def status_update_key(msg):
+    if msg.get('class') == 'getlist' and msg.get('function') == 'updatestatus':
+        return msg.get('listname'), msg.get('tid')
+    return None
+
+
+def copy_status_update(msg):
+    msg_copy = dict(msg)
+    msg_copy['status'] = dict(msg['status'])
+    return msg_copy
+
+
+def merge_status_update(merged_msg, msg):
+    merged_msg['status'].update(msg['status'])
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from hamcrest import assert_that, contains_inanyorder, equal_to, none
+from mock import Mock, sentinel
+from xivo_cti.cti.connection_registry import ConnectionRegistry
+
+
+def _user(user_id, context='default', profile_id=1, agent_id=None):
+    return {'id': user_id,
+            'context': context,
+            'cti_profile_id': profile_id,
+            'agentid': agent_id}
+
+
+class TestConnectionRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ConnectionRegistry()
+        self.user_match = Mock()
+
+    def _add(self, user, peername=('10.0.0.1', 1234)):
+        interface_cti = Mock()
+        self.registry.add(interface_cti, peername)
+        if user is not None:
+            self.registry.set_user(interface_cti, user)
+        return interface_cti
+
+    def test_find_by_peer(self):
+        interface_cti = self._add(None, ('10.0.0.1', 1234))
+
+        assert_that(self.registry.find_by_peer('10.0.0.1:1234'), equal_to(interface_cti))
+        assert_that(self.registry.find_by_peer('10.0.0.1:4321'), none())
+
+    def test_find_by_user_id(self):
+        interface_cti_1 = self._add(_user(1), ('10.0.0.1', 1))
+        interface_cti_2 = self._add(_user(1), ('10.0.0.1', 2))
+        self._add(_user(2), ('10.0.0.1', 3))
+
+        result = self.registry.find_by_user_id('1')
+
+        assert_that(result, contains_inanyorder(interface_cti_1, interface_cti_2))
+
+    def test_find_all(self):
+        interface_cti_1 = self._add(_user(1))
+        interface_cti_2 = self._add(_user(2))
+        self._add(None)
+
+        result = self.registry.find({}, self.user_match)
+
+        assert_that(result, contains_inanyorder(interface_cti_1, interface_cti_2))
+
+    def test_find_user(self):
+        interface_cti = self._add(_user(1))
+        self._add(_user(2))
+
+        result = self.registry.find({'desttype': 'user', 'destid': 1}, self.user_match)
+
+        assert_that(result, equal_to([interface_cti]))
+
+    def test_find_agent(self):
+        interface_cti = self._add(_user(1, agent_id=42))
+        self._add(_user(2))
+
+        result = self.registry.find({'desttype': 'agent', 'destid': '42'}, self.user_match)
+
+        assert_that(result, equal_to([interface_cti]))
+
+    def test_find_queue_uses_user_match(self):
+        tomatch = {'desttype': 'queue', 'destid': '3', 'contexts': ['default']}
+        interface_cti = self._add(_user(1))
+        self._add(_user(2))
+        self._add(_user(3, context='other'))
+        self.user_match.side_effect = lambda user_id, _: user_id == '1'
+
+        result = self.registry.find(tomatch, self.user_match)
+
+        assert_that(result, equal_to([interface_cti]))
+        assert_that(self.user_match.call_count, equal_to(2))
+
+    def test_find_unknown_desttype(self):
+        self._add(_user(1))
+
+        result = self.registry.find({'desttype': 'foobar', 'destid': '1'}, self.user_match)
+
+        assert_that(result, equal_to([]))
+
+    def test_find_with_profiles_and_contexts(self):
+        interface_cti = self._add(_user(1, context='ctx1', profile_id=1))
+        self._add(_user(2, context='ctx1', profile_id=2))
+        self._add(_user(3, context='ctx2', profile_id=1))
+
+        result = self.registry.find({'profileids': [1], 'contexts': ['ctx1']}, self.user_match)
+
+        assert_that(result, equal_to([interface_cti]))
+
+    def test_update_user(self):
+        interface_cti = self._add(_user(1, context='ctx1'))
+
+        self.registry.update_user(_user(1, context='ctx2'))
+
+        assert_that(self.registry.find({'contexts': ['ctx1']}, self.user_match), equal_to([]))
+        assert_that(self.registry.find({'contexts': ['ctx2']}, self.user_match), equal_to([interface_cti]))
+
+    def test_update_user_not_connected(self):
+        self.registry.update_user(_user(1))
+
+        assert_that(self.registry.find({}, self.user_match), equal_to([]))
+
+    def test_remove_user(self):
+        interface_cti = self._add(_user(1, agent_id=42))
+
+        self.registry.remove_user('1')
+
+        assert_that(self.registry.find({}, self.user_match), equal_to([]))
+        assert_that(self.registry.find_by_user_id('1'), equal_to([]))
+        assert_that(self.registry.find_by_peer('10.0.0.1:1234'), equal_to(interface_cti))
+
+    def test_remove(self):
+        interface_cti = self._add(_user(1, agent_id=42))
+        other_interface_cti = self._add(_user(1), ('10.0.0.1', 4321))
+
+        self.registry.remove(interface_cti)
+
+        assert_that(self.registry.find_by_peer('10.0.0.1:1234'), none())
+        assert_that(self.registry.find({}, self.user_match), equal_to([other_interface_cti]))
+
+    def test_set_user_twice(self):
+        interface_cti = self._add(_user(1))
+
+        self.registry.set_user(interface_cti, _user(2))
+
+        assert_that(self.registry.find_by_user_id('1'), equal_to([]))
+        assert_that(self.registry.find_by_user_id('2'), equal_to([interface_cti]))
+
+    def test_remove_unknown_interface(self):
+        self.registry.remove(sentinel.interface_cti)
@@ -25,6 +25,14 @@ from xivo_cti.flusher import Flusher
 from xivo_cti.interfaces.interface_cti import CTI
 
 
+def _status_update(listname, tid, status):
+    return {'class': 'getlist',
+            'listname': listname,
+            'function': 'updatestatus',
+            'tid': tid,
+            'status': status}
+
+
 class TestCTIGroup(unittest.TestCase):
 
     def setUp(self):
@@ -46,7 +54,7 @@ class TestCTIGroup(unittest.TestCase):
 
         self.cti_msg_encoder.encode.assert_called_once_with(self.msg)
         self.interface_cti.attach_observer.assert_called_once_with(self.cti_group._on_interface_cti_update)
-        self.interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg)
+        self.interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg, [(self.msg, self.encoded_msg)])
 
     def test_add_same_interface_twice(self):
         self.cti_group.add(self.interface_cti)
@@ -54,7 +62,7 @@ class TestCTIGroup(unittest.TestCase):
         self.cti_group.send_message(self.msg)
         self.cti_group.flush()
 
-        self.interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg)
+        self.interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg, [(self.msg, self.encoded_msg)])
 
     def test_add_interface_in_state_disconnected(self):
         self.interface_cti.state.return_value = CTI.STATE_DISCONNECTED
@@ -79,6 +87,62 @@ class TestCTIGroup(unittest.TestCase):
         self.interface_cti.detach_observer.assert_called_once_with(self.cti_group._on_interface_cti_update)
         self.assertFalse(self.interface_cti.send_encoded_message.called)
 
+    def test_flush_shares_the_encoded_data(self):
+        other_interface_cti = mock.Mock(CTI)
+        other_interface_cti.state.return_value = CTI.STATE_NEW
+        self.cti_group.add(self.interface_cti)
+        self.cti_group.add(other_interface_cti)
+        self.cti_group.send_message(self.msg)
+        self.cti_group.send_message(self.msg)
+        self.cti_group.flush()
+
+        data = self.interface_cti.send_encoded_message.call_args[0][0]
+        self.assertEqual(data, self.encoded_msg * 2)
+        self.assertTrue(other_interface_cti.send_encoded_message.call_args[0][0] is data)
+
+    def test_send_message_coalesces_status_updates(self):
+        self.cti_msg_encoder.encode.side_effect = lambda msg: repr(sorted(msg.items()))
+        self.cti_group.add(self.interface_cti)
+        msg1 = _status_update('phones', '1', {'hintstatus': 1, 'foo': 'bar'})
+        msg2 = _status_update('phones', '2', {'hintstatus': 0})
+        msg3 = _status_update('phones', '1', {'hintstatus': 8})
+
+        self.cti_group.send_message(msg1)
+        self.cti_group.send_message(msg2)
+        self.cti_group.send_message(msg3)
+        self.cti_group.flush()
+
+        messages = self.interface_cti.send_encoded_message.call_args[0][1]
+        self.assertEqual([msg for msg, _ in messages],
+                         [_status_update('phones', '1', {'hintstatus': 8, 'foo': 'bar'}),
+                          _status_update('phones', '2', {'hintstatus': 0})])
+        self.assertEqual(msg1, _status_update('phones', '1', {'hintstatus': 1, 'foo': 'bar'}))
+
+    def test_send_message_does_not_coalesce_across_other_messages_of_the_list(self):
+        self.cti_group.add(self.interface_cti)
+        msg1 = _status_update('phones', '1', {'hintstatus': 1})
+        msg2 = {'class': 'getlist', 'listname': 'phones', 'function': 'delconfig', 'list': ['1']}
+        msg3 = _status_update('phones', '1', {'hintstatus': 8})
+
+        self.cti_group.send_message(msg1)
+        self.cti_group.send_message(msg2)
+        self.cti_group.send_message(msg3)
+        self.cti_group.flush()
+
+        messages = self.interface_cti.send_encoded_message.call_args[0][1]
+        self.assertEqual([msg for msg, _ in messages], [msg1, msg2, msg3])
+
+    def test_send_message_does_not_coalesce_across_flushes(self):
+        self.cti_group.add(self.interface_cti)
+        msg = _status_update('phones', '1', {'hintstatus': 1})
+
+        self.cti_group.send_message(msg)
+        self.cti_group.flush()
+        self.cti_group.send_message(msg)
+        self.cti_group.flush()
+
+        self.assertEqual(self.interface_cti.send_encoded_message.call_count, 2)
+
     def test_remove_doesnt_raise_on_unknown_interface(self):
         self.cti_group.remove(self.interface_cti)
 
@@ -94,13 +158,13 @@ class TestCTIGroup(unittest.TestCase):
         self.cti_group.send_message(self.msg)
         self.cti_group.flush()
 
-        self.interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg)
+        self.interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg, [(self.msg, self.encoded_msg)])
         self.interface_cti.send_encoded_message.reset_mock()
 
         self.cti_group.send_message(self.msg)
         self.cti_group.flush()
 
-        self.interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg)
+        self.interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg, [(self.msg, self.encoded_msg)])
 
     def test_send_message_and_flush_two_interfaces_and_two_messages(self):
         interface_cti1 = mock.Mock(CTI)
@@ -113,8 +177,9 @@ class TestCTIGroup(unittest.TestCase):
         self.cti_group.flush()
 
         encoded_msg = self.encoded_msg * 2
-        interface_cti1.send_encoded_message.assert_called_once_with(encoded_msg)
-        interface_cti2.send_encoded_message.assert_called_once_with(encoded_msg)
+        messages = [(self.msg, self.encoded_msg)] * 2
+        interface_cti1.send_encoded_message.assert_called_once_with(encoded_msg, messages)
+        interface_cti2.send_encoded_message.assert_called_once_with(encoded_msg, messages)
 
     def test_send_message_and_flush_when_interface_cti_exception(self):
         interface_cti1 = mock.Mock(CTI)
@@ -126,8 +191,8 @@ class TestCTIGroup(unittest.TestCase):
         self.cti_group.send_message(self.msg)
         self.cti_group.flush()
 
-        interface_cti1.send_encoded_message.assert_called_once_with(self.encoded_msg)
-        interface_cti2.send_encoded_message.assert_called_once_with(self.encoded_msg)
+        interface_cti1.send_encoded_message.assert_called_once_with(self.encoded_msg, [(self.msg, self.encoded_msg)])
+        interface_cti2.send_encoded_message.assert_called_once_with(self.encoded_msg, [(self.msg, self.encoded_msg)])
         self.assertNotIn(interface_cti1, self.cti_group._interfaces)
 
 
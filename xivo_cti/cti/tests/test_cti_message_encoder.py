@@ -38,3 +38,19 @@ class TestCTIMessageEncoder(unittest.TestCase):
 
         self.assertTrue(encoded_msg.endswith('\n'))
         self.assertEqual(expected_msg, json.loads(encoded_msg[:-1]))
+
+    def test_encode_does_not_modify_msg(self):
+        msg = {'class': 'foo'}
+
+        self.cti_msg_encoder.encode(msg)
+
+        self.assertEqual(msg, {'class': 'foo'})
+
+    def test_encode_msg_changed_after_encoding(self):
+        msg = {'class': 'foo', 'status': 'a'}
+
+        self.cti_msg_encoder.encode(msg)
+        msg['status'] = 'b'
+        encoded_msg = self.cti_msg_encoder.encode(msg)
+
+        self.assertEqual(json.loads(encoded_msg[:-1])['status'], 'b')
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import json
+import unittest
+
+from hamcrest import assert_that, equal_to
+from xivo_cti.cti import json_codec
+
+
+class _BaseTestCodec(object):
+
+    def test_decode_ascii(self):
+        result = self.codec.decode('{"class": "login_id", "userlogin": "alice"}')
+
+        assert_that(result, equal_to({'class': 'login_id', 'userlogin': 'alice'}))
+
+    def test_decode_utf8(self):
+        result = self.codec.decode('{"name": "Fran\xc3\xa7ois \xe6\x9d\xb1"}')
+
+        assert_that(result, equal_to({'name': u'Fran\xe7ois 東'}))
+
+    def test_decode_escaped_slash(self):
+        result = self.codec.decode('{"path": "a\\/b"}')
+
+        assert_that(result, equal_to({'path': 'a/b'}))
+
+    def test_decode_unicode(self):
+        result = self.codec.decode(u'{"name": "Fran\xe7ois"}')
+
+        assert_that(result, equal_to({'name': u'Fran\xe7ois'}))
+
+    def test_encode(self):
+        msg = {'class': 'getlist', 'name': u'Fran\xe7ois', 'list': [1, 2]}
+
+        result = self.codec.encode(msg)
+
+        assert_that(json.loads(result), equal_to(msg))
+        assert_that(result.encode('ascii'), equal_to(result))
+
+
+class TestCJSONCodec(_BaseTestCodec, unittest.TestCase):
+
+    def setUp(self):
+        if json_codec.cjson is None:
+            self.skipTest('cjson is not installed')
+        self.codec = json_codec.CJSONCodec()
+
+
+class TestStdlibJSONCodec(_BaseTestCodec, unittest.TestCase):
+
+    def setUp(self):
+        self.codec = json_codec.StdlibJSONCodec()
+
+
+class TestNewCodec(unittest.TestCase):
+
+    def test_new_codec_with_backend(self):
+        codec = json_codec.new_codec('json')
+
+        assert_that(codec.name, equal_to('json'))
+
+    def test_new_codec_unknown_backend(self):
+        self.assertRaises(ValueError, json_codec.new_codec, 'foobar')
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from mock import Mock
+from xivo_cti.client_connection import ClientConnection
+from xivo_cti.cti.send_queue_policy import POLICY_COALESCE
+from xivo_cti.cti.send_queue_policy import POLICY_DISCONNECT
+from xivo_cti.cti.send_queue_policy import POLICY_RESYNC
+from xivo_cti.cti.send_queue_policy import SendQueuePolicy
+
+
+def _status(listname, tid, status):
+    return {'class': 'getlist',
+            'function': 'updatestatus',
+            'listname': listname,
+            'tid': tid,
+            'status': status}
+
+
+def _encode(msg):
+    return repr(sorted(msg.items())) + '\n'
+
+
+class TestSendQueuePolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = Mock(ClientConnection)
+        self.connection.queued_bytes.return_value = 0
+        self.encode = Mock(side_effect=_encode)
+
+    def _new_policy(self, policy, max_bytes=100):
+        return SendQueuePolicy(self.connection, self.encode, max_bytes, policy)
+
+    def _send(self, policy, msg):
+        data = _encode(msg)
+        policy.send(data, [(msg, data)])
+
+    def test_send_under_the_limit(self):
+        policy = self._new_policy(POLICY_DISCONNECT)
+
+        policy.send('foo\n')
+
+        self.connection.append_queue.assert_called_once_with('foo\n')
+        self.assertFalse(policy.is_slow())
+
+    def test_no_limit(self):
+        policy = self._new_policy(POLICY_DISCONNECT, max_bytes=0)
+        self.connection.queued_bytes.return_value = 1000000
+
+        policy.send('foo\n')
+
+        self.connection.append_queue.assert_called_once_with('foo\n')
+
+    def test_disconnect(self):
+        policy = self._new_policy(POLICY_DISCONNECT)
+        self.connection.queued_bytes.return_value = 99
+
+        self.assertRaises(ClientConnection.CloseException, policy.send, 'foo\n')
+
+        self.connection.close.assert_called_once_with()
+        self.assertFalse(self.connection.append_queue.called)
+
+    def test_resync(self):
+        policy = self._new_policy(POLICY_RESYNC)
+        self.connection.queued_bytes.return_value = 99
+
+        policy.send('foo\n')
+        policy.send('bar\n')
+
+        self.connection.drop_queue.assert_called_once_with()
+        self.connection.append_queue.assert_called_once_with(_encode({'class': 'resync_required'}))
+        self.assertTrue(policy.is_slow())
+
+        self.connection.queued_bytes.return_value = 0
+        policy.on_connection_idle()
+        policy.send('baz\n')
+
+        self.connection.append_queue.assert_called_with('baz\n')
+        self.assertFalse(policy.is_slow())
+
+    def test_coalesce(self):
+        policy = self._new_policy(POLICY_COALESCE, max_bytes=1000)
+        self.connection.queued_bytes.return_value = 999
+        other_msg = {'class': 'getlist', 'function': 'delconfig', 'listname': 'channels'}
+
+        self._send(policy, _status('phones', '1', {'hintstatus': 1}))
+        self._send(policy, other_msg)
+        self._send(policy, _status('phones', '2', {'hintstatus': 0}))
+        self._send(policy, _status('phones', '1', {'hintstatus': 8, 'foo': 'bar'}))
+
+        self.assertFalse(self.connection.append_queue.called)
+        self.assertTrue(policy.is_slow())
+
+        policy.on_connection_idle()
+
+        expected = ''.join([_encode(_status('phones', '1', {'hintstatus': 8, 'foo': 'bar'})),
+                            _encode(other_msg),
+                            _encode(_status('phones', '2', {'hintstatus': 0}))])
+        self.connection.append_queue.assert_called_once_with(expected)
+        self.assertFalse(policy.is_slow())
+
+    def test_coalesce_does_not_modify_the_sent_messages(self):
+        policy = self._new_policy(POLICY_COALESCE, max_bytes=1000)
+        self.connection.queued_bytes.return_value = 999
+        msg = _status('phones', '1', {'hintstatus': 1})
+
+        self._send(policy, msg)
+        self._send(policy, _status('phones', '1', {'hintstatus': 8}))
+
+        self.assertEqual(msg, _status('phones', '1', {'hintstatus': 1}))
+
+    def test_coalesce_too_many_messages(self):
+        policy = self._new_policy(POLICY_COALESCE, max_bytes=10)
+        self.connection.queued_bytes.return_value = 10
+
+        self.assertRaises(ClientConnection.CloseException, policy.send, 'a' * 11)
+
+        self.connection.close.assert_called_once_with()
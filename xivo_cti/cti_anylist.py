@@ -19,6 +19,8 @@ import time
 import copy
 import logging
 from collections import defaultdict
+from collections import OrderedDict
+from contextlib import contextmanager
 from xivo_cti import config
 from xivo_cti import cti_daolist
 from xivo_cti.services.agent.status import AgentStatus
@@ -143,15 +145,94 @@ class AnyList(object):
         'phonebooks': {}
     }
 
+    # the secondary indexes of the keeplist, {index name: function returning
+    # the key of an item or None when the item is not indexed}
+    unique_indexes = {}
+    multi_indexes = {}
+
+    # the messages whose ids are merged in a single message in batched_messages
+    _BATCHED_FUNCTIONS = ['addconfig', 'delconfig']
+
     def __init__(self, listname):
         self.keeplist = {}
+        self._indexes = {}
+        self._batched_messages = None
         self.listname = listname
         self.listname_obj = cti_daolist.DaoList(listname)
         self._ctiserver = self._innerdata._ctiserver
         self.ipbxid = self._innerdata.ipbxid
 
-    def init_data(self):
-        self.keeplist = self.listname_obj.get_list()
+    def fetch_data(self):
+        return self.listname_obj.get_list()
+
+    def init_data(self, keeplist=None):
+        """
+        keeplist is the result of fetch_data, it is fetched when None.
+        """
+        if keeplist is None:
+            keeplist = self.fetch_data()
+        self.keeplist = self.prepare_keeplist(keeplist)
+        self._init_indexes()
+
+    def prepare_keeplist(self, keeplist):
+        """
+        Returns the keeplist made of the items returned by fetch_data.
+        """
+        return keeplist
+
+    def find_by(self, index_name, key):
+        """
+        Returns the id of the item with the given key in a unique index.
+        """
+        return self._indexes[index_name].get(key)
+
+    def find_all_by(self, index_name, key):
+        """
+        Returns the ids of the items with the given key in a multi-valued index.
+        """
+        return list(self._indexes[index_name].get(key, ()))
+
+    def _init_indexes(self):
+        self._indexes = {}
+        for index_name in self.unique_indexes.keys() + self.multi_indexes.keys():
+            self._indexes[index_name] = {}
+        for item_id in self.keeplist:
+            self._index_item(item_id)
+
+    def _index_item(self, item_id):
+        item = self.keeplist[item_id]
+        for index_name, get_key in self.unique_indexes.iteritems():
+            key = get_key(item)
+            if key is not None:
+                self._indexes[index_name][key] = item_id
+        for index_name, get_key in self.multi_indexes.iteritems():
+            key = get_key(item)
+            if key is not None:
+                self._indexes[index_name].setdefault(key, []).append(item_id)
+
+    def _unindex_item(self, item_id):
+        item = self.keeplist.get(item_id)
+        if item is None:
+            return
+        for index_name, get_key in self.unique_indexes.iteritems():
+            index = self._indexes[index_name]
+            key = get_key(item)
+            if key is not None and index.get(key) == item_id:
+                del index[key]
+        for index_name, get_key in self.multi_indexes.iteritems():
+            index = self._indexes[index_name]
+            item_ids = index.get(get_key(item))
+            if item_ids and item_id in item_ids:
+                item_ids.remove(item_id)
+                if not item_ids:
+                    del index[get_key(item)]
+
+    def _update_items(self, items):
+        for item_id in items:
+            self._unindex_item(item_id)
+        self.keeplist.update(items)
+        for item_id in items:
+            self._index_item(item_id)
 
     def init_status(self):
         res = {}
@@ -163,7 +244,7 @@ class AnyList(object):
         return copy.deepcopy(self.props_status[self.listname])
 
     def add(self, id):
-        self.keeplist.update(self.listname_obj.get(id))
+        self._update_items(self.listname_obj.get(id))
         self.add_notifier(id)
 
     def add_notifier(self, id):
@@ -178,7 +259,7 @@ class AnyList(object):
         logger.debug('%s(%s) successfully added', self.listname, id)
 
     def edit(self, id):
-        self.keeplist.update(self.listname_obj.get(id))
+        self._update_items(self.listname_obj.get(id))
         self.edit_notifier(id)
 
     def edit_notifier(self, id):
@@ -209,6 +290,7 @@ class AnyList(object):
             'list': [id]
         }
         self._send_message(message, id)
+        self._unindex_item(id)
         del self.keeplist[id]
         logger.debug('%s(%s) successfully deleted', self.listname, id)
 
@@ -237,19 +319,49 @@ class AnyList(object):
     def get_item_in_contexts(self, item_id, contexts):
         return self.keeplist.get(item_id)
 
+    @contextmanager
+    def batched_messages(self):
+        """
+        The addconfig and delconfig messages sent in the block are sent at
+        the end of the block as one message per function and contexts.
+        """
+        self._batched_messages = OrderedDict()
+        try:
+            yield
+        finally:
+            batched_messages, self._batched_messages = self._batched_messages, None
+            for (function, _), (item_contexts, ids) in batched_messages.iteritems():
+                message = {
+                    'class': 'getlist',
+                    'listname': self.listname,
+                    'function': function,
+                    'tipbxid': self.ipbxid,
+                    'list': ids
+                }
+                self._send_message_to_contexts(message, item_contexts)
+
     def _send_message(self, message, id):
+        item_context = self._get_message_contexts(id)
+        if self._batched_messages is not None and message['function'] in self._BATCHED_FUNCTIONS:
+            key = (message['function'], tuple(item_context) if item_context is not None else None)
+            self._batched_messages.setdefault(key, (item_context, []))[1].extend(message['list'])
+        else:
+            self._send_message_to_contexts(message, item_context)
+
+    def _get_message_contexts(self, id):
         if not self._part_context():
-            self._ctiserver.send_cti_event(message)
+            return None
+        elif self.listname == 'users':
+            return self.get_contexts(id)
         else:
-            if self.listname == 'users':
-                item_context = self.get_contexts(id)
-            else:
-                item_context = [self.keeplist[id].get('context')]
+            return [self.keeplist[id].get('context')]
 
+    def _send_message_to_contexts(self, message, item_context):
+        if item_context is None:
+            self._ctiserver.send_cti_event(message)
+        else:
             connections = self._ctiserver.get_connected({'contexts': item_context})
-
-            for connection in connections:
-                connection.append_msg(message)
+            self._ctiserver.send_message_to_connections(connections, message)
 
     def _part_context(self):
         return bool(config['main']['context_separation'])
@@ -261,8 +373,8 @@ class ContextAwareAnyList(AnyList):
         AnyList.__init__(self, listname)
         self._item_ids_by_context = defaultdict(list)
 
-    def init_data(self):
-        AnyList.init_data(self)
+    def init_data(self, keeplist=None):
+        AnyList.init_data(self, keeplist)
         self._init_by_context_reverse_dict()
 
     def add(self, item_id):
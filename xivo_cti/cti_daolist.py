@@ -16,12 +16,19 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
 import logging
+from contextlib import contextmanager
 from xivo_dao import group_dao, agent_dao, \
     meetme_dao, queue_dao, voicemail_dao, context_dao, \
     phonebook_dao, user_dao, trunk_dao, user_line_dao
 
 logger = logging.getLogger('daolist')
 
+LINE_PROTOCOLS = ['sip', 'iax', 'sccp', 'custom']
+
+# from this number of items, the whole list is fetched with a single query
+# instead of one query per item
+BULK_FETCH_MIN_ITEMS = 10
+
 
 class UnknownListName(Exception):
     pass
@@ -31,8 +38,12 @@ class DaoList(object):
 
     def __init__(self, listname):
         self.listname = listname
+        self._prefetched = {}
 
     def get(self, id):
+        if id in self._prefetched:
+            item = self._prefetched[id]
+            return {id: item} if item is not None else {}
         name = '_get_%s' % self.listname[0:-1]
         return self._get(name, id)
 
@@ -40,6 +51,41 @@ class DaoList(object):
         name = '_get_%s' % self.listname
         return self._get(name)
 
+    def get_many(self, ids):
+        return dict((id, item) for id, item in self._fetch_many(ids).iteritems() if item is not None)
+
+    @contextmanager
+    def prefetched(self, ids, items=None):
+        """
+        The items with the given ids are returned by get without querying the
+        database again until the end of the block. The items are fetched
+        unless they are given, as returned by get_list. The ids that are not
+        set or could not be fetched are left to get.
+        """
+        if items is None:
+            self._prefetched = self._fetch_many(ids)
+        else:
+            self._prefetched = dict((id, items.get(id)) for id in ids if id is not None)
+        try:
+            yield
+        finally:
+            self._prefetched = {}
+
+    def _fetch_many(self, ids):
+        # returns the item of each id, None when it does not exist
+        ids = [id for id in ids if id is not None]
+        if len(ids) >= BULK_FETCH_MIN_ITEMS:
+            all_items = self.get_list()
+            return dict((id, all_items.get(id)) for id in ids)
+
+        items = {}
+        for id in ids:
+            try:
+                items[id] = self.get(id).get(id)
+            except Exception:
+                logger.warning('Could not fetch %s %s', self.listname, id, exc_info=True)
+        return items
+
     def _get(self, name, id=None):
         try:
             if id:
@@ -58,16 +104,11 @@ class DaoList(object):
         return user_dao.get_user_config(user_id)
 
     def _get_phones(self):
-        full_line = []
-        full_line.extend(user_line_dao.all_with_protocol('sip'))
-        full_line.extend(user_line_dao.all_with_protocol('iax'))
-        full_line.extend(user_line_dao.all_with_protocol('sccp'))
-        full_line.extend(user_line_dao.all_with_protocol('custom'))
-
         res = {}
-        for line in full_line:
-            line, protocol, user = line
-            res.update(self._format_line_data(line, protocol, user))
+        for protocol_name in LINE_PROTOCOLS:
+            for line, protocol, user in user_line_dao.all_with_protocol(protocol_name):
+                key, value = self._line_item(line, protocol, user)
+                res[key] = value
         return res
 
     def _get_phone(self, id):
@@ -75,7 +116,9 @@ class DaoList(object):
         return self._format_line_data(line, protocol, user)
 
     def _format_line_data(self, line, protocol, user):
-        res = {}
+        return dict([self._line_item(line, protocol, user)])
+
+    def _line_item(self, line, protocol, user):
         merged_line = protocol.todict()
         merged_line.update(line.todict())
         merged_line['iduserfeatures'] = user.id
@@ -83,97 +126,79 @@ class DaoList(object):
         protocol = merged_line['protocol'].upper()
         iface_name = merged_line['name']
         merged_line['identity'] = '%s/%s' % (protocol, iface_name)
-        res[str(line.id)] = merged_line
-        return res
+        return str(line.id), merged_line
 
     def _get_groups(self):
-        res = {}
-        groups = group_dao.all()
-        for group in groups:
-            res.update(self._format_group_data(group))
-        return res
+        return dict(self._group_item(group) for group in group_dao.all())
 
     def _get_group(self, id):
         group = group_dao.get(id)
         return self._format_group_data(group)
 
     def _format_group_data(self, group):
-        res = {}
-        key = str(group.id)
-        res[key] = group.todict()
-        res[key]['fullname'] = '%s (%s)' % (group.name, group.context)
-        return res
+        return dict([self._group_item(group)])
+
+    def _group_item(self, group):
+        item = group.todict()
+        item['fullname'] = '%s (%s)' % (group.name, group.context)
+        return str(group.id), item
 
     def _get_agents(self):
-        res = {}
-        agents = agent_dao.all()
-        for agent in agents:
-            res.update(self._format_agent_data(agent))
-        return res
+        return dict(self._agent_item(agent) for agent in agent_dao.all())
 
     def _get_agent(self, id):
         agent = agent_dao.get(id)
         return self._format_agent_data(agent)
 
     def _format_agent_data(self, agent):
-        res = {}
-        key = str(agent.id)
-        res[key] = agent.todict()
-        return res
+        return dict([self._agent_item(agent)])
+
+    def _agent_item(self, agent):
+        return str(agent.id), agent.todict()
 
     def _get_meetmes(self):
-        res = {}
-        meetmes = meetme_dao.all()
-        for meetme in meetmes:
-            res.update(self._format_meetme_data(meetme))
-        return res
+        return dict(self._meetme_item(meetme) for meetme in meetme_dao.all())
 
     def _get_meetme(self, id):
         meetme = meetme_dao.get(id)
         return self._format_meetme_data(meetme)
 
     def _format_meetme_data(self, meetme):
-        res = {}
-        key = str(meetme.id)
-        res[key] = meetme.todict()
-        return res
+        return dict([self._meetme_item(meetme)])
+
+    def _meetme_item(self, meetme):
+        return str(meetme.id), meetme.todict()
 
     def _get_queues(self):
-        res = {}
-        queues = queue_dao.all_queues()
-        for queue in queues:
-            res.update(self._format_queue_data(queue))
-        return res
+        return dict(self._queue_item(queue) for queue in queue_dao.all_queues())
 
     def _get_queue(self, id):
         queue = queue_dao.get(id)
         return self._format_queue_data(queue)
 
     def _format_queue_data(self, queue):
-        res = {}
-        key = str(queue.id)
-        res[key] = queue.todict()
-        res[key]['identity'] = '%s (%s@%s)' % (queue.displayname, queue.number, queue.context)
-        return res
+        return dict([self._queue_item(queue)])
+
+    def _queue_item(self, queue):
+        item = queue.todict()
+        item['identity'] = '%s (%s@%s)' % (queue.displayname, queue.number, queue.context)
+        return str(queue.id), item
 
     def _get_voicemails(self):
-        res = {}
-        voicemails = voicemail_dao.all()
-        for voicemail in voicemails:
-            res.update(self._format_voicemail_data(voicemail))
-        return res
+        return dict(self._voicemail_item(voicemail) for voicemail in voicemail_dao.all())
 
     def _get_voicemail(self, id):
         voicemail = voicemail_dao.get(id)
         return self._format_voicemail_data(voicemail)
 
     def _format_voicemail_data(self, voicemail):
-        res = {}
-        key = str(voicemail.uniqueid)
-        res[key] = voicemail.todict()
-        res[key]['fullmailbox'] = '%s@%s' % (voicemail.mailbox, voicemail.context)
-        res[key]['identity'] = '%s (%s@%s)' % (voicemail.fullname, voicemail.mailbox, voicemail.context)
-        return res
+        return dict([self._voicemail_item(voicemail)])
+
+    def _voicemail_item(self, voicemail):
+        item = voicemail.todict()
+        item['fullmailbox'] = '%s@%s' % (voicemail.mailbox, voicemail.context)
+        item['identity'] = '%s (%s@%s)' % (voicemail.fullname, voicemail.mailbox, voicemail.context)
+        return str(voicemail.uniqueid), item
 
     def _get_contexts(self):
         res = {}
@@ -197,12 +222,8 @@ class DaoList(object):
         return res
 
     def _get_phonebooks(self):
-        res = {}
-        phonebooks = phonebook_dao.all_join_elements()
-        for row in phonebooks:
-            phonebook, phonebookaddress, phonebooknumber = row
-            res.update(self._format_phonebook_data(phonebook, phonebookaddress, phonebooknumber))
-        return res
+        return dict(self._phonebook_item(phonebook, phonebookaddress, phonebooknumber)
+                    for phonebook, phonebookaddress, phonebooknumber in phonebook_dao.all_join_elements())
 
     def _get_phonebook(self, id):
         phonebook = phonebook_dao.get(id)
@@ -223,27 +244,24 @@ class DaoList(object):
         return phonebooknumber_dict
 
     def _format_phonebook_data(self, phonebook, phonebookaddress, phonebooknumber):
-        res = {}
-        key = str(phonebook.id)
-        res[key] = {}
-        res[key]['phonebook'] = phonebook.todict()
-        res[key]['phonebookaddress'] = self._format_phonebookaddress(phonebookaddress)
-        res[key]['phonebooknumber'] = self._format_phonebooknumber(phonebooknumber) if phonebooknumber else False
-        return res
+        return dict([self._phonebook_item(phonebook, phonebookaddress, phonebooknumber)])
+
+    def _phonebook_item(self, phonebook, phonebookaddress, phonebooknumber):
+        item = {}
+        item['phonebook'] = phonebook.todict()
+        item['phonebookaddress'] = self._format_phonebookaddress(phonebookaddress)
+        item['phonebooknumber'] = self._format_phonebooknumber(phonebooknumber) if phonebooknumber else False
+        return str(phonebook.id), item
 
     def _get_trunks(self):
-        res = {}
-        trunks = trunk_dao.all()
-        for trunk in trunks:
-            res.update(self._format_trunk_data(trunk))
-        return res
+        return dict(self._trunk_item(trunk) for trunk in trunk_dao.all())
 
     def _get_trunk(self, id):
         trunk = trunk_dao.get(id)
         return self._format_trunk_data(trunk)
 
     def _format_trunk_data(self, trunk):
-        res = {}
-        key = str(trunk.id)
-        res[key] = trunk.todict()
-        return res
+        return dict([self._trunk_item(trunk)])
+
+    def _trunk_item(self, trunk):
+        return str(trunk.id), trunk.todict()
@@ -16,9 +16,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
 import collections
+import itertools
 import logging
 import os
-import select
 import signal
 import socket
 import ssl
@@ -30,10 +30,12 @@ from xivo import daemonize
 from xivo.xivo_logging import setup_logging
 from xivo_cti import config
 from xivo_cti import BUFSIZE_LARGE
+from xivo_cti import bulk_loader
 from xivo_cti import cti_config
 from xivo_cti import SSLPROTO
 from xivo_cti import dao
 from xivo_cti import message_hook
+from xivo_cti import snapshot
 from xivo_cti.ami import ami_callback_handler
 from xivo_cti import channel_updater
 from xivo_cti.client_connection import ClientConnection
@@ -72,12 +74,15 @@ from xivo_cti.interfaces import interface_cti
 from xivo_cti.interfaces import interface_info
 from xivo_cti.interfaces import interface_webi
 from xivo_cti.interfaces.interfaces import DisconnectCause
+from xivo_cti.live_reload_batcher import LiveReloadBatcher
 from xivo_cti.queue_logger import QueueLogger
+from xivo_cti.startup_profile import StartupProfile
 from xivo_cti.services import queue_entry_manager
 from xivo_cti.services.agent.status import AgentStatus
 from xivo_cti.services.meetme import service_manager as meetme_service_manager_module
 from xivo_cti.statistics import queue_statistics_manager
 from xivo_cti.statistics import queue_statistics_producer
+from xivo_cti.xivo_ami import AMIClass
 from xivo_cti.ioc.context import context
 
 logger = logging.getLogger('main')
@@ -92,6 +97,8 @@ class CTIServer(object):
         self.myipbxid = 'xivo'
         self.interface_ami = None
         self.update_config_list = []
+        self._closed_connections = []
+        self._clients_readable = True
 
     def _set_signal_handlers(self):
         signal.signal(signal.SIGINT, self._sighandler)
@@ -145,6 +152,7 @@ class CTIServer(object):
 
         self._task_queue = context.get('task_queue')
         self._task_scheduler = context.get('task_scheduler')
+        self._reactor = context.get('reactor')
 
         self._agent_availability_updater = context.get('agent_availability_updater')
         self._agent_service_cti_parser = context.get('agent_service_cti_parser')
@@ -157,6 +165,8 @@ class CTIServer(object):
         self._agent_client.connect()
 
         self._broadcast_cti_group = context.get('broadcast_cti_group')
+        self._cti_msg_encoder = context.get('cti_msg_encoder')
+        self._connection_registry = context.get('connection_registry')
 
         self._flusher = context.get('flusher')
 
@@ -168,8 +178,10 @@ class CTIServer(object):
         queue_statistics_producer.register_events()
         meetme_service_manager_module.register_callbacks()
 
-        meetme_service_manager = context.get('meetme_service_manager')
-        meetme_service_manager.initialize()
+        self._meetme_service_manager = context.get('meetme_service_manager')
+        self._meetme_service_manager.initialize()
+
+        self._snapshot_store = snapshot.SnapshotStore(config['snapshot']['file'])
 
         self._register_cti_callbacks()
         self._register_ami_callbacks()
@@ -359,16 +371,43 @@ class CTIServer(object):
 
     def _on_cti_login_auth_timeout(self, connc):
         connc.close()
-        if connc in self.fdlist_interface_cti:
-            del self.fdlist_interface_cti[connc]
+        self._remove_from_fdlist(connc)
+
+    def _on_client_connection_update(self, connection, state):
+        if state == ClientConnection.STATE_CLOSED:
+            self._reactor.unregister(connection)
+            self._closed_connections.append(connection)
+        else:
+            # the state may be outdated when an observer queued data while
+            # being notified of it
+            self._reactor.set_writable(connection, connection.need_sending())
+
+    def _on_ami_writer_update(self, ami_class, state):
+        self._reactor.set_writable(ami_class.sock, state != AMIClass.STATE_IDLE)
+        self._set_clients_readable(state != AMIClass.STATE_CONGESTED)
+
+    def _set_clients_readable(self, readable):
+        # stop reading the requests of the clients while asterisk is not
+        # reading the actions they generate
+        if readable == self._clients_readable:
+            return
+        self._clients_readable = readable
+        for conn in itertools.chain(self.fdlist_interface_cti, self.fdlist_interface_webi):
+            self._reactor.set_readable(conn, readable)
 
     def main_loop(self):
         self.askedtoquit = False
         self.time_start = time.localtime()
+        self._boot_time = time.time()
+        self._first_client_connected = False
+        startup_profile = StartupProfile()
         logger.info('STARTING %s (pid %d))', self.servername, os.getpid())
 
         self._task_queue.clear()
         self._task_scheduler.clear()
+        self._reactor.clear()
+        self._closed_connections = []
+        self._clients_readable = True
 
         logger.info('Connecting to bus')
         bus_producer = context.get('bus_producer')
@@ -384,6 +423,7 @@ class CTIServer(object):
         bus_status_notifier.declare_exchange(name=config['status_notifier']['exchange_name'],
                                              exchange_type=config['status_notifier']['exchange_type'],
                                              durable=config['status_notifier']['exchange_durable'])
+        startup_profile.phase_done('bus connection')
 
         logger.info('Retrieving data')
         self.safe = context.get('innerdata')
@@ -391,14 +431,32 @@ class CTIServer(object):
         self.safe.queue_member_cti_adapter = self._queue_member_cti_adapter
 
         dao.instanciate_dao(self.safe, self._queue_member_manager)
-
-        self.safe.init_xod_config()
-        self.safe.init_xod_status()
+        self._live_reload_batcher = LiveReloadBatcher(self.safe,
+                                                      self._task_scheduler,
+                                                      config['live_reload']['delay'],
+                                                      config['live_reload']['max_delay'])
+
+        server_snapshot = self._load_snapshot()
+        self._warm_start = server_snapshot is not None
+        if self._warm_start:
+            logger.info('Starting from the snapshot of %s', time.ctime(server_snapshot['time']))
+            self.safe.init_xod_config(server_snapshot['xod_config'])
+            startup_profile.phase_done('lists from snapshot')
+            self.safe.init_xod_status(server_snapshot['xod_status'])
+        else:
+            self.safe.init_xod_config()
+            startup_profile.phase_done('lists')
+            self.safe.init_xod_status()
         self.safe.register_cti_handlers()
         self.safe.register_ami_handlers()
         self.safe.update_directories()
+        startup_profile.phase_done('statuses, handlers and directories')
 
-        self._queue_member_updater.on_initialization()
+        if self._warm_start:
+            self._queue_member_updater.on_initialization_from_snapshot(server_snapshot['queue_members'])
+            self._meetme_service_manager.restore_room_states(server_snapshot['meetmes'])
+        else:
+            self._queue_member_updater.on_initialization()
         self._queue_member_cti_subscriber.send_cti_event = self.send_cti_event
         self._queue_member_cti_subscriber.subscribe_to_queue_member(self._queue_member_notifier)
         self._queue_member_indexer.subscribe_to_queue_member(self._queue_member_notifier)
@@ -407,13 +465,19 @@ class CTIServer(object):
         self._init_statistics_producers()
         self._init_agent_availability()
         self._queue_member_indexer.initialize(self._queue_member_manager)
+        startup_profile.phase_done('queue members and statistics')
 
         logger.info('Local AMI socket connection')
         self.interface_ami.init_connection()
+        self.interface_ami.amiclass.attach_observer(self._on_ami_writer_update)
 
         self.ami_sock = self.interface_ami.connect()
         if not self.ami_sock:
             self._on_ami_down()
+        self._reactor.register(self._task_queue)
+        self._reactor.register(self.ami_sock)
+        self._reactor.set_writable(self.ami_sock, self.interface_ami.amiclass.need_sending())
+        startup_profile.phase_done('AMI connection')
 
         logger.info('Listening sockets')
         xivoconf_general = config['main']
@@ -435,11 +499,58 @@ class CTIServer(object):
                 continue
             bind, port = bind_and_port[:2]
             self._init_tcp_socket(kind, bind, port)
+        startup_profile.phase_done('listening sockets')
+
+        if self._warm_start:
+            self._reconcile_snapshot()
+        self._schedule_snapshot()
 
         logger.info('CTI Fully Booted in %.6f seconds', (time.time() - self.start_time))
+        if config['profile_startup']:
+            for line in startup_profile.report():
+                logger.info('startup profile: %s', line)
         while not self.askedtoquit:
             self.select_step()
 
+    def _load_snapshot(self):
+        if not config['snapshot']['enabled']:
+            return None
+        return self._snapshot_store.load()
+
+    def _schedule_snapshot(self):
+        if config['snapshot']['enabled']:
+            self._task_scheduler.schedule(config['snapshot']['interval'], self._save_snapshot)
+
+    def _save_snapshot(self):
+        start_time = time.time()
+        try:
+            server_snapshot = snapshot.take_snapshot(self.safe, self._queue_member_manager,
+                                                     self._meetme_service_manager)
+            self._snapshot_store.save(server_snapshot)
+        except Exception:
+            logger.exception('Could not save the snapshot')
+        else:
+            logger.debug('Snapshot saved in %.6f seconds', time.time() - start_time)
+        self._schedule_snapshot()
+
+    def _reconcile_snapshot(self):
+        logger.info('Reconciling the snapshot with the database')
+        bulk_loader.fetch_lists_in_background(self.safe.xod_config, self._on_snapshot_lists_fetched)
+
+    def _on_snapshot_lists_fetched(self, keeplists):
+        # called from the fetching thread
+        self._task_queue.put(self._reconcile_snapshot_lists, keeplists)
+
+    def _reconcile_snapshot_lists(self, keeplists):
+        self.safe.reconcile_xod_config(keeplists)
+        self._queue_member_updater.on_webi_update()
+        logger.info('Snapshot reconciled %.3f seconds after startup', time.time() - self._boot_time)
+
+    def _on_first_client_connected(self):
+        self._first_client_connected = True
+        logger.info('First CTI client connected %.3f seconds after a %s start',
+                    time.time() - self._boot_time, 'warm' if self._warm_start else 'cold')
+
     def _init_tcp_socket(self, kind, bind, port):
         try:
             trueport = int(port)
@@ -452,6 +563,7 @@ class CTIServer(object):
             UIsock.bind(bindtuple)
             UIsock.listen(10)
             self.fdlist_listen_cti[UIsock] = '%s:%s' % (kind, 1)
+            self._reactor.register(UIsock)
         except Exception:
             logger.exception('tcp %s %d', bind, trueport)
 
@@ -461,69 +573,59 @@ class CTIServer(object):
         sys.exit(2)
 
     def get_connected(self, tomatch):
-        clist = []
-        for interface_cti in self.fdlist_interface_cti.itervalues():
-            userid = interface_cti.connection_details.get('userid')
-            if self.safe.user_match(userid, tomatch):
-                clist.append(interface_cti)
-        return clist
+        return self._connection_registry.find(tomatch, self.safe.user_match)
 
     def sendsheettolist(self, tsl, payload):
-        for k in tsl:
-            k.reply(payload)
+        self.send_message_to_connections(tsl, payload)
+
+    def send_message_to_connections(self, interfaces_cti, msg):
+        """
+        Sends msg to each of the CTI interfaces, the message is encoded once
+        and the same data is queued for every interface.
+        """
+        if not interfaces_cti:
+            return
+
+        data = self._cti_msg_encoder.encode(msg)
+        messages = [(msg, data)]
+        for interface_cti in interfaces_cti:
+            try:
+                interface_cti.send_encoded_message(data, messages)
+            except ClientConnection.CloseException:
+                pass
 
     def send_cti_event(self, event):
         self._broadcast_cti_group.send_message(event)
         message_hook.run_hooks(event)
 
     def set_transfer_socket(self, faxobj, direction):
-        for iconn, interface_cti in self.fdlist_interface_cti.iteritems():
-            peername = '%s:%d' % iconn.getpeername()
-            if peername == faxobj.socketref:
-                interface_cti.set_as_transfer(direction, faxobj)
-                if direction == 's2c':
-                    sendbuffer = ''
-                    interface_cti.reply(sendbuffer)
-                break
+        interface_cti = self._connection_registry.find_by_peer(faxobj.socketref)
+        if interface_cti:
+            interface_cti.set_as_transfer(direction, faxobj)
+            if direction == 's2c':
+                sendbuffer = ''
+                interface_cti.reply(sendbuffer)
 
     def send_to_cti_client(self, who, what):
         (ipbxid, userid) = who.split('/')
-        for interface_cti in self.fdlist_interface_cti.itervalues():
-            if interface_cti.connection_details.get('userid') == userid:
-                interface_cti.reply(what)
+        interfaces_cti = self._connection_registry.find_by_user_id(userid)
+        self.send_message_to_connections(interfaces_cti, what)
 
     def _init_socket(self):
         try:
-            fdtodel = []
-            for cn in self.fdlist_interface_cti:
-                if cn.isClosed and cn not in fdtodel:
-                    fdtodel.append(cn)
-            for cn in fdtodel:
-                del self.fdlist_interface_cti[cn]
-
-            self.fdlist_full = []
-            self.fdlist_full.append(self._task_queue)
-            self.fdlist_full.append(self.ami_sock)
-            self.fdlist_full.extend(self.fdlist_listen_cti)
-            self.fdlist_full.extend(self.fdlist_interface_cti)
-            self.fdlist_full.extend(self.fdlist_interface_webi)
-            self.fdlist_full.extend(self.fdlist_interface_info)
-
-            writefds = []
-            for iconn in self.fdlist_interface_cti:
-                if iconn.need_sending():
-                    writefds.append(iconn)
+            while self._closed_connections:
+                connection = self._closed_connections.pop()
+                # closed while sending, e.g. a client too slow to read its messages
+                if connection in self.fdlist_interface_cti:
+                    self.fdlist_interface_cti[connection].disconnected(DisconnectCause.broken_pipe)
+                self._remove_from_fdlist(connection)
 
             timeout = self._task_scheduler.timeout()
-            if timeout is None:
-                result = select.select(self.fdlist_full, writefds, [])
-            else:
-                result = select.select(self.fdlist_full, writefds, [], timeout)
-            return result
+            return self._reactor.poll(timeout)
 
         except Exception:
             logger.exception('(select) probably Ctrl-C or daemon stop or daemon restart ...')
-            logger.warning('(select) self.askedtoquit=%s fdlist_full=%s', self.askedtoquit, self.fdlist_full)
+            logger.warning('(select) self.askedtoquit=%s registered=%s', self.askedtoquit, self._reactor.registered())
 
             self._socket_close_all()
 
@@ -541,11 +643,11 @@ class CTIServer(object):
                 self.askedtoquit = True
                 for t in filter(lambda x: x.getName() != 'MainThread', threading.enumerate()):
                     print '--- (reload) the thread <%s> remains' % t.getName()
-                return (None, None, None)
+                return ([], [])
 
     def _socket_close_all(self):
         cause = DisconnectCause.by_server_stop if self.askedtoquit else DisconnectCause.by_server_reload
-        for s in self.fdlist_full:
+        for s in self._reactor.registered():
             if s in self.fdlist_interface_cti:
                 self.fdlist_interface_cti[s].disconnected(cause)
             elif s in self.fdlist_interface_info:
@@ -554,6 +656,7 @@ class CTIServer(object):
                 self.fdlist_interface_webi[s].disconnected(cause)
             if not isinstance(s, int):
                 s.close()
+        self._reactor.clear()
 
     def _socket_ami_read(self, sel_i):
         buf = sel_i.recv(BUFSIZE_LARGE)
@@ -562,6 +665,12 @@ class CTIServer(object):
         else:
             self.interface_ami.handle_event(buf)
 
+    def _socket_ami_write(self):
+        try:
+            self.interface_ami.amiclass.flush()
+        except socket.error:
+            self._on_ami_down()
+
     def _socket_detect_new_tcp_connection(self, sel_i):
         [kind, nmax] = self.fdlist_listen_cti[sel_i].split(':')
         [socketobject, address] = sel_i.accept()
@@ -590,17 +699,25 @@ class CTIServer(object):
                 socketobject = None
 
         if socketobject:
+            self._reactor.register(socketobject)
+            if isinstance(socketobject, ClientConnection):
+                socketobject.attach_observer(self._on_client_connection_update)
             if kind in ['CTI', 'CTIS']:
                 logintimeout = int(config['main'].get('logintimeout', 5))
                 interface.login_task = self._task_scheduler.schedule(logintimeout, self._on_cti_login_auth_timeout, socketobject)
                 self.fdlist_interface_cti[socketobject] = interface
+                self._connection_registry.add(interface, address)
                 self._broadcast_cti_group.add(interface)
+                if not self._first_client_connected:
+                    self._on_first_client_connected()
             elif kind == 'INFO':
                 interface = interface_info.INFO(self)
                 self.fdlist_interface_info[socketobject] = interface
             elif kind == 'WEBI':
                 interface = interface_webi.WEBI(self, self._queue_member_updater)
                 self.fdlist_interface_webi[socketobject] = interface
+            if not self._clients_readable and kind != 'INFO':
+                self._reactor.set_readable(socketobject, False)
 
             interface.connected(socketobject)
         else:
@@ -646,8 +763,9 @@ class CTIServer(object):
             self._remove_from_fdlist(sel_i)
 
     def _remove_from_fdlist(self, conn):
+        self._reactor.unregister(conn)
         if conn in self.fdlist_interface_cti:
-            del self.fdlist_interface_cti[conn]
+            self._connection_registry.remove(self.fdlist_interface_cti.pop(conn))
         elif conn in self.fdlist_interface_info:
             del self.fdlist_interface_info[conn]
         elif conn in self.fdlist_interface_webi:
@@ -655,25 +773,32 @@ class CTIServer(object):
 
     def _update_safe_list(self):
         if self.update_config_list:
+            update_config_list, self.update_config_list = self.update_config_list, []
             try:
-                if 'xivo[cticonfig,update]' in self.update_config_list:
-                    cti_config.update_db_config()
-                    self.safe.update_directories()
-                    self.update_config_list.pop(self.update_config_list.index('xivo[cticonfig,update]'))
+                if 'xivo[cticonfig,update]' in update_config_list:
+                    self._reload_cticonfig()
             except Exception:
                 logger.exception('failed while executing xivo[cticonfig,update]')
-            try:
-                while self.update_config_list:
-                    msg = self.update_config_list.pop()
-                    self.safe.update_config_list('%ss' % msg['object_name'], msg['state'], msg['id'])
-            except Exception:
-                logger.exception('Config reload (computed timeout)')
+            # the object updates are applied in batches by the live reload batcher
+            for msg in update_config_list:
+                if msg != 'xivo[cticonfig,update]':
+                    self._live_reload_batcher.add('%ss' % msg['object_name'], msg['state'], msg['id'])
+
+    def _reload_cticonfig(self):
+        start_time = time.time()
+        changed_sections = cti_config.update_db_config()
+        self.safe.update_directories(changed_sections)
+        logger.info('cticonfig reloaded in %.6f seconds, changed sections: %s',
+                    time.time() - start_time, ', '.join(sorted(changed_sections)) or 'none')
 
     def select_step(self):
-        sels_i, sels_o, sels_e = self._init_socket()
+        sels_i, sels_o = self._init_socket()
 
         try:
             for sel_o in sels_o:
+                if sel_o == self.ami_sock:
+                    self._socket_ami_write()
+                    continue
                 try:
                     sel_o.process_sending()
                 except ClientConnection.CloseException:
@@ -681,7 +806,7 @@ class CTIServer(object):
                         kind = self.fdlist_interface_cti[sel_o]
                         kind.disconnected(DisconnectCause.broken_pipe)
                         sel_o.close()
-                        del self.fdlist_interface_cti[sel_o]
+                        self._remove_from_fdlist(sel_o)
         except Exception:
             logger.exception('Socket writer')
 
@@ -713,6 +838,10 @@ class CTIServer(object):
 
         self._flusher.flush()
 
+        # the actions of this step are written right away if asterisk keeps up
+        if self.interface_ami.amiclass.need_sending():
+            self._socket_ami_write()
+
         try:
             self._task_scheduler.run()
             self._update_safe_list()
@@ -53,10 +53,9 @@ class AgentDAO(object):
         return self.get_id_from_number(agent_number)
 
     def get_id_from_number(self, agent_number):
-        agent_list = self.innerdata.xod_config['agents'].keeplist
-        for (agent_id, agent) in agent_list.iteritems():
-            if agent['number'] == agent_number:
-                return int(agent_id)
+        agent_id = self.innerdata.xod_config['agents'].idbyagentnumber(agent_number)
+        if agent_id is not None:
+            return int(agent_id)
 
     def get_interface_from_id(self, agent_id):
         agent_list = self.innerdata.xod_config['agents'].keeplist
@@ -15,8 +15,6 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
-from xivo.asterisk.line_identity import identity_from_channel
-
 
 class ChannelDAO(object):
 
@@ -32,15 +30,13 @@ class ChannelDAO(object):
         return self._get(uid, 'calleridname'), self._get(uid, 'calleridnum')
 
     def get_channel_from_unique_id(self, unique_id):
-        for channel_id, channel in self.innerdata.channels.iteritems():
-            if channel.unique_id != unique_id:
-                continue
-            return channel_id
-        raise LookupError('No channel with unique id %s' % unique_id)
+        channel_id = self.innerdata.channels.find_by_unique_id(unique_id)
+        if channel_id is None:
+            raise LookupError('No channel with unique id %s' % unique_id)
+        return channel_id
 
     def channels_from_identity(self, identity):
-        return [channel for channel in self.innerdata.channels
-                if identity_from_channel(channel) == identity]
+        return self.innerdata.channels.find_by_identity(identity)
 
     def _get(self, uid, var):
         channel_data = self._call_form_variable_aggregator.get(uid)
@@ -71,17 +71,14 @@ class TestAgentDAO(unittest.TestCase):
         agent_number = '1234'
         agent_interface = 'Agent/1234'
         agents_config = Mock()
-        agents_config.keeplist = {
-            str(AGENT_ID): {
-                'number': agent_number,
-            }
-        }
+        agents_config.idbyagentnumber.return_value = str(AGENT_ID)
         self.innerdata.xod_config = {
             'agents': agents_config
         }
 
         result = self.agent_dao.get_id_from_interface(agent_interface)
 
+        agents_config.idbyagentnumber.assert_called_once_with(agent_number)
         self.assertEqual(result, AGENT_ID)
 
     def test_get_id_from_interface_not_an_agent(self):
@@ -92,19 +89,27 @@ class TestAgentDAO(unittest.TestCase):
     def test_get_id_from_number(self):
         agent_number = '1234'
         agents_config = Mock()
-        agents_config.keeplist = {
-            str(AGENT_ID): {
-                'number': agent_number,
-            }
-        }
+        agents_config.idbyagentnumber.return_value = str(AGENT_ID)
         self.innerdata.xod_config = {
             'agents': agents_config
         }
 
         result = self.agent_dao.get_id_from_number(agent_number)
 
+        agents_config.idbyagentnumber.assert_called_once_with(agent_number)
         self.assertEqual(result, AGENT_ID)
 
+    def test_get_id_from_number_unknown(self):
+        agents_config = Mock()
+        agents_config.idbyagentnumber.return_value = None
+        self.innerdata.xod_config = {
+            'agents': agents_config
+        }
+
+        result = self.agent_dao.get_id_from_number('1234')
+
+        self.assertEqual(result, None)
+
     def test_get_interface_from_id(self):
         agent_number = '1234'
         expected_interface = 'Agent/1234'
@@ -23,6 +23,7 @@ from xivo_cti.call_forms.variable_aggregator import VariableAggregator
 from xivo_cti.dao.channel_dao import ChannelDAO
 from xivo_cti import innerdata
 from xivo_cti.channel import Channel
+from xivo_cti.channel_store import ChannelStore
 
 
 class TestChannelDAO(unittest.TestCase):
@@ -52,11 +53,10 @@ class TestChannelDAO(unittest.TestCase):
                             self.channel_3['unique_id'])
 
         self.innerdata = Mock(innerdata.Safe)
-        self.innerdata.channels = {
-            self.channel_1['id']: channel_1,
-            self.channel_2['id']: channel_2,
-            self.channel_3['id']: channel_3,
-        }
+        self.innerdata.channels = ChannelStore()
+        self.innerdata.channels[self.channel_1['id']] = channel_1
+        self.innerdata.channels[self.channel_2['id']] = channel_2
+        self.innerdata.channels[self.channel_3['id']] = channel_3
         self.call_form_variable_aggregator = VariableAggregator()
         self.call_form_variable_aggregator.set(
             self.channel_1['unique_id'],
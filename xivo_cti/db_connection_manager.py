@@ -15,17 +15,35 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
-import Queue
+import logging
+import threading
+import time
 
+from collections import deque
 from xivo import anysql
+from xivo_cti import config
+
+logger = logging.getLogger(__name__)
+
+
+class DbPoolTimeoutError(Exception):
+    pass
 
 
 class DbConnectionPool(object):
     '''Connection manager for DB connections.
 
-    A single connection will be established for any given URI and a connection
-    will not be shared by two processes at the same time. The with statement
-    will be blocked if the connection is already in use.
+    The connections to a given URI are kept in a pool of at most max_size
+    connections, min_size of them being opened when the pool is created. A
+    connection is never used by two threads at the same time, get waits at
+    most acquire_timeout seconds for a connection to be released and raises
+    DbPoolTimeoutError after that.
+
+    A connection that has been idle for more than check_interval seconds is
+    checked before being returned.
+
+    The settings of the pools are read from the db_pool section of the
+    configuration.
 
     Usage:
         with DbConnectionPool(uri) as connection:
@@ -33,26 +51,156 @@ class DbConnectionPool(object):
             connection['conn'].commit()
     '''
 
-    _pool = {}
+    _pools = {}
+    _pools_lock = threading.Lock()
 
     def __init__(self, db_uri):
         self._db_uri = db_uri
-        if not db_uri in DbConnectionPool._pool:
-            DbConnectionPool._pool[db_uri] = Queue.Queue()
-            connection = {}
-            connection['conn'] = anysql.connect_by_uri(db_uri)
-            connection['cur'] = connection['conn'].cursor()
-            DbConnectionPool._pool[db_uri].put(connection)
+        self._pool = self._get_pool(db_uri)
+        self._connection = None
+
+    @classmethod
+    def _get_pool(cls, db_uri):
+        with cls._pools_lock:
+            pool = cls._pools.get(db_uri)
+            is_new = pool is None
+            if is_new:
+                pool = cls._pools[db_uri] = _ConnectionPool(db_uri, **config['db_pool'])
+        if is_new:
+            # the other pools are not blocked while connecting
+            pool.open()
+        return pool
 
     def __enter__(self):
         return self.get()
 
     def __exit__(self, type, value, traceback):
-        self.put()
+        # the connection may be unusable after an error, e.g. in an aborted transaction
+        self.put(discard=type is not None)
 
     def get(self):
-        self._connection = DbConnectionPool._pool[self._db_uri].get()
+        self._connection = self._pool.acquire()
         return self._connection
 
-    def put(self):
-        DbConnectionPool._pool[self._db_uri].put(self._connection)
+    def put(self, discard=False):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            self._pool.release(connection, discard)
+
+    @classmethod
+    def stats(cls):
+        """Return the statistics of each pool by URI."""
+        with cls._pools_lock:
+            pools = dict(cls._pools)
+        return dict((db_uri, pool.stats()) for db_uri, pool in pools.iteritems())
+
+
+class _ConnectionPool(object):
+
+    def __init__(self, db_uri, min_size=1, max_size=4, acquire_timeout=5, check_interval=30):
+        self._db_uri = db_uri
+        self._min_size = min_size
+        self._max_size = max_size
+        self._acquire_timeout = acquire_timeout
+        self._check_interval = check_interval
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._nb_acquired = 0
+        self._nb_timeouts = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    def open(self):
+        for _ in xrange(self._min_size):
+            with self._condition:
+                if self._size >= self._max_size:
+                    return
+                self._size += 1
+            try:
+                connection = self._connect()
+            except Exception:
+                self._discard_slot()
+                raise
+            self.release(connection)
+
+    def acquire(self):
+        start_time = time.time()
+        deadline = start_time + self._acquire_timeout
+        with self._condition:
+            while not self._idle and self._size >= self._max_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._nb_timeouts += 1
+                    raise DbPoolTimeoutError('no connection available after %s seconds' % self._acquire_timeout)
+                self._condition.wait(remaining)
+            if self._idle:
+                connection, last_used = self._idle.pop()
+            else:
+                connection, last_used = None, None
+                self._size += 1
+
+        try:
+            if connection is None:
+                connection = self._connect()
+            elif time.time() - last_used > self._check_interval and not self._is_healthy(connection):
+                logger.info('Reconnecting an unhealthy connection to the database')
+                self._close(connection)
+                connection = self._connect()
+        except Exception:
+            self._discard_slot()
+            raise
+
+        wait_time = time.time() - start_time
+        with self._condition:
+            self._nb_acquired += 1
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+        return connection
+
+    def release(self, connection, discard=False):
+        if discard:
+            self._close(connection)
+            self._discard_slot()
+            return
+
+        with self._condition:
+            self._idle.append((connection, time.time()))
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            nb_acquired = self._nb_acquired
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'acquired': nb_acquired,
+                'timeouts': self._nb_timeouts,
+                'mean_wait_time': self._total_wait_time / nb_acquired if nb_acquired else 0.0,
+                'max_wait_time': self._max_wait_time,
+            }
+
+    def _discard_slot(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _connect(self):
+        connection = {}
+        connection['conn'] = anysql.connect_by_uri(self._db_uri)
+        connection['cur'] = connection['conn'].cursor()
+        return connection
+
+    def _is_healthy(self, connection):
+        try:
+            connection['cur'].query('SELECT 1')
+            connection['cur'].fetchall()
+        except Exception:
+            return False
+        return True
+
+    def _close(self, connection):
+        try:
+            connection['conn'].close()
+        except Exception:
+            logger.debug('Error while closing a database connection', exc_info=True)
@@ -17,6 +17,7 @@
 
 import logging
 
+from itertools import imap
 from itertools import izip
 from xivo_cti import config
 from xivo_cti import db_connection_manager
@@ -57,25 +58,13 @@ class InternalDirectoryDataSource(DirectoryDataSource):
         params = ('%' + string + '%',) * len(test_columns)
         columns = tuple(self._key_mapping.itervalues())
 
-        conn_mgr = db_connection_manager.DbConnectionPool(config['db_uri'])
-        connection = conn_mgr.get()
-        try:
+        # the rows are fetched before returning so that the connection goes
+        # back to the pool without waiting for the results to be consumed
+        with db_connection_manager.DbConnectionPool(config['db_uri']) as connection:
             cursor = connection['cur']
             cursor.query(request, columns, params)
-
-            def generator():
-                try:
-                    while True:
-                        row = cursor.fetchone()
-                        if row is None:
-                            break
-                        yield self._map_fun(row)
-                finally:
-                    conn_mgr.put()
-            return generator()
-        except Exception:
-            conn_mgr.put()
-            raise
+            rows = cursor.fetchall()
+        return imap(self._map_fun, rows)
 
     def _new_map_fun(self):
         def aux(row):
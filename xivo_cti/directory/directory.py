@@ -40,6 +40,7 @@ from xivo_cti.directory.data_sources.http import HTTPDirectoryDataSource
 from xivo_cti.directory.data_sources.internal import InternalDirectoryDataSource
 from xivo_cti.directory.data_sources.ldap import LDAPDirectoryDataSource
 from xivo_cti.directory.data_sources.phonebook import PhonebookDirectoryDataSource
+from xivo_cti.tools.delta_computer import DeltaComputer
 
 logger = logging.getLogger('directories')
 
@@ -236,15 +237,18 @@ class ContextsMgr(object):
         self.contexts = {}
         self._old_contents = {}
 
-    def update(self, avail_displays, avail_directories, contents):
-        # remove old contexts
-        # deleting a key will raise a RuntimeError if you do not use .keys() here
-        for context_id in self.contexts.keys():
-            if context_id not in contents:
-                del self.contexts[context_id]
-        # add/update contexts
+    def update(self, avail_displays, avail_directories, contents,
+               changed_displays=(), changed_directories=()):
+        """
+        The contexts using one of the changed displays or directories are
+        rebuilt even if their contents did not change.
+        """
+        delta = DeltaComputer.compute_delta(contents, self._old_contents)
+        for context_id in delta.delete:
+            self.contexts.pop(context_id, None)
         for context_id, context_contents in contents.iteritems():
-            if context_contents != self._old_contents.get(context_id):
+            if (context_id in delta.add or context_id in delta.change or
+                    self._uses(context_contents, changed_displays, changed_directories)):
                 try:
                     self.contexts[context_id] = Context.new_from_contents(
                         avail_displays, avail_directories, context_contents
@@ -254,6 +258,15 @@ class ContextsMgr(object):
                                  context_id, context_contents, exc_info=True)
         self._old_contents = contents
 
+    @staticmethod
+    def _uses(context_contents, display_ids, directory_ids):
+        if context_contents.get('display') in display_ids:
+            return True
+        used_directory_ids = set(context_contents.get('directories', []))
+        for didexten_directory_ids in context_contents.get('didextens', {}).itervalues():
+            used_directory_ids.update(didexten_directory_ids)
+        return not used_directory_ids.isdisjoint(directory_ids)
+
 
 class DisplaysMgr(object):
     def __init__(self):
@@ -261,20 +274,18 @@ class DisplaysMgr(object):
         self._old_contents = {}
 
     def update(self, contents):
-        # remove old displays
-        # deleting a key will raise a RuntimeError if you do not use .keys() here
-        for display_id in self.displays.keys():
-            if display_id not in contents:
-                del self.displays[display_id]
-        # add/update displays
-        for display_id, display_contents in contents.iteritems():
-            if display_contents != self._old_contents.get(display_id):
-                try:
-                    self.displays[display_id] = Display.new_from_contents(display_contents)
-                except Exception:
-                    logger.error('Error while creating display %s from %s',
-                                 display_id, display_contents, exc_info=True)
+        """Return the ids of the displays that were added, changed or deleted."""
+        delta = DeltaComputer.compute_delta(contents, self._old_contents)
+        for display_id in delta.delete:
+            self.displays.pop(display_id, None)
+        for display_id, display_contents in chain(delta.add.iteritems(), delta.change.iteritems()):
+            try:
+                self.displays[display_id] = Display.new_from_contents(display_contents)
+            except Exception:
+                logger.error('Error while creating display %s from %s',
+                             display_id, display_contents, exc_info=True)
         self._old_contents = contents
+        return set(chain(delta.add, delta.change, delta.delete))
 
 
 class DirectoriesMgr(object):
@@ -291,23 +302,21 @@ class DirectoriesMgr(object):
         self._old_contents = {}
 
     def update(self, ctid, contents):
-        # remove old directories
-        # deleting a key will raise a RuntimeError if you do not use .keys() here
-        for directory_id in self.directories.keys():
-            if directory_id not in contents:
-                del self.directories[directory_id]
-        # add/update directories
-        for directory_id, directory_contents in contents.iteritems():
-            if directory_contents != self._old_contents.get(directory_id):
-                try:
-                    class_ = self._get_directory_class(directory_contents)
-                    directory_src = class_.new_from_contents(ctid, directory_contents)
-                    directory = DirectoryAdapter.new_from_contents(directory_src, directory_contents)
-                    self.directories[directory_id] = directory
-                except Exception:
-                    logger.error('Error while creating directory %s from %s',
-                                 directory_id, directory_contents, exc_info=True)
+        """Return the ids of the directories that were added, changed or deleted."""
+        delta = DeltaComputer.compute_delta(contents, self._old_contents)
+        for directory_id in delta.delete:
+            self.directories.pop(directory_id, None)
+        for directory_id, directory_contents in chain(delta.add.iteritems(), delta.change.iteritems()):
+            try:
+                class_ = self._get_directory_class(directory_contents)
+                directory_src = class_.new_from_contents(ctid, directory_contents)
+                directory = DirectoryAdapter.new_from_contents(directory_src, directory_contents)
+                self.directories[directory_id] = directory
+            except Exception:
+                logger.error('Error while creating directory %s from %s',
+                             directory_id, directory_contents, exc_info=True)
         self._old_contents = contents
+        return set(chain(delta.add, delta.change, delta.delete))
 
     def _get_directory_class(self, directory_contents):
         uri = directory_contents['uri']
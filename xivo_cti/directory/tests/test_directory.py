@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from mock import Mock
+from mock import patch
+from xivo_cti.directory.directory import ContextsMgr
+from xivo_cti.directory.directory import DisplaysMgr
+
+
+def _display_contents(title):
+    return {'10': [title, 'name', '', '{db-fullname}']}
+
+
+class TestDisplaysMgr(unittest.TestCase):
+
+    def setUp(self):
+        self.displays_mgr = DisplaysMgr()
+
+    def test_update_returns_changed_ids(self):
+        self.displays_mgr.update({'d1': _display_contents('Name'), 'd2': _display_contents('Nom')})
+        display_d2 = self.displays_mgr.displays['d2']
+
+        result = self.displays_mgr.update({'d1': _display_contents('Fullname'),
+                                           'd2': _display_contents('Nom'),
+                                           'd3': _display_contents('Name')})
+
+        self.assertEqual(result, set(['d1', 'd3']))
+        self.assertEqual(self.displays_mgr.displays['d1'].display_header, ['Fullname'])
+        self.assertTrue(self.displays_mgr.displays['d2'] is display_d2)
+
+    def test_update_deletes_removed_displays(self):
+        self.displays_mgr.update({'d1': _display_contents('Name')})
+
+        result = self.displays_mgr.update({})
+
+        self.assertEqual(result, set(['d1']))
+        self.assertEqual(self.displays_mgr.displays, {})
+
+
+@patch('xivo_cti.directory.directory.Context.new_from_contents')
+class TestContextsMgr(unittest.TestCase):
+
+    def setUp(self):
+        self.contexts_mgr = ContextsMgr()
+        self.contents = {'default': {'display': 'd1', 'directories': ['internal']},
+                         'other': {'display': 'd2', 'directories': [],
+                                   'didextens': {'*': ['xivodir']}}}
+
+    def test_update_unchanged_contexts(self, new_from_contents):
+        self.contexts_mgr.update({}, {}, self.contents)
+        new_from_contents.reset_mock()
+
+        self.contexts_mgr.update({}, {}, dict(self.contents))
+
+        self.assertFalse(new_from_contents.called)
+
+    def test_update_rebuilds_contexts_using_changed_display(self, new_from_contents):
+        self.contexts_mgr.update({}, {}, self.contents)
+        new_from_contents.reset_mock()
+
+        self.contexts_mgr.update({}, {}, self.contents, changed_displays=set(['d1']))
+
+        new_from_contents.assert_called_once_with({}, {}, self.contents['default'])
+
+    def test_update_rebuilds_contexts_using_changed_directory(self, new_from_contents):
+        self.contexts_mgr.update({}, {}, self.contents)
+        new_from_contents.reset_mock()
+
+        self.contexts_mgr.update({}, {}, self.contents, changed_directories=set(['xivodir']))
+
+        new_from_contents.assert_called_once_with({}, {}, self.contents['other'])
+
+    def test_update_deletes_removed_contexts(self, new_from_contents):
+        new_from_contents.return_value = Mock()
+        self.contexts_mgr.update({}, {}, self.contents)
+
+        self.contexts_mgr.update({}, {}, {'default': self.contents['default']})
+
+        self.assertEqual(self.contexts_mgr.contexts.keys(), ['default'])
@@ -27,6 +27,7 @@ class Flusher(object):
         self._queue.append(flushable)
 
     def flush(self):
-        for flushable in self._queue:
-            flushable.flush()
-        self._queue.clear()
+        # flushables may be added while flushing
+        queue = self._queue
+        while queue:
+            queue.popleft().flush()
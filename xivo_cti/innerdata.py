@@ -20,11 +20,13 @@ import hashlib
 import logging
 import time
 
+from xivo_cti import bulk_loader
 from xivo_cti import cti_sheets
 from xivo_cti import config
 from xivo_cti.ami import ami_callback_handler
 from xivo_cti.call_forms.variable_aggregator import CallFormVariable
 from xivo_cti.channel import Channel
+from xivo_cti.channel_store import ChannelStore
 from xivo_cti.directory import directory
 from xivo_cti.cti.commands.getlist import ListID, UpdateConfig, UpdateStatus
 from xivo_cti.cti.commands.directory import Directory
@@ -32,13 +34,14 @@ from xivo_cti.cti.commands.switchboard_directory_search import SwitchboardDirect
 from xivo_cti.cti.commands.get_switchboard_directory_headers import GetSwitchboardDirectoryHeaders
 from xivo_cti.cti.commands.availstate import Availstate
 from xivo_cti.ioc.context import context
+from xivo_cti import membership_index
+from xivo_cti.membership_index import MembershipIndex
+from xivo_cti.services.queue_member.common import format_member_name_of_agent
 from xivo_cti.lists import agents_list, contexts_list, groups_list, meetmes_list, \
     phonebooks_list, phones_list, queues_list, users_list, voicemails_list, \
     trunks_list
 from xivo_cti import dao
 from xivo_dao import directory_dao
-from xivo_dao import group_dao
-from xivo_dao import queue_dao
 from xivo_dao import trunk_dao
 from xivo_dao import user_dao as old_user_dao
 from xivo_dao.data_handler.user import dao as user_dao
@@ -51,16 +54,34 @@ logger = logging.getLogger('innerdata')
 
 SWITCHBOARD_DIRECTORY_CONTEXT = '__switchboard_directory'
 
+# the cticonfig sections the directories are built from
+DIRECTORY_SECTIONS = frozenset(['displays', 'directories', 'contexts'])
+
+# the status fields restored from a snapshot, they are refreshed from the AMI
+SNAPSHOT_STATUS_FIELDS = {
+    'phones': ['hintstatus'],
+    'trunks': ['hintstatus'],
+    'voicemails': ['waiting', 'old', 'new'],
+}
+
 
 class Safe(object):
 
-    def __init__(self, cti_server, queue_member_cti_adapter):
+    def __init__(self, cti_server, queue_member_cti_adapter, queue_member_notifier=None,
+                 queue_member_manager=None):
         self._ctiserver = cti_server
         self.queue_member_cti_adapter = queue_member_cti_adapter
+        self._queue_member_manager = queue_member_manager
+        self.membership_index = MembershipIndex()
+        self._group_members_outdated = False
+        self._group_members_reload_deferred = False
+        if queue_member_notifier is not None:
+            queue_member_notifier.subscribe_to_queue_member_add(self._on_queue_member_added)
+            queue_member_notifier.subscribe_to_queue_member_remove(self._on_queue_member_removed)
         self.ipbxid = 'xivo'
         self.xod_config = {}
         self.xod_status = {}
-        self.channels = {}
+        self.channels = ChannelStore()
         self.faxes = {}
         self.ctistack = []
 
@@ -70,7 +91,11 @@ class Safe(object):
 
         self._sent_sheets = defaultdict(list)
 
-    def init_xod_config(self):
+    def init_xod_config(self, keeplists=None):
+        """
+        keeplists are the items of the lists, e.g. from a snapshot, they are
+        fetched from the database when None.
+        """
         self.xod_config = {
             'agents': agents_list.AgentsList(self),
             'contexts': contexts_list.ContextsList(self),
@@ -84,15 +109,53 @@ class Safe(object):
             'voicemails': voicemails_list.VoicemailsList(self),
         }
 
-        for config_object in self.xod_config.itervalues():
-            config_object.init_data()
+        if keeplists is None:
+            bulk_loader.load_lists(self.xod_config)
+        else:
+            for listname, config_object in self.xod_config.iteritems():
+                config_object.init_data(keeplists.get(listname, {}))
+        self._init_memberships()
 
-    def init_xod_status(self):
+    def init_xod_status(self, statuses=None):
         for name, config in self.xod_config.iteritems():
             self.xod_status[name] = config.init_status()
+        if statuses is not None:
+            self._restore_xod_status(statuses)
+
+    def _restore_xod_status(self, statuses):
+        for listname, fields in SNAPSHOT_STATUS_FIELDS.iteritems():
+            xod_status = self.xod_status.get(listname, {})
+            for item_id, status in statuses.get(listname, {}).iteritems():
+                if item_id not in xod_status:
+                    continue
+                for field in fields:
+                    if field in status:
+                        xod_status[item_id][field] = status[field]
+
+    def reconcile_xod_config(self, keeplists):
+        """
+        Applies the differences between the lists and the items fetched from
+        the database, e.g. after a start from a snapshot.
+        """
+        for listname, keeplist in keeplists.iteritems():
+            config_object = self.xod_config[listname]
+            old_items = config_object.keeplist
+            new_items = config_object.prepare_keeplist(keeplist)
+            deleted = [item_id for item_id in old_items if item_id not in new_items]
+            added = [item_id for item_id in new_items if item_id not in old_items]
+            changed = [item_id for item_id in new_items
+                       if item_id in old_items and new_items[item_id] != old_items[item_id]]
+            for state, item_ids in [('delete', deleted), ('add', added), ('edit', changed)]:
+                if item_ids:
+                    self.update_config_list_many(listname, state, item_ids, keeplist)
+            if deleted or added or changed:
+                logger.info('%s reconciled: %d deleted, %d added, %d changed',
+                            listname, len(deleted), len(added), len(changed))
 
     def update_config_list(self, listname, state, item_id):
         start_time = time.time()
+        config_object = self.xod_config.get(listname)
+        old_item = config_object.keeplist.get(item_id) if config_object is not None else None
         try:
             if state == 'add':
                 self._update_config_list_add(listname, item_id)
@@ -104,9 +167,34 @@ class Safe(object):
             logger.warning('id "%s" not exist for object %s', item_id, listname)
         except TypeError:
             logger.warning('id "%s" not set for object %s', item_id, listname)
+        if config_object is not None:
+            self._update_memberships(listname, item_id, old_item)
         end_time = time.time()
         logger.debug('Getting %s in %.6f seconds', listname, (end_time - start_time))
 
+    def update_config_list_many(self, listname, state, item_ids, items=None):
+        """
+        Same as update_config_list for many items of a list, the items are
+        fetched together and the clients get one message for all of them.
+        items, as returned by fetch_data, are used instead when given.
+        """
+        config_object = self.xod_config.get(listname)
+        if config_object is None:
+            logger.debug('%s: not a list, %s of %d items ignored', listname, state, len(item_ids))
+            return
+        start_time = time.time()
+        fetched_ids = item_ids if state in ['add', 'edit', 'enable', 'disable'] else []
+        self._group_members_reload_deferred = True
+        try:
+            with config_object.listname_obj.prefetched(fetched_ids, items), config_object.batched_messages():
+                for item_id in item_ids:
+                    self.update_config_list(listname, state, item_id)
+        finally:
+            self._group_members_reload_deferred = False
+        self._reload_group_members()
+        logger.info('%s: %s of %d items in %.6f seconds',
+                    listname, state, len(item_ids), time.time() - start_time)
+
     def _update_config_list_add(self, listname, item_id):
         self.xod_config[listname].add(item_id)
         self.xod_status[listname][item_id] = self.xod_config[listname].get_status()
@@ -118,6 +206,86 @@ class Safe(object):
     def _update_config_list_change(self, listname, item_id):
         self.xod_config[listname].edit(item_id)
 
+    def _init_memberships(self):
+        self.membership_index.clear()
+        for queue_id, queue in self.xod_config['queues'].keeplist.iteritems():
+            self.membership_index.set_dest(membership_index.QUEUE, queue_id, queue['name'])
+        for group_id, group in self.xod_config['groups'].keeplist.iteritems():
+            self.membership_index.set_dest(membership_index.GROUP, group_id, group['name'])
+        for user_id in self.xod_config['users'].keeplist:
+            self._update_user_memberships(user_id)
+        if self._queue_member_manager is not None:
+            for queue_member in self._queue_member_manager.get_queue_members():
+                self._on_queue_member_added(queue_member)
+        self._group_members_outdated = True
+        self._reload_group_members()
+
+    def _update_memberships(self, listname, item_id, old_item):
+        item = self.xod_config[listname].keeplist.get(item_id)
+        if listname == 'queues':
+            self._update_dest(membership_index.QUEUE, item_id, item)
+        elif listname == 'groups':
+            self._update_dest(membership_index.GROUP, item_id, item)
+            if old_item is not None:
+                self.membership_index.set_members(membership_index.GROUP, old_item['name'], ())
+            # the members of the groups are edited with the groups and the users
+            self._group_members_outdated = True
+        elif listname == 'users':
+            if item is None:
+                self.membership_index.remove_user(item_id)
+            else:
+                self._update_user_memberships(item_id)
+            self._group_members_outdated = True
+        elif listname == 'phones':
+            for phone in (old_item, item):
+                if phone is not None and phone.get('iduserfeatures') is not None:
+                    self._update_user_memberships(str(phone['iduserfeatures']))
+        elif listname == 'agents':
+            for user_id, user in self.xod_config['users'].keeplist.iteritems():
+                if str(user.get('agentid')) == str(item_id):
+                    self._update_user_memberships(user_id)
+        if not self._group_members_reload_deferred:
+            self._reload_group_members()
+
+    def _update_dest(self, dest_type, dest_id, dest):
+        if dest is None:
+            self.membership_index.remove_dest(dest_type, dest_id)
+        else:
+            self.membership_index.set_dest(dest_type, dest_id, dest['name'])
+
+    def _update_user_memberships(self, user_id):
+        user = self.xod_config['users'].keeplist.get(user_id)
+        if user is None:
+            self.membership_index.remove_user(user_id)
+            return
+
+        phones_list = self.xod_config['phones']
+        member_names = set(phones_list.keeplist[phone_id]['identity']
+                           for phone_id in phones_list.find_all_by('user_id', int(user_id)))
+        agent = self.xod_config['agents'].keeplist.get(str(user.get('agentid')))
+        if agent is not None:
+            member_names.add(format_member_name_of_agent(agent['number']))
+        self.membership_index.set_user_member_names(user_id, member_names)
+
+    def _reload_group_members(self):
+        if not self._group_members_outdated:
+            return
+        self._group_members_outdated = False
+        try:
+            group_member_names = membership_index.get_group_member_names()
+        except Exception:
+            logger.exception('Could not fetch the members of the groups')
+            return
+        for group in self.xod_config['groups'].keeplist.itervalues():
+            self.membership_index.set_members(membership_index.GROUP, group['name'],
+                                              group_member_names.get(group['name'], ()))
+
+    def _on_queue_member_added(self, queue_member):
+        self.membership_index.add_member(membership_index.QUEUE, queue_member.queue_name, queue_member.member_name)
+
+    def _on_queue_member_removed(self, queue_member):
+        self.membership_index.remove_member(membership_index.QUEUE, queue_member.queue_name, queue_member.member_name)
+
     def get_config(self, listname, item_id, user_contexts=None):
         if listname == 'queuemembers':
             return self.queue_member_cti_adapter.get_config(item_id)
@@ -284,10 +452,8 @@ class Safe(object):
                 domatch = True
             elif dest_type == 'agent':
                 domatch = user['agentid'] == int(dest_id)
-            elif dest_type == 'queue' and dest_id:
-                domatch = queue_dao.is_user_member_of_queue(userid, dest_id)
-            elif dest_type == 'group' and dest_id:
-                domatch = group_dao.is_user_member_of_group(userid, dest_id)
+            elif dest_type in (membership_index.QUEUE, membership_index.GROUP) and dest_id:
+                domatch = self.membership_index.is_member(dest_type, dest_id, userid)
         else:
             # 'all' case
             domatch = True
@@ -305,23 +471,19 @@ class Safe(object):
 
     def find_users_channels_with_peer(self, user_id):
         '''Find a user's channels that that are talking to another channel'''
-        potential_channel_start = []
+        channel_names = []
         main_line = self.xod_config['phones'].get_main_line(user_id)
         agent = self.xod_config['agents'].get_agent_by_user(user_id)
         if main_line:
-            potential_channel_start.append('%s/%s' % (main_line['protocol'], main_line['name']))
+            channel_names.extend(self.channels.find_by_relation('phone:%s' % main_line['id']))
         if agent:
-            potential_channel_start.append('Agent/%s' % agent['number'])
+            channel_names.extend(self.channels.find_by_identity('agent/%s' % agent['number']))
 
-        def channel_filter(channel_key):
-            '''Check if a channel (SIP/1234-xxxx) matches our potential channels'''
-            for channel_start in potential_channel_start:
-                if (channel_key.lower().startswith(channel_start.lower())
-                        and self.channels[channel_key].peerchannel
-                        and not self.channels[channel_key].properties['holded']):
-                    return True
+        def channel_filter(channel_name):
+            channel = self.channels[channel_name]
+            return channel.peerchannel and not channel.properties['holded']
 
-        return filter(channel_filter, self.channels)
+        return filter(channel_filter, channel_names)
 
     def user_get_hashed_password(self, userid, sessionid):
         tohash = '%s:%s' % (sessionid,
@@ -354,15 +516,14 @@ class Safe(object):
         self.handle_cti_stack('empty_stack')
 
     def voicemailupdate(self, mailbox, new, old=None, waiting=None):
-        for k, v in self.xod_config['voicemails'].keeplist.iteritems():
-            if mailbox == v.get('fullmailbox'):
-                self.handle_cti_stack('set', ('voicemails', 'updatestatus', k))
-                self.xod_status['voicemails'][k].update({'old': old,
-                                                         'new': new,
-                                                         'waiting': waiting})
-                self.handle_cti_stack('empty_stack')
-                logger.info("voicemail %s updated. new:%s old:%s waiting:%s", mailbox, new, old, waiting)
-                break
+        k = self.xod_config['voicemails'].find_by('fullmailbox', mailbox)
+        if k is not None:
+            self.handle_cti_stack('set', ('voicemails', 'updatestatus', k))
+            self.xod_status['voicemails'][k].update({'old': old,
+                                                     'new': new,
+                                                     'waiting': waiting})
+            self.handle_cti_stack('empty_stack')
+            logger.info("voicemail %s updated. new:%s old:%s waiting:%s", mailbox, new, old, waiting)
 
     def update(self, channel):
         chanprops = self.channels.get(channel)
@@ -469,6 +630,10 @@ class Safe(object):
             logger.warning('Failed to update phone status for %s', hint)
 
     def updaterelations(self, channel):
+        self._update_channel_relations(channel)
+        self.channels.reindex(channel)
+
+    def _update_channel_relations(self, channel):
         self.channels[channel].relations = []
         if channel.startswith('SIPPeer/'):
             return
@@ -508,6 +673,7 @@ class Safe(object):
                     self.xod_status['phones'][p]['channels'].remove(oldchannel)
                     self.channels[newchannel].delrelation(r)
             self.channels[newchannel].relations = newrelations
+            self.channels.reindex(newchannel)
             newfirstchannel = self.channels[newchannel].peerchannel
             if newfirstchannel:
                 self.setpeerchannel(newfirstchannel, newchannel)
@@ -518,6 +684,7 @@ class Safe(object):
         chanprops = self.channels.get(channel)
         chanprops.peerchannel = peerchannel
         chanprops.properties['talkingto_id'] = peerchannel
+        self.channels.reindex(channel)
 
     # IPBX side
 
@@ -610,20 +777,30 @@ class Safe(object):
             self._ctiserver.interface_ami.execute_and_track(actionid, params)
             del self.faxes[fileid]
 
-    def update_directories(self):
+    def update_directories(self, changed_sections=None):
         # This function must be called after a certain amount of initialization
         # went by in the _ctiserver object since some of the directories depends on
         # some information which is not available during this Safe __init__
-        display_contents = config['displays']
-        self.displays_mgr.update(display_contents)
+        if changed_sections is None:
+            changed_sections = DIRECTORY_SECTIONS
+        if DIRECTORY_SECTIONS.isdisjoint(changed_sections):
+            return
+
+        changed_displays = set()
+        if 'displays' in changed_sections:
+            changed_displays = self.displays_mgr.update(config['displays'])
 
-        directories_contents = config['directories']
-        self.directories_mgr.update(self._ctiserver, directories_contents)
+        changed_directories = set()
+        if 'directories' in changed_sections:
+            changed_directories = self.directories_mgr.update(self._ctiserver, config['directories'])
 
-        contexts_contents = config['contexts']
         self.contexts_mgr.update(self.displays_mgr.displays,
                                  self.directories_mgr.directories,
-                                 contexts_contents)
+                                 config['contexts'],
+                                 changed_displays,
+                                 changed_directories)
+        logger.info('Directories updated: %d displays and %d directories changed',
+                    len(changed_displays), len(changed_directories))
 
     def getcustomers(self, user_id, pattern, commandid):
         try:
@@ -18,6 +18,8 @@
 import logging
 import random
 
+from collections import defaultdict
+
 from xivo_cti import ALPHANUMS
 from xivo_cti import asterisk_ami_definitions as ami_def
 from xivo_cti.ami import ami_callback_handler
@@ -28,6 +30,8 @@ from xivo_cti.ami.ami_response_handler import AMIResponseHandler
 from xivo_cti.ami.initializer import AMIInitializer
 from xivo_cti.ami.ami_callback_handler import AMICallbackHandler
 from xivo_cti.ami.ami_agent_login_logoff import AMIAgentLoginLogoff
+from xivo_cti.ami.event_filter import AMIEventFilter
+from xivo_cti.ami.stream_parser import AMIStreamParser
 from xivo_cti.ioc.context import context
 from xivo_cti import dao
 
@@ -37,15 +41,16 @@ logger = logging.getLogger('interface_ami')
 class AMI(object):
 
     kind = 'AMI'
-    LINE_SEPARATOR = '\r\n'
-    EVENT_SEPARATOR = '\r\n\r\n'
-    FIELD_SEPARATOR = ': '
 
-    def __init__(self, cti_server, innerdata, ami_class):
+    def __init__(self, cti_server, innerdata, ami_class, ami_action_tracker):
         self._ctiserver = cti_server
         self.innerdata = innerdata
         self.amiclass = ami_class
-        self._input_buffer = ''
+        self._action_tracker = ami_action_tracker
+        self._parser = AMIStreamParser()
+        self._ami_18_functions = {}
+        self.handled_events = defaultdict(int)
+        self.dropped_events = defaultdict(int)
         self.actionids = {}
         self.originate_actionids = {}
 
@@ -60,90 +65,121 @@ class AMI(object):
         self._ami_initializer = AMIInitializer()
         self._ami_initializer._ami_class = self.amiclass
         self._ami_initializer._ami_callback_handler = AMICallbackHandler.get_instance()
+        self._event_filter = AMIEventFilter(self.amiclass)
+        AMICallbackHandler.get_instance().attach_observer(self._on_ami_callbacks_changed)
 
     def connect(self):
         logger.info('connecting ami .....')
         try:
             self._ami_initializer.register()
+            self._action_tracker.clear()
             self.amiclass.connect()
             self.amiclass.login()
+            self._event_filter.start(self.handled_event_names())
             return self.amiclass.sock
         except Exception:
             logger.warning('unable to connect/login')
 
     def disconnect(self):
         logger.info('ami disconnected')
+        self._event_filter.stop()
         self.amiclass.sock.close()
 
-    def decode_raw_event(self, raw_event):
-        return raw_event.decode('utf8', 'replace')
+    def handled_event_names(self):
+        event_names = ami_callback_handler.AMICallbackHandler.get_instance().get_event_names()
+        for event_name in ami_def.evfunction_to_method_name:
+            if self._get_ami_18_functions(event_name):
+                event_names.add(event_name.lower())
+        return event_names
+
+    def _on_ami_callbacks_changed(self):
+        self._event_filter.update(self.handled_event_names())
 
     def handle_event(self, input_data):
         """
         Handles the AMI events occuring on Asterisk.
         If the Event field is there, calls the handle_ami_function() function.
         """
-        full_idata = self._input_buffer + input_data
-        events = full_idata.split(self.EVENT_SEPARATOR)
-        self._input_buffer = events.pop()
-
-        for raw_event in events:
-            decoded_event = self.decode_raw_event(raw_event)
-            event = {}
-            nocolon = []
-            for line in decoded_event.split(self.LINE_SEPARATOR):
-                if '\n' not in line:
-                    if line != '--END COMMAND--':  # occurs when requesting "module reload xxx.so"
-                        key_value = line.split(self.FIELD_SEPARATOR, 1)
-                        if len(key_value) == 2:
-                            key, value = key_value
-                            event[key.strip()] = value
-                        elif line.startswith('Asterisk Call Manager'):
-                            logger.info('%s', line)
-                else:
-                    nocolon.append(line)
+        for raw_event in self._parser.feed(input_data):
+            event_name = self._parser.peek_event_name(raw_event)
+            if event_name is not None:
+                self._handle_raw_event(event_name, raw_event)
+                continue
 
+            event = self._parser.parse_event(raw_event)
             if 'Event' in event and event['Event'] is not None:
                 event_name = event['Event']
                 self.handle_ami_function(event_name, event)
             elif 'Response' in event and event['Response'] is not None:
                 AMIResponseHandler.get_instance().handle_response(event)
+                self._action_tracker.handle_response(event)
                 response = event['Response']
                 if (response == 'Follows' and 'Privilege' in event
                         and event['Privilege'] == 'Command'):
                     try:
                         self.amiresponse_follows(event)
                     except Exception:
-                        logger.exception('response_follows (%s) (%s)', event, nocolon)
+                        logger.exception('response_follows (%s)', event)
 
                 elif response == 'Success':
                     try:
                         self.amiresponse_success(event)
                     except Exception:
-                        logger.exception('response_success (%s) (%s)', event, nocolon)
+                        logger.exception('response_success (%s)', event)
 
                 elif response == 'Error':
                     try:
                         self.amiresponse_error(event)
                     except Exception:
-                        logger.exception('response_error (%s) (%s)', event, nocolon)
+                        logger.exception('response_error (%s)', event)
+
+    def _handle_raw_event(self, event_name, raw_event):
+        userevent_name = None
+        if event_name == 'UserEvent':
+            userevent_name = self._parser.peek_field(raw_event, 'UserEvent')
+
+        functions = self._get_functions(event_name, userevent_name)
+        tracked = self._is_tracked(raw_event)
+        if functions or tracked:
+            self.handled_events[event_name] += 1
+            event = self._parser.parse_event(raw_event)
+            if tracked:
+                self._action_tracker.handle_event(event)
+            self._run_functions_with_event(functions, event)
+        else:
+            self.dropped_events[event_name] += 1
+
+    def _is_tracked(self, raw_event):
+        # the events answering a tracked action are needed even if nobody listens to them
+        if not self._action_tracker.is_collecting():
+            return False
+        return self._action_tracker.collects(self._parser.peek_field(raw_event, 'ActionID'))
 
     def handle_ami_function(self, evfunction, event):
         """
         Handles the AMI events related to a given function (i.e. containing the Event field).
         It roughly only dispatches them to the relevant commandset's methods.
         """
-        ami_18 = context.get('ami_18')
-        functions = []
-        if 'Event' in event:
-            functions.extend(ami_callback_handler.AMICallbackHandler.get_instance().get_callbacks(event))
-        if evfunction in ami_def.evfunction_to_method_name:
-            methodname = ami_def.evfunction_to_method_name.get(evfunction)
-            if hasattr(ami_18, methodname):
-                functions.append(getattr(ami_18, methodname))
-
+        functions = self._get_functions(evfunction, event.get('UserEvent'))
         self._run_functions_with_event(functions, event)
 
+    def _get_functions(self, event_name, userevent_name):
+        callback_handler = ami_callback_handler.AMICallbackHandler.get_instance()
+        callbacks = callback_handler.get_callbacks_by_name(event_name, userevent_name)
+        return callbacks + self._get_ami_18_functions(event_name)
+
+    def _get_ami_18_functions(self, event_name):
+        functions = self._ami_18_functions.get(event_name)
+        if functions is None:
+            functions = ()
+            methodname = ami_def.evfunction_to_method_name.get(event_name)
+            if methodname:
+                ami_18 = context.get('ami_18')
+                if hasattr(ami_18, methodname):
+                    functions = (getattr(ami_18, methodname),)
+            self._ami_18_functions[event_name] = functions
+        return functions
+
     def amiresponse_success(self, event):
         actionid = event.get('ActionID')
         if actionid and actionid in self.actionids:
@@ -189,6 +225,7 @@ class AMI(object):
             if hasattr(conn_ami, amicommand):
                 conn_ami.actionid = actionid
                 self.actionids[actionid] = params
+                self._action_tracker.track(actionid).add_callback(self._on_tracked_action_done)
                 amiargs = params.get('amiargs')
                 return getattr(conn_ami, amicommand)(* amiargs)
             else:
@@ -199,6 +236,13 @@ class AMI(object):
             logger.warning('mode %s : no AMI connection', mode)
             return 'noconn'
 
+    def _on_tracked_action_done(self, pending_action):
+        # the responses are handled by amiresponse_*, only forget the unanswered actions
+        if pending_action.status == pending_action.TIMEOUT:
+            params = self.actionids.pop(pending_action.action_id, None)
+            if params:
+                logger.warning('no response to action %s (%s)', pending_action.action_id, params.get('mode'))
+
     def _handle_newchannel_success(self, event, properties):
         if 'Value' in event and event['Value']:
             value = event['Value']
@@ -15,16 +15,19 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
-import cjson
 import logging
 import time
 import random
 
+from xivo_cti import config
 from xivo_cti import cti_command
 from xivo_cti import CTI_PROTOCOL_VERSION
 from xivo_cti import ALPHANUMS
 from xivo_cti.cti.cti_command_handler import CTICommandHandler
+from xivo_cti.client_connection import ClientConnection
+from xivo_cti.cti import json_codec
 from xivo_cti.cti.commands.login_id import LoginID
+from xivo_cti.cti.send_queue_policy import SendQueuePolicy
 from xivo_cti.interfaces import interfaces
 from xivo_cti.ioc.context import context
 from xivo_dao import user_dao
@@ -34,17 +37,14 @@ logger = logging.getLogger('interface_cti')
 
 class serialJson(object):
 
+    def __init__(self):
+        self._codec = json_codec.default_codec()
+
     def decode(self, linein):
-        # Output of the cjson.decode is a Unicode object, even though the
-        # non-ASCII characters have not been decoded.
-        # Without the .decode('utf-8'), some Unicode character (try asian, not european)
-        # will not be interpreted correctly.
-        v = cjson.decode(linein.decode('utf-8').replace('\\/', '/'))
-        return v
+        return self._codec.decode(linein)
 
     def encode(self, obj):
-        obj['timenow'] = time.time()
-        return cjson.encode(obj)
+        return self._codec.encode(dict(obj, timenow=time.time()))
 
 
 class NotLoggedException(StandardError):
@@ -67,7 +67,10 @@ class CTI(interfaces.Interfaces):
         self._cti_command_handler = CTICommandHandler(self)
         self._register_login_callbacks()
         self._state = self.STATE_NEW
+        # the number of messages encoded for this interface only
+        self.nb_encoded_messages = 0
         self._observers = set()
+        self._send_queue_policy = None
 
     def answer_cb(self):
         pass
@@ -85,6 +88,27 @@ class CTI(interfaces.Interfaces):
                                                                  'xivo_version',
                                                                  'cti_connection'])
 
+    def connected(self, connid):
+        interfaces.Interfaces.connected(self, connid)
+        send_queue_config = config['client_send_queue']
+        self._send_queue_policy = SendQueuePolicy(connid,
+                                                  self._encode_line,
+                                                  send_queue_config['max_bytes'],
+                                                  send_queue_config['policy'])
+        connid.attach_observer(self._on_connection_update)
+
+    def _on_connection_update(self, connection, state):
+        if state == ClientConnection.STATE_IDLE:
+            self._send_queue_policy.on_connection_idle()
+
+    def is_slow(self):
+        return self._send_queue_policy is not None and self._send_queue_policy.is_slow()
+
+    def queued_bytes(self):
+        if self._send_queue_policy is None:
+            return 0
+        return self._send_queue_policy.queued_bytes()
+
     def disconnected(self, cause):
         logger.info('disconnected %s', cause)
         self._set_new_state(self.STATE_DISCONNECTED)
@@ -160,10 +184,15 @@ class CTI(interfaces.Interfaces):
             self.send_message(msg)
 
     def send_message(self, msg):
-        self.connid.append_queue(self.serial.encode(msg) + '\n')
+        data = self._encode_line(msg)
+        self._send_queue_policy.send(data, [(msg, data)])
+
+    def send_encoded_message(self, data, messages=None):
+        self._send_queue_policy.send(data, messages)
 
-    def send_encoded_message(self, data):
-        self.connid.append_queue(data)
+    def _encode_line(self, msg):
+        self.nb_encoded_messages += 1
+        return self.serial.encode(msg) + '\n'
 
     def receive_login_id(self, login, version, connection):
         if connection != self:
@@ -186,6 +215,7 @@ class CTI(interfaces.Interfaces):
         if user_dict:
             self.connection_details.update({'ipbxid': self._ctiserver.myipbxid,
                                             'userid': str(user_id)})
+            context.get('connection_registry').set_user(self, user_dict)
             self.answer_cb = self._get_answer_cb(user_id)
 
         session_id = ''.join(random.sample(ALPHANUMS, 10))
@@ -15,9 +15,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
+from xivo_cti import db_connection_manager
 from xivo_cti.interfaces import interfaces
+from xivo_cti.ioc.context import context
 
 import logging
+import re
 import time
 
 logger = logging.getLogger('interface_info')
@@ -25,7 +28,10 @@ logger = logging.getLogger('interface_info')
 infohelptext = ['',
                 'help                     : this help',
                 '-- informations about misc lists --',
-                'showlist [listname [id]] : show all lists or the specified list'
+                'showlist [listname [id]] : show all lists or the specified list',
+                'amistats                 : show the number of handled and dropped AMI events',
+                'sendqueues               : show the bytes waiting to be sent to each CTI client',
+                'dbpools                  : show the usage of the database connection pools',
                 '-- slightly advanced features --',
                 'disc <ip> <port>             : closes the socket linked to <ip>:<port> if present',
                 '']
@@ -78,20 +84,26 @@ class INFO(interfaces.Interfaces):
                             except KeyError:
                                 clireply.append('        status: None')
 
+                elif usefulmsg == 'amistats':
+                    clireply.extend(self._ami_stats())
+
+                elif usefulmsg == 'sendqueues':
+                    clireply.extend(self._send_queues())
+
+                elif usefulmsg == 'dbpools':
+                    clireply.extend(self._db_pools())
+
                 elif usefulmsg.startswith('disc '):
                     command_args = usefulmsg.split()
                     if len(command_args) > 2:
-                        ipdef = tuple([command_args[1], int(command_args[2])])
-                        socktoremove = None
-                        for sockid in self._ctiserver.fdlist_interface_cti:
-                            if ipdef == sockid.getpeername():
-                                socktoremove = sockid
-                        if socktoremove:
+                        peer = '%s:%d' % (command_args[1], int(command_args[2]))
+                        interface_cti = context.get('connection_registry').find_by_peer(peer)
+                        if interface_cti:
+                            socktoremove = interface_cti.connid
                             clireply.append('disconnecting %s (%s)'
-                                           % (socktoremove.getpeername(),
-                                              self._ctiserver.fdlist_interface_cti[socktoremove]))
+                                           % (socktoremove.getpeername(), interface_cti))
+                            # removed from the lists with the other closed connections
                             socktoremove.close()
-                            del self._ctiserver.fdlist_interface_cti[socktoremove]
                         else:
                             clireply.append('nobody disconnected')
 
@@ -106,6 +118,48 @@ class INFO(interfaces.Interfaces):
         freply = [{'message': clireply}]
         return freply
 
+    def _ami_stats(self):
+        interface_ami = self._ctiserver.interface_ami
+        handled = interface_ami.handled_events
+        dropped = interface_ami.dropped_events
+        event_names = sorted(set(handled) | set(dropped),
+                             key=lambda name: handled.get(name, 0) + dropped.get(name, 0),
+                             reverse=True)
+        lines = ['%-32s %12s %12s' % ('event', 'handled', 'dropped')]
+        for event_name in event_names:
+            lines.append('%-32s %12d %12d' % (event_name, handled.get(event_name, 0), dropped.get(event_name, 0)))
+        amiclass = interface_ami.amiclass
+        lines.append('pending actions: %d (%d bytes), oldest pending for %.3f s'
+                     % (amiclass.pending_actions(), amiclass.pending_bytes(), amiclass.oldest_pending_age()))
+        return lines
+
+    def _send_queues(self):
+        lines = []
+        nb_slow = 0
+        total = 0
+        for connection, interface_cti in self._ctiserver.fdlist_interface_cti.iteritems():
+            queued_bytes = interface_cti.queued_bytes()
+            slow = interface_cti.is_slow()
+            total += queued_bytes
+            if slow:
+                nb_slow += 1
+            lines.append('%-24s %12d%s' % ('%s:%s' % connection.getpeername()[:2],
+                                            queued_bytes,
+                                            ' slow' if slow else ''))
+        lines.append('%d clients, %d slow, %d bytes queued' % (len(lines), nb_slow, total))
+        return lines
+
+    def _db_pools(self):
+        lines = []
+        for db_uri, stats in sorted(db_connection_manager.DbConnectionPool.stats().iteritems()):
+            # the credentials are not shown
+            lines.append('%s: %d connections, %d idle, %d acquired, %d timeouts, '
+                         'wait time %.6f s mean, %.6f s max'
+                         % (re.sub(r'//[^/@]*@', '//', db_uri), stats['size'], stats['idle'],
+                            stats['acquired'], stats['timeouts'],
+                            stats['mean_wait_time'], stats['max_wait_time']))
+        return lines
+
     def reply(self, replylines):
         try:
             for replyline in replylines:
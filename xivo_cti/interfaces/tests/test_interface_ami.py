@@ -35,7 +35,10 @@ class TestInterfaceAMI(unittest.TestCase):
 
         self.cti_server = Mock()
 
-        self.ami = AMI(self.cti_server, Mock(), Mock())
+        self.action_tracker = Mock()
+        self.action_tracker.is_collecting.return_value = False
+
+        self.ami = AMI(self.cti_server, Mock(), Mock(), self.action_tracker)
 
     def tearDown(self):
         self.ami_def_patcher.stop()
@@ -50,8 +53,8 @@ class TestInterfaceAMI(unittest.TestCase):
         handler.get_instance.return_value = instance
 
         callback = Mock()
-        callbacks = [callback]
-        instance.get_callbacks.return_value = callbacks
+        callbacks = (callback,)
+        instance.get_callbacks_by_name.return_value = callbacks
 
         evfunctions = {}
         self.ami_def.evfunction_to_method_name = evfunctions
@@ -61,21 +64,87 @@ class TestInterfaceAMI(unittest.TestCase):
 
         return handler, instance, callback, evfunctions, ami_18
 
-    def test_decode_raw_event(self):
-        raw_event = 'Event: Foobar\r\nCallerIDName: LASTNAME Firstnam\xe9\r\n'
-        expected = u'Event: Foobar\r\nCallerIDName: LASTNAME Firstnam\ufffd\r\n'
+    def test_handle_event_dispatches_complete_events(self):
+        _, _, callback, _, _ = self.setup_handle_ami_function()
 
-        result = self.ami.decode_raw_event(raw_event)
+        self.ami.handle_event('Event: Foo\r\nChannel: SIP/abc\r\n\r\nEvent: Ba')
+        self.ami.handle_event('r\r\n\r\n')
 
-        self.assertEquals(result, expected)
+        self.assertEqual(callback.call_count, 2)
+        callback.assert_any_call({'Event': 'Foo', 'Channel': 'SIP/abc'})
+        callback.assert_any_call({'Event': 'Bar'})
 
-    def test_handle_ami_function_calls_callback_from_ami_callback_handler(self):
+    def test_handle_event_userevent(self):
+        _, instance, _, _, _ = self.setup_handle_ami_function()
+
+        self.ami.handle_event('Event: UserEvent\r\nPrivilege: user,all\r\nUserEvent: Foo\r\n\r\n')
+
+        instance.get_callbacks_by_name.assert_called_once_with('UserEvent', 'Foo')
+
+    def test_handle_event_without_listener_is_not_parsed(self):
+        _, instance, _, _, _ = self.setup_handle_ami_function()
+        instance.get_callbacks_by_name.return_value = ()
+        self.ami._parser = Mock(wraps=self.ami._parser)
+
+        self.ami.handle_event('Event: VarSet\r\nVariable: foo\r\n\r\n')
+
+        self.assertFalse(self.ami._parser.parse_event.called)
+
+    def test_handle_event_without_listener_tracked_action(self):
+        _, instance, _, _, _ = self.setup_handle_ami_function()
+        instance.get_callbacks_by_name.return_value = ()
+        self.action_tracker.is_collecting.return_value = True
+        self.action_tracker.collects.side_effect = lambda action_id: action_id == '42'
+
+        self.ami.handle_event('Event: QueueMember\r\nActionID: 42\r\n\r\nEvent: QueueMember\r\nActionID: 43\r\n\r\n')
+
+        self.action_tracker.handle_event.assert_called_once_with({'Event': 'QueueMember', 'ActionID': '42'})
+
+    def test_handle_event_response_is_given_to_the_action_tracker(self):
+        self.ami.handle_event('Response: Success\r\nActionID: 42\r\n\r\n')
+
+        self.action_tracker.handle_response.assert_called_once_with({'Response': 'Success', 'ActionID': '42'})
+
+    def test_handle_event_counts_handled_and_dropped_events(self):
         _, instance, _, _, _ = self.setup_handle_ami_function()
+        instance.get_callbacks_by_name.side_effect = lambda name, _: (Mock(),) if name == 'Hangup' else ()
+
+        self.ami.handle_event('Event: Hangup\r\n\r\nEvent: VarSet\r\n\r\nEvent: VarSet\r\n\r\n')
+
+        self.assertEqual(self.ami.handled_events, {'Hangup': 1})
+        self.assertEqual(self.ami.dropped_events, {'VarSet': 2})
+
+    def test_handled_event_names(self):
+        _, instance, _, evfunctions, ami_18 = self.setup_handle_ami_function()
+        instance.get_event_names.return_value = set(['newchannel'])
+        evfunctions['Hangup'] = 'ami_hangup'
+        evfunctions['Foobar'] = 'ami_foobar'
+        del ami_18.ami_foobar
+
+        result = self.ami.handled_event_names()
+
+        self.assertEqual(result, set(['newchannel', 'hangup']))
+
+    def test_handle_ami_function_calls_callback_from_ami_callback_handler(self):
+        _, instance, callback, _, _ = self.setup_handle_ami_function()
 
         event = {'Event': 'Foobar'}
         self.ami.handle_ami_function('Foobar', event)
 
-        instance.get_callbacks.assert_called_once_with(event)
+        instance.get_callbacks_by_name.assert_called_once_with('Foobar', None)
+        callback.assert_called_once_with(event)
+
+    def test_handle_ami_function_calls_ami_18_method(self):
+        _, instance, callback, evfunctions, ami_18 = self.setup_handle_ami_function()
+        evfunctions['Hangup'] = 'ami_hangup'
+
+        event = {'Event': 'Hangup'}
+        self.ami.handle_ami_function('Hangup', event)
+        self.ami.handle_ami_function('Hangup', event)
+
+        callback.assert_called_with(event)
+        ami_18.ami_hangup.assert_called_with(event)
+        self.assertEqual(self.context.get.call_count, 1)
 
     def test_run_functions_with_one_param(self):
         f1, f2, f3 = functions = [
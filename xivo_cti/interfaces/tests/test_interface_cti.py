@@ -117,3 +117,11 @@ class TestCTI(unittest.TestCase):
 
         callback1.assert_called_once_with(self._cti_connection, sentinel)
         callback2.assert_called_once_with(self._cti_connection, sentinel)
+
+    def test_send_message_counts_encoded_messages(self):
+        self._cti_connection._send_queue_policy = Mock()
+
+        self._cti_connection.send_message({'class': 'foo'})
+        self._cti_connection.send_encoded_message('{"class": "foo"}\n')
+
+        self.assertEqual(self._cti_connection.nb_encoded_messages, 1)
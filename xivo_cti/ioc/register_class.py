@@ -20,12 +20,14 @@ from xivo_bus.ctl.producer import BusProducer
 from xivo_bus.resources.agent.client import AgentClient
 from xivo_bus.ctl.config import BusConfig
 from xivo_cti import config
+from xivo_cti.ami.action_tracker import AMIActionTracker
 from xivo_cti.ami.ami_callback_handler import AMICallbackHandler
 from xivo_cti.amiinterpret import AMI_1_8
 from xivo_cti.call_forms.call_form_result_handler import CallFormResultHandler
 from xivo_cti.call_forms.dispatch_filter import DispatchFilter
 from xivo_cti.call_forms.variable_aggregator import VariableAggregator
 from xivo_cti.channel_updater import ChannelUpdater
+from xivo_cti.cti.connection_registry import ConnectionRegistry
 from xivo_cti.cti.cti_group import CTIGroupFactory
 from xivo_cti.cti.cti_message_encoder import CTIMessageEncoder
 from xivo_cti.ctiserver import CTIServer
@@ -78,6 +80,7 @@ from xivo_cti.statistics.queue_statistics_producer import \
 from xivo_cti.statistics.statistics_notifier import StatisticsNotifier
 from xivo_cti.statistics.statistics_producer_initializer import \
     StatisticsProducerInitializer
+from xivo_cti.reactor import new_reactor
 from xivo_cti.task_queue import new_task_queue
 from xivo_cti.task_scheduler import new_task_scheduler
 from xivo_cti.tools.delta_computer import DeltaComputer
@@ -86,6 +89,7 @@ from xivo_cti.xivo_ami import AMIClass
 
 def setup():
     context.register('ami_18', AMI_1_8)
+    context.register('ami_action_tracker', AMIActionTracker)
     context.register('ami_callback_handler', AMICallbackHandler.get_instance())
     context.register('ami_class', AMIClass)
     context.register('agent_availability_computer', AgentAvailabilityComputer)
@@ -109,6 +113,7 @@ def setup():
     context.register('call_storage', CallStorage)
     context.register('call_manager', CallManager)
     context.register('channel_updater', ChannelUpdater)
+    context.register('connection_registry', ConnectionRegistry)
     context.register('cti_group_factory', CTIGroupFactory)
     context.register('cti_msg_encoder', CTIMessageEncoder)
     context.register('cti_server', CTIServer)
@@ -141,6 +146,7 @@ def setup():
     context.register('queue_member_manager', QueueMemberManager)
     context.register('queue_member_notifier', QueueMemberNotifier)
     context.register('queue_member_updater', QueueMemberUpdater)
+    context.register('reactor', new_reactor)
     context.register('statistics_notifier', StatisticsNotifier)
     context.register('statistics_producer_initializer', StatisticsProducerInitializer)
     context.register('task_queue', new_task_queue)
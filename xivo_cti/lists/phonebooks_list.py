@@ -24,9 +24,8 @@ class PhonebooksList(AnyList):
         self._innerdata = innerdata
         AnyList.__init__(self, 'phonebooks')
 
-    def init_data(self):
-        AnyList.init_data(self)
-        self.keeplist = self._getphonebook(self.keeplist)
+    def prepare_keeplist(self, keeplist):
+        return self._getphonebook(keeplist)
 
     def add(self, id):
         raw_data = self.listname_obj.get(id)
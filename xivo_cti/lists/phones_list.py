@@ -23,41 +23,21 @@ from xivo.asterisk.protocol_interface import InvalidChannelError
 logger = logging.getLogger('phonelist')
 
 
+def _user_id_of_phone(phone):
+    user_id = phone.get('iduserfeatures')
+    if user_id is None:
+        return None
+    return int(user_id)
+
+
 class PhonesList(ContextAwareAnyList):
 
+    unique_indexes = {'proto_and_name': lambda phone: phone['protocol'] + phone['name']}
+    multi_indexes = {'user_id': _user_id_of_phone}
+
     def __init__(self, innerdata):
         self._innerdata = innerdata
         ContextAwareAnyList.__init__(self, 'phones')
-        self._phone_id_by_proto_and_name = {}
-
-    def init_data(self):
-        super(PhonesList, self).init_data()
-        self._init_reverse_dictionaries()
-
-    def add(self, phone_id):
-        super(PhonesList, self).add(phone_id)
-        self._add_to_reverse_dictionaries(phone_id)
-
-    def delete(self, phone_id):
-        self._remove_from_reverse_dictionaries(phone_id)
-        super(PhonesList, self).delete(phone_id)
-
-    def _init_reverse_dictionaries(self):
-        phone_id_by_proto_and_name = {}
-        for phone_id, phone in self.keeplist.iteritems():
-            proto_and_name = phone['protocol'] + phone['name']
-            phone_id_by_proto_and_name[proto_and_name] = phone_id
-        self._phone_id_by_proto_and_name = phone_id_by_proto_and_name
-
-    def _add_to_reverse_dictionaries(self, phone_id):
-        phone = self.keeplist[phone_id]
-        proto_and_name = phone['protocol'] + phone['name']
-        self._phone_id_by_proto_and_name[proto_and_name] = phone_id
-
-    def _remove_from_reverse_dictionaries(self, phone_id):
-        phone = self.keeplist[phone_id]
-        proto_and_name = phone['protocol'] + phone['name']
-        del self._phone_id_by_proto_and_name[proto_and_name]
 
     def find_phone_by_channel(self, channel):
         try:
@@ -72,12 +52,11 @@ class PhonesList(ContextAwareAnyList):
             return self.keeplist[phone_id]
 
     def get_main_line(self, user_id):
-        users_phones = [phone for phone in self.keeplist.itervalues() if int(phone['iduserfeatures']) == int(user_id)]
-        return users_phones[0] if users_phones else None
+        phone_ids = self.find_all_by('user_id', int(user_id))
+        return self.keeplist[phone_ids[0]] if phone_ids else None
 
     def get_phone_id_from_proto_and_name(self, proto, name):
-        proto_and_name = proto + name
-        return self._phone_id_by_proto_and_name.get(proto_and_name)
+        return self.find_by('proto_and_name', proto + name)
 
     def get_callerid_from_phone_id(self, phone_id):
         phone = self.keeplist[phone_id]
@@ -24,8 +24,8 @@ class QueuesList(ContextAwareAnyList):
         self._innerdata = innerdata
         ContextAwareAnyList.__init__(self, 'queues')
 
-    def init_data(self):
-        super(QueuesList, self).init_data()
+    def init_data(self, keeplist=None):
+        super(QueuesList, self).init_data(keeplist)
         self._init_reverse_dictionary()
 
     def add(self, queue_id):
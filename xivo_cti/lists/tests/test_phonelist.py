@@ -345,7 +345,7 @@ class TestPhoneList(unittest.TestCase):
         innerdata.ipbxid = 'xivo'
         self.phone_list = PhonesList(innerdata)
         self.phone_list.keeplist = self.keeplist
-        self.phone_list._init_reverse_dictionaries()
+        self.phone_list._init_indexes()
 
     def test_find_phone_by_channel_no_result(self):
         channel = 'SIP/k8fh45-000000023'
@@ -16,18 +16,35 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
 from xivo_cti.cti_anylist import ContextAwareAnyList
+from xivo_cti.ioc.context import context
+
+
+def _login_of_user(user):
+    if user and user.get('enableclient'):
+        return user.get('loginclient')
+    return None
 
 
 class UsersList(ContextAwareAnyList):
 
+    unique_indexes = {'loginclient': _login_of_user}
+
     def __init__(self, innerdata):
         self._innerdata = innerdata
         ContextAwareAnyList.__init__(self, 'users')
 
+    def edit(self, user_id):
+        super(UsersList, self).edit(user_id)
+        context.get('connection_registry').update_user(self.keeplist[user_id])
+
+    def delete(self, user_id):
+        super(UsersList, self).delete(user_id)
+        context.get('connection_registry').remove_user(user_id)
+
     def finduser(self, userid):
-        for userinfo in self.keeplist.itervalues():
-            if userinfo and userinfo.get('enableclient') and userinfo.get('loginclient') == userid:
-                return userinfo
+        user_id = self.find_by('loginclient', userid)
+        if user_id is not None:
+            return self.keeplist[user_id]
 
     def get_contexts(self, user_id):
         try:
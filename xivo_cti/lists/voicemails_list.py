@@ -20,6 +20,8 @@ from xivo_cti.cti_anylist import ContextAwareAnyList
 
 class VoicemailsList(ContextAwareAnyList):
 
+    unique_indexes = {'fullmailbox': lambda voicemail: voicemail.get('fullmailbox')}
+
     def __init__(self, innerdata):
         self._innerdata = innerdata
         ContextAwareAnyList.__init__(self, 'voicemails')
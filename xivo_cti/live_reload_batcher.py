@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import logging
+import time
+
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LiveReloadBatcher(object):
+    """
+    Groups the live reload updates received from the WEBI by list and state
+    and applies them once no update has been received for delay seconds, or
+    max_delay seconds after the first update of the batch.
+    """
+
+    def __init__(self, innerdata, task_scheduler, delay, max_delay):
+        self._innerdata = innerdata
+        self._task_scheduler = task_scheduler
+        self._delay = delay
+        self._max_delay = max_delay
+        self._states = OrderedDict()
+        self._first_update_time = None
+        self._flush_task = None
+
+    def add(self, listname, state, item_id):
+        if item_id is None:
+            logger.warning('id not set for %s of %s, ignored', state, listname)
+            return
+        key = (listname, item_id)
+        previous_state = self._states.pop(key, None)
+        if previous_state == 'add':
+            if state == 'delete':
+                # the item was never sent to the clients
+                return
+            # the item is fetched when it is added, an update is not needed
+            state = 'add'
+        self._states[key] = state
+        self._schedule_flush()
+
+    def flush(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._first_update_time = None
+        states, self._states = self._states, OrderedDict()
+
+        item_ids_by_update = OrderedDict()
+        for (listname, item_id), state in states.iteritems():
+            item_ids_by_update.setdefault((listname, state), []).append(item_id)
+
+        for (listname, state), item_ids in item_ids_by_update.iteritems():
+            try:
+                self._innerdata.update_config_list_many(listname, state, item_ids)
+            except Exception:
+                logger.exception('Could not apply %s of %s %s', state, listname, item_ids)
+
+    def _schedule_flush(self):
+        now = time.time()
+        if self._first_update_time is None:
+            self._first_update_time = now
+        if self._flush_task:
+            self._flush_task.cancel()
+        delay = min(self._delay, self._first_update_time + self._max_delay - now)
+        self._flush_task = self._task_scheduler.schedule(max(delay, 0), self.flush)
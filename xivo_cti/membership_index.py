@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+from xivo_cti import config
+from xivo_cti import db_connection_manager
+
+QUEUE = 'queue'
+GROUP = 'group'
+
+
+class MembershipIndex(object):
+    """
+    Keeps in memory the members of the queues and groups.
+
+    The members are identified by their member name, i.e. the interface of a
+    line or the agent, and the member names of each user are kept so that a
+    user is a member of a queue or group if one of its member names is.
+    """
+
+    def __init__(self):
+        self._dest_names = {}
+        self._members = {}
+        self._user_member_names = {}
+        self.clear()
+
+    def clear(self):
+        self._dest_names = {QUEUE: {}, GROUP: {}}
+        self._members = {QUEUE: {}, GROUP: {}}
+        self._user_member_names = {}
+
+    def is_member(self, dest_type, dest_id, user_id):
+        dest_name = self._dest_names.get(dest_type, {}).get(str(dest_id))
+        members = self._members.get(dest_type, {}).get(dest_name)
+        if not members:
+            return False
+        return not members.isdisjoint(self._user_member_names.get(str(user_id), ()))
+
+    def set_dest(self, dest_type, dest_id, dest_name):
+        self._dest_names[dest_type][str(dest_id)] = dest_name
+
+    def remove_dest(self, dest_type, dest_id):
+        return self._dest_names[dest_type].pop(str(dest_id), None)
+
+    def set_members(self, dest_type, dest_name, member_names):
+        if member_names:
+            self._members[dest_type][dest_name] = set(member_names)
+        else:
+            self._members[dest_type].pop(dest_name, None)
+
+    def add_member(self, dest_type, dest_name, member_name):
+        self._members[dest_type].setdefault(dest_name, set()).add(member_name)
+
+    def remove_member(self, dest_type, dest_name, member_name):
+        members = self._members[dest_type].get(dest_name)
+        if members is None:
+            return
+        members.discard(member_name)
+        if not members:
+            del self._members[dest_type][dest_name]
+
+    def set_user_member_names(self, user_id, member_names):
+        self._user_member_names[str(user_id)] = set(member_names)
+
+    def remove_user(self, user_id):
+        self._user_member_names.pop(str(user_id), None)
+
+
+def get_group_member_names(group_name=None):
+    """
+    Returns the member names of the groups, or of the given group, by group
+    name, with a single query.
+    """
+    request = "SELECT ${columns} FROM queuemember WHERE category = 'group'"
+    params = ()
+    if group_name is not None:
+        request += ' AND queue_name = %s'
+        params = (group_name,)
+    with db_connection_manager.DbConnectionPool(config['db_uri']) as connection:
+        cursor = connection['cur']
+        cursor.query(request, ('queue_name', 'interface'), params)
+        rows = cursor.fetchall()
+
+    member_names = {}
+    for queue_name, interface in rows:
+        member_names.setdefault(queue_name, set()).add(interface)
+    return member_names
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import select
+
+# epoll constants only exist on Linux
+_EPOLL_READ_EVENTS = getattr(select, 'EPOLLIN', 0) | getattr(select, 'EPOLLPRI', 0)
+_EPOLL_WRITE_EVENTS = getattr(select, 'EPOLLOUT', 0)
+
+
+def new_reactor():
+    if hasattr(select, 'epoll'):
+        return _EpollReactor(select.epoll())
+    return _SelectReactor()
+
+
+class _SelectReactor(object):
+
+    def __init__(self):
+        self._readers = set()
+        self._writers = set()
+        self._paused = set()
+
+    def register(self, fileobj):
+        self._readers.add(fileobj)
+
+    def unregister(self, fileobj):
+        self._readers.discard(fileobj)
+        self._writers.discard(fileobj)
+        self._paused.discard(fileobj)
+
+    def set_readable(self, fileobj, readable):
+        if readable or fileobj not in self._readers:
+            self._paused.discard(fileobj)
+        else:
+            self._paused.add(fileobj)
+
+    def set_writable(self, fileobj, writable):
+        if writable and fileobj in self._readers:
+            self._writers.add(fileobj)
+        else:
+            self._writers.discard(fileobj)
+
+    def registered(self):
+        return list(self._readers)
+
+    def clear(self):
+        self._readers.clear()
+        self._writers.clear()
+        self._paused.clear()
+
+    def poll(self, timeout=None):
+        readers = self._readers - self._paused if self._paused else self._readers
+        if timeout is None:
+            readables, writables, _ = select.select(readers, self._writers, [])
+        else:
+            readables, writables, _ = select.select(readers, self._writers, [], timeout)
+        return readables, writables
+
+
+class _EpollReactor(object):
+
+    def __init__(self, epoll):
+        self._epoll = epoll
+        self._fds = {}
+        self._fileobjs = {}
+        self._writers = set()
+        self._paused = set()
+
+    def register(self, fileobj):
+        fd = fileobj.fileno()
+        self._epoll.register(fd, _EPOLL_READ_EVENTS)
+        self._fds[fileobj] = fd
+        self._fileobjs[fd] = fileobj
+
+    def unregister(self, fileobj):
+        fd = self._fds.pop(fileobj, None)
+        if fd is None:
+            return
+
+        self._writers.discard(fileobj)
+        self._paused.discard(fileobj)
+        # the fd may have been closed and reused by a newer registration
+        if self._fileobjs.get(fd) is fileobj:
+            del self._fileobjs[fd]
+            self._unregister_fd(fd)
+
+    def set_writable(self, fileobj, writable):
+        fd = self._fds.get(fileobj)
+        if fd is None or writable == (fileobj in self._writers):
+            return
+
+        if writable:
+            self._writers.add(fileobj)
+        else:
+            self._writers.discard(fileobj)
+        self._epoll.modify(fd, self._events(fileobj))
+
+    def set_readable(self, fileobj, readable):
+        fd = self._fds.get(fileobj)
+        if fd is None or readable == (fileobj not in self._paused):
+            return
+
+        if readable:
+            self._paused.discard(fileobj)
+        else:
+            self._paused.add(fileobj)
+        self._epoll.modify(fd, self._events(fileobj))
+
+    def registered(self):
+        return self._fds.keys()
+
+    def clear(self):
+        for fd in self._fileobjs:
+            self._unregister_fd(fd)
+        self._fds.clear()
+        self._fileobjs.clear()
+        self._writers.clear()
+        self._paused.clear()
+
+    def poll(self, timeout=None):
+        if timeout is None:
+            timeout = -1
+
+        readables = []
+        writables = []
+        for fd, events in self._epoll.poll(timeout):
+            fileobj = self._fileobjs.get(fd)
+            if fileobj is None:
+                continue
+            if events & _EPOLL_WRITE_EVENTS:
+                writables.append(fileobj)
+            # EPOLLERR and EPOLLHUP are reported as readable, the next read will fail
+            if events & ~_EPOLL_WRITE_EVENTS:
+                readables.append(fileobj)
+        return readables, writables
+
+    def _events(self, fileobj):
+        events = 0
+        if fileobj not in self._paused:
+            events |= _EPOLL_READ_EVENTS
+        if fileobj in self._writers:
+            events |= _EPOLL_WRITE_EVENTS
+        return events
+
+    def _unregister_fd(self, fd):
+        try:
+            self._epoll.unregister(fd)
+        except (IOError, OSError):
+            # a closed fd has already been removed from the epoll set
+            pass
@@ -29,14 +29,15 @@ class CallStorage(object):
         self._call_notifier = call_notifier
         self._endpoints = {}
         self._calls = {}
+        self._uids_by_extension = {}
+        self._uids_by_local_channel = {}
 
     def get_status_for_extension(self, extension):
         return self._endpoints.get(extension, EndpointStatus.available)
 
     def find_all_calls_for_extension(self, extension):
-        result = [call for call in self._calls.itervalues()
-                  if call.source.extension == extension or call.destination.extension == extension]
-        return result
+        uids = self._uids_by_extension.get(extension, ())
+        return [self._calls[uid] for uid in uids]
 
     def merge_local_channels(self, local_channel):
         non_unique_part = local_channel.split(';', 1)[0]
@@ -46,27 +47,24 @@ class CallStorage(object):
         except LookupError:
             return
 
+        self._unindex_call(source_uid)
+        self._unindex_call(destination_uid)
         self._calls[destination_uid].source = self._calls[source_uid].source
         del self._calls[source_uid]
+        self._index_call(destination_uid)
 
     def _find_call_with_destination_starting_with(self, term):
-        uid, call = self._find_call_matching(
-            lambda uid, call: call.destination._channel.startswith(term))
-
-        return uid
+        return self._find_call_matching(term, lambda call: call.destination)
 
     def _find_call_with_source_starting_with(self, term):
-        uid, call = self._find_call_matching(
-            lambda uid, call: call.source._channel.startswith(term))
-
-        return uid
+        return self._find_call_matching(term, lambda call: call.source)
 
-    def _find_call_matching(self, predicate):
-        for uid, call in self._calls.iteritems():
-            if predicate(uid, call):
-                return uid, call
+    def _find_call_matching(self, local_channel_prefix, get_channel):
+        for uid in self._uids_by_local_channel.get(local_channel_prefix, ()):
+            if _local_channel_prefix(get_channel(self._calls[uid])._channel) == local_channel_prefix:
+                return uid
 
-        raise LookupError('Could not match a call to the given predicate')
+        raise LookupError('Could not match a call to %s' % local_channel_prefix)
 
     def update_endpoint_status(self, extension, status):
         if self._need_to_update(extension, status):
@@ -78,6 +76,7 @@ class CallStorage(object):
         self.end_call(destination_uniqueid)
 
         self._calls[uniqueid] = Call(source, destination)
+        self._index_call(uniqueid)
         event = CallEvent(uniqueid=uniqueid,
                           source=source.extension,
                           destination=destination.extension,
@@ -95,8 +94,26 @@ class CallStorage(object):
                           destination=destination_channel.extension,
                           status=CallStatus.hangup)
         self._call_notifier.notify(event)
+        self._unindex_call(uniqueid)
         self._calls.pop(uniqueid)
 
+    def _index_call(self, uniqueid):
+        for extension, local_channel in self._index_keys(uniqueid):
+            self._uids_by_extension.setdefault(extension, set()).add(uniqueid)
+            if local_channel is not None:
+                self._uids_by_local_channel.setdefault(local_channel, set()).add(uniqueid)
+
+    def _unindex_call(self, uniqueid):
+        for extension, local_channel in self._index_keys(uniqueid):
+            _discard(self._uids_by_extension, extension, uniqueid)
+            if local_channel is not None:
+                _discard(self._uids_by_local_channel, local_channel, uniqueid)
+
+    def _index_keys(self, uniqueid):
+        call = self._calls[uniqueid]
+        return [(channel.extension, _local_channel_prefix(channel._channel))
+                for channel in (call.source, call.destination)]
+
     def _need_to_update(self, extension, status):
         return extension not in self._endpoints or self._endpoints[extension] != status
 
@@ -110,3 +127,20 @@ class CallStorage(object):
         calls = self.find_all_calls_for_extension(extension)
         event = EndpointEvent(extension, status, calls)
         self._endpoint_notifier.notify(event)
+
+
+def _local_channel_prefix(channel):
+    # Local/102@default-00000006;1 and ;2 are the two halves of the same
+    # local channel
+    if isinstance(channel, basestring) and ';' in channel:
+        return channel.split(';', 1)[0]
+    return None
+
+
+def _discard(index, key, uniqueid):
+    uids = index.get(key)
+    if uids is None:
+        return
+    uids.discard(uniqueid)
+    if not uids:
+        del index[key]
@@ -175,6 +175,16 @@ class TestEndCall(_BaseTestCase):
         assert_that(self.call_notifier.notify.call_args_list,
                     contains(call(expected_event)))
 
+    def test_end_call_removes_the_call_of_the_extensions(self):
+        self._create_call(UNIQUEID,
+                          source_exten=self.source_exten,
+                          destination_exten=self.destination_exten)
+
+        self.storage.end_call(UNIQUEID)
+
+        assert_that(self.storage.find_all_calls_for_extension(self.source_exten), equal_to([]))
+        assert_that(self.storage.find_all_calls_for_extension(self.destination_exten), equal_to([]))
+
 
 class TestEndpointStatus(_BaseTestCase):
 
@@ -261,18 +271,23 @@ class TestNewCall(_BaseTestCase):
 
 class TestMergeLocalChannels(_BaseTestCase):
 
-    def test_when_channel_1_is_local(self):
-        self.storage._calls = {
-            u'1395685236.26': Call(
-                _Channel(Extension('1009', 'default', True), 'SIP/1uzh6d-0000000e'),
-                _Channel(Extension('', '', True), 'Local/102@default-00000006;1'),
-            ),
-            u'1395685237.28': Call(
-                _Channel(Extension('', '', True), 'Local/102@default-00000006;2'),
-                _Channel(Extension('1002', 'default', True), 'SIP/8o5zja-0000000f'),
-            ),
-        }
+    def setUp(self):
+        super(TestMergeLocalChannels, self).setUp()
+        self.source_exten = Extension('1009', 'default', True)
+        self.destination_exten = Extension('1002', 'default', True)
+        self.local_exten = Extension('', '', True)
+        self._create_call(u'1395685236.26',
+                          source_exten=self.source_exten,
+                          destination_exten=self.local_exten,
+                          source_channel='SIP/1uzh6d-0000000e',
+                          destination_channel='Local/102@default-00000006;1')
+        self._create_call(u'1395685237.28',
+                          source_exten=self.local_exten,
+                          destination_exten=self.destination_exten,
+                          source_channel='Local/102@default-00000006;2',
+                          destination_channel='SIP/8o5zja-0000000f')
 
+    def test_when_channel_1_is_local(self):
         self.storage.merge_local_channels('Local/102@default-00000006;')
 
         expected = {
@@ -283,3 +298,22 @@ class TestMergeLocalChannels(_BaseTestCase):
         }
 
         assert_that(self.storage._calls, equal_to(expected))
+
+    def test_merge_updates_the_calls_of_the_extensions(self):
+        self.storage.merge_local_channels('Local/102@default-00000006;')
+
+        merged_call = Call(_Channel(self.source_exten, 'SIP/1uzh6d-0000000e'),
+                           _Channel(self.destination_exten, 'SIP/8o5zja-0000000f'))
+        assert_that(self.storage.find_all_calls_for_extension(self.source_exten), contains(merged_call))
+        assert_that(self.storage.find_all_calls_for_extension(self.destination_exten), contains(merged_call))
+        assert_that(self.storage.find_all_calls_for_extension(self.local_exten), equal_to([]))
+
+    def test_merge_other_local_channel(self):
+        self.storage.merge_local_channels('Local/102@default-00000007;')
+
+        assert_that(self.storage._calls.keys(), contains_inanyorder(u'1395685236.26', u'1395685237.28'))
+
+    def test_merge_does_not_match_a_longer_local_channel(self):
+        self.storage.merge_local_channels('Local/102@default-0000000;')
+
+        assert_that(self.storage._calls.keys(), contains_inanyorder(u'1395685236.26', u'1395685237.28'))
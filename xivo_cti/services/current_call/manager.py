@@ -35,12 +35,16 @@ BRIDGE_TIME = 'bridge_time'
 ON_HOLD = 'on_hold'
 TRANSFER_CHANNEL = 'transfer_channel'
 
+INDEXED_FIELDS = [LINE_CHANNEL, PEER_CHANNEL, TRANSFER_CHANNEL]
+
 
 class CurrentCallManager(object):
 
     def __init__(self, current_call_notifier, current_call_formatter,
                  ami_class, device_manager, call_manager, call_storage):
         self._calls_per_line = {}
+        # the (line, call) of the calls by id(call) for each channel of each indexed field
+        self._calls_by_channel = dict((field, {}) for field in INDEXED_FIELDS)
         self._current_call_notifier = current_call_notifier
         current_call_formatter._current_call_manager = self
         self.ami = ami_class
@@ -55,12 +59,11 @@ class CurrentCallManager(object):
     def _bridge_channels_oriented(self, channel, other_channel):
         line = identity_from_channel(channel)
         if line not in self._calls_per_line:
-            self._calls_per_line[line] = [
-                {PEER_CHANNEL: other_channel,
-                 LINE_CHANNEL: channel,
-                 BRIDGE_TIME: time.time(),
-                 ON_HOLD: False}
-            ]
+            call = {PEER_CHANNEL: other_channel,
+                    LINE_CHANNEL: channel,
+                    BRIDGE_TIME: time.time(),
+                    ON_HOLD: False}
+            self._index_call(line, call)
             self._current_call_notifier.publish_current_call(line)
 
         line_calls = self._calls_per_line[line]
@@ -97,33 +100,21 @@ class CurrentCallManager(object):
         self._substitute_calls_channel(old, new)
 
     def _substitute_calls_channel(self, old, new):
-        for line, position in self._find_line_and_position(old, PEER_CHANNEL):
-            self._calls_per_line[line][position][PEER_CHANNEL] = new
+        for line, call in self._find_calls(old, PEER_CHANNEL):
+            self._set_call_field(line, call, PEER_CHANNEL, new)
 
     def _remove_calls_with_line_channel(self, channel):
-        to_remove = []
-
-        for line, position in self._find_line_and_position(channel, LINE_CHANNEL):
-            self._calls_per_line[line].pop(position)
-
-            if not self._calls_per_line[line]:
-                to_remove.append(line)
+        for line, call in self._find_calls(channel, LINE_CHANNEL):
+            self._remove_call(line, call)
 
-        for line in to_remove:
-            self._calls_per_line.pop(line)
-
-    def _find_line_and_position(self, channel, field=PEER_CHANNEL):
-        for line, calls in self._calls_per_line.iteritems():
-            for index, call in enumerate(calls):
-                if field in call and call[field] == channel:
-                    yield line, index
+    def _find_calls(self, channel, field=PEER_CHANNEL):
+        return self._calls_by_channel[field].get(channel, {}).values()
 
     def end_call(self, channel):
-        to_remove = []
-        for line, calls in self._calls_per_line.iteritems():
-            for call in calls:
-                if call[PEER_CHANNEL] == channel or call[LINE_CHANNEL] == channel:
-                    to_remove.append((line, call[PEER_CHANNEL]))
+        to_remove = set()
+        for field in [PEER_CHANNEL, LINE_CHANNEL]:
+            for line, call in self._find_calls(channel, field):
+                to_remove.add((line, call[PEER_CHANNEL]))
 
         for line, channel in to_remove:
             self._remove_peer_channel(line, channel)
@@ -132,8 +123,8 @@ class CurrentCallManager(object):
             self._current_call_notifier.publish_current_call(line)
 
     def remove_transfer_channel(self, channel):
-        for line, position in self._find_line_and_position(channel, TRANSFER_CHANNEL):
-            self._calls_per_line[line][position].pop(TRANSFER_CHANNEL)
+        for line, call in self._find_calls(channel, TRANSFER_CHANNEL):
+            self._set_call_field(line, call, TRANSFER_CHANNEL, None)
             self._current_call_notifier.publish_current_call(line)
 
     def set_transfer_channel(self, channel, transfer_channel):
@@ -145,21 +136,46 @@ class CurrentCallManager(object):
         for call in self._calls_per_line[line]:
             if call[LINE_CHANNEL] != channel:
                 continue
-            call[TRANSFER_CHANNEL] = transfer_channel
+            self._set_call_field(line, call, TRANSFER_CHANNEL, transfer_channel)
 
     def _remove_peer_channel(self, line, peer_channel):
-        to_be_removed = []
+        for call_line, call in self._find_calls(peer_channel):
+            if call_line == line:
+                self._remove_call(line, call)
 
-        for position, call_status in enumerate(self._calls_per_line[line]):
-            if call_status[PEER_CHANNEL] != peer_channel:
-                continue
-            to_be_removed.append(position)
+    def _index_call(self, line, call):
+        self._calls_per_line.setdefault(line, []).append(call)
+        for field in INDEXED_FIELDS:
+            if field in call:
+                self._index_call_field(line, call, field)
 
-        for position in to_be_removed:
-            self._calls_per_line[line].pop(position)
-
-        if not self._calls_per_line[line]:
+    def _remove_call(self, line, call):
+        line_calls = self._calls_per_line[line]
+        line_calls[:] = [line_call for line_call in line_calls if line_call is not call]
+        if not line_calls:
             self._calls_per_line.pop(line)
+        for field in INDEXED_FIELDS:
+            if field in call:
+                self._unindex_call_field(call, field)
+
+    def _set_call_field(self, line, call, field, channel):
+        # field is removed from the call when channel is None
+        if field in call:
+            self._unindex_call_field(call, field)
+        if channel is None:
+            call.pop(field, None)
+        else:
+            call[field] = channel
+            self._index_call_field(line, call, field)
+
+    def _index_call_field(self, line, call, field):
+        self._calls_by_channel[field].setdefault(call[field], {})[id(call)] = (line, call)
+
+    def _unindex_call_field(self, call, field):
+        calls = self._calls_by_channel[field].get(call[field], {})
+        calls.pop(id(call), None)
+        if not calls:
+            self._calls_by_channel[field].pop(call[field], None)
 
     def hold_channel(self, holded_channel):
         self._change_hold_status(holded_channel, True)
@@ -72,6 +72,11 @@ class _BaseTestCase(unittest.TestCase):
         self.channel_1 = 'SIP/tc8nb4-00000004'
         self.channel_2 = 'SIP/6s7foq-00000005'
 
+    def _set_calls_per_line(self, calls_per_line):
+        for line, calls in calls_per_line.iteritems():
+            for call in calls:
+                self.manager._index_call(line, call)
+
 
 class TestCurrentCallManager(_BaseTestCase):
 
@@ -118,7 +123,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  TRANSFER_CHANNEL: transferee_channel}
             ],
         }
-        self.manager._calls_per_line = calls_per_line
+        self._set_calls_per_line(calls_per_line)
 
         self.manager.bridge_channels(transferer_channel, transferee_channel)
 
@@ -141,7 +146,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  TRANSFER_CHANNEL: transferee_channel}
             ],
         }
-        self.manager._calls_per_line = calls_per_line
+        self._set_calls_per_line(calls_per_line)
 
         self.manager.bridge_channels(transferee_channel, transferer_channel)
 
@@ -166,7 +171,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  TRANSFER_CHANNEL: transferee_channel}
             ],
         }
-        self.manager._calls_per_line = calls_per_line
+        self._set_calls_per_line(calls_per_line)
 
         self.manager.bridge_channels(transferer_channel, transferee_channel)
 
@@ -182,7 +187,7 @@ class TestCurrentCallManager(_BaseTestCase):
         line_2_channel = u'Local/6000@pomme-00000022;1'
         local_line_1_channel = u'Local/6000@pomme-00000023;1'
 
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             local_line_1: [{BRIDGE_TIME: 1358197027.3219039,
                             PEER_CHANNEL: line_2_channel,
                             LINE_CHANNEL: local_line_1_channel,
@@ -198,7 +203,7 @@ class TestCurrentCallManager(_BaseTestCase):
             line_2: [{BRIDGE_TIME: 1358197027.3218949,
                       PEER_CHANNEL: local_line_1_channel,
                       LINE_CHANNEL: line_2_channel,
-                      ON_HOLD: False}]}
+                      ON_HOLD: False}]})
 
         self.manager.masquerade(local_line_1_channel, local_line_1_channel)
 
@@ -221,7 +226,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  ON_HOLD: False}
             ],
         }
-        self.manager._calls_per_line = calls_per_line
+        self._set_calls_per_line(calls_per_line)
 
         self.manager.bridge_channels(transferer_channel, transferee_channel)
 
@@ -238,7 +243,7 @@ class TestCurrentCallManager(_BaseTestCase):
         line_2_channel = u'SIP/pcm_dev-00000022'
         local_line_1_channel = u'Local/id-292@agentcallback-00000013;1'
 
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             local_line_1: [{BRIDGE_TIME: 1358197027.3219039,
                             PEER_CHANNEL: line_2_channel,
                             LINE_CHANNEL: local_line_1_channel,
@@ -254,7 +259,7 @@ class TestCurrentCallManager(_BaseTestCase):
             line_2: [{BRIDGE_TIME: 1358197027.3218949,
                       PEER_CHANNEL: local_line_1_channel,
                       LINE_CHANNEL: line_2_channel,
-                      ON_HOLD: False}]}
+                      ON_HOLD: False}]})
 
         self.manager.masquerade(local_line_1_channel, line_1_channel)
 
@@ -280,7 +285,7 @@ class TestCurrentCallManager(_BaseTestCase):
     def test_bridge_channels_on_hold(self):
         bridge_time = 123456.44
 
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  BRIDGE_TIME: bridge_time,
@@ -291,7 +296,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: bridge_time,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         self.manager.bridge_channels(self.channel_1, self.channel_2)
 
@@ -314,7 +319,7 @@ class TestCurrentCallManager(_BaseTestCase):
     def test_end_call(self):
         bridge_time = 123456.44
 
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: 'SIP/mytrunk-12345',
                  LINE_CHANNEL: 'SIP/tc8nb4-000002',
@@ -331,7 +336,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: bridge_time,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         self.manager.end_call(self.channel_1)
 
@@ -348,12 +353,54 @@ class TestCurrentCallManager(_BaseTestCase):
         calls = self._get_notifier_calls()
         assert_that(calls, only_contains(self.line_1, self.line_2))
 
+    def test_end_call_of_a_substituted_peer_channel(self):
+        new_channel = 'SIP/mytrunk-12345'
+        self._set_calls_per_line({
+            self.line_1: [
+                {PEER_CHANNEL: self.channel_2,
+                 LINE_CHANNEL: self.channel_1,
+                 BRIDGE_TIME: 1234,
+                 ON_HOLD: False},
+            ],
+            self.line_2: [
+                {PEER_CHANNEL: self.channel_1,
+                 LINE_CHANNEL: self.channel_2,
+                 BRIDGE_TIME: 1234,
+                 ON_HOLD: False}
+            ],
+        })
+
+        self.manager._execute_masquerade(self.channel_2, new_channel)
+        self.manager.end_call(new_channel)
+
+        self.assertEqual(self.manager._calls_per_line, {})
+        self.assertEqual(self.manager._calls_by_channel, {PEER_CHANNEL: {}, LINE_CHANNEL: {}, TRANSFER_CHANNEL: {}})
+
+    def test_end_call_of_a_line_with_a_transfer(self):
+        transfer_channel = u'Local/1003@pcm-dev-00000021;1'
+        self._set_calls_per_line({
+            self.line_1: [
+                {PEER_CHANNEL: self.channel_2,
+                 LINE_CHANNEL: self.channel_1,
+                 BRIDGE_TIME: 1234,
+                 ON_HOLD: False,
+                 TRANSFER_CHANNEL: transfer_channel},
+            ],
+        })
+
+        self.manager.end_call(self.channel_1)
+        self.manager.remove_transfer_channel(transfer_channel)
+
+        self.assertEqual(self.manager._calls_per_line, {})
+        self.assertEqual(self.manager._calls_by_channel, {PEER_CHANNEL: {}, LINE_CHANNEL: {}, TRANSFER_CHANNEL: {}})
+        self.notifier.publish_current_call.assert_called_once_with(self.line_1)
+
     def test_remove_transfer_channel(self):
         line = u'SIP/6s7foq'.lower()
         channel = u'%s-0000007b' % line
         transfer_channel = u'Local/1003@pcm-dev-00000021;1'
 
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             line: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: channel,
@@ -361,7 +408,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  ON_HOLD: False,
                  TRANSFER_CHANNEL: transfer_channel}
             ],
-        }
+        })
         expected_calls_per_line = {
             line: [
                 {PEER_CHANNEL: self.channel_2,
@@ -382,19 +429,19 @@ class TestCurrentCallManager(_BaseTestCase):
         channel = u'%s-0000007b' % line
         transfer_channel = u'Local/1003@pcm-dev-00000021;1'
 
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             line: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: channel,
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         self.manager.remove_transfer_channel(transfer_channel)
 
     def test_hold_channel(self):
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  BRIDGE_TIME: 1234,
@@ -405,7 +452,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         self.manager.hold_channel(self.channel_2)
 
@@ -429,7 +476,7 @@ class TestCurrentCallManager(_BaseTestCase):
         self.manager.hold_channel(self.channel_2)
 
     def test_unhold_channel(self):
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  BRIDGE_TIME: 1234,
@@ -440,7 +487,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         self.manager.unhold_channel(self.channel_2)
 
@@ -464,7 +511,7 @@ class TestCurrentCallManager(_BaseTestCase):
         self.manager.unhold_channel(self.channel_2)
 
     def test_get_line_calls(self):
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  BRIDGE_TIME: 1234,
@@ -475,7 +522,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         calls = self.manager.get_line_calls(self.line_1)
 
@@ -484,7 +531,7 @@ class TestCurrentCallManager(_BaseTestCase):
     def test_get_line_calls_no_line(self):
         channel_1 = 'SIP/tc8nb4-00000004'
         channel_2 = 'SIP/6s7foq-00000005'
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: channel_2,
                  BRIDGE_TIME: 1234,
@@ -495,7 +542,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         calls = self.manager.get_line_calls('SCCP/654')
 
@@ -504,7 +551,7 @@ class TestCurrentCallManager(_BaseTestCase):
     @patch('xivo_dao.user_line_dao.get_line_identity_by_user_id')
     def test_complete_transfer(self, mock_get_line_identity):
         user_id = 5
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: self.channel_1,
@@ -517,7 +564,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
         mock_get_line_identity.return_value = self.line_1
 
         self.manager.complete_transfer(user_id)
@@ -527,7 +574,7 @@ class TestCurrentCallManager(_BaseTestCase):
     @patch('xivo_dao.user_line_dao.get_line_identity_by_user_id')
     def test_complete_transfer_no_transfer_target_channel(self, mock_get_line_identity):
         user_id = 5
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: self.channel_1,
@@ -540,7 +587,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
         mock_get_line_identity.return_value = self.line_1
 
         self.manager.complete_transfer(user_id)
@@ -550,10 +597,10 @@ class TestCurrentCallManager(_BaseTestCase):
     @patch('xivo_dao.user_line_dao.get_line_identity_by_user_id')
     def test_complete_transfer_no_call(self, mock_get_line_identity):
         user_id = 5
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
             ],
-        }
+        })
         mock_get_line_identity.return_value = self.line_1
 
         self.manager.complete_transfer(user_id)
@@ -563,7 +610,7 @@ class TestCurrentCallManager(_BaseTestCase):
         user_id = 5
         number = '1234'
         line_context = 'ctx'
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: self.channel_1,
@@ -576,7 +623,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
         mock_get_line_identity.return_value = self.line_1
         dao.user = Mock(user_dao.UserDAO)
         dao.user.get_context.return_value = line_context
@@ -591,7 +638,7 @@ class TestCurrentCallManager(_BaseTestCase):
         user_id = 5
         number = '9876'
         line_context = 'mycontext'
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: self.channel_1,
@@ -604,7 +651,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
         mock_get_line_identity.return_value = self.line_1
         dao.user = Mock(user_dao.UserDAO)
         dao.user.get_context.return_value = line_context
@@ -622,7 +669,7 @@ class TestCurrentCallManager(_BaseTestCase):
         user_id = 7
         mock_get_line_identity.return_value = self.line_2
 
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: self.channel_1,
@@ -635,7 +682,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         self.manager.switchboard_hold(user_id, queue_name)
 
@@ -681,14 +728,14 @@ class TestCurrentCallManager(_BaseTestCase):
         channel_to_intercept = 'SIP/acbdf-348734'
         cid_name, cid_number = 'Alice', '5565'
         client_connection = Mock(CTI)
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             user_line: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: talking_channel,
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         dao.channel = Mock(channel_dao.ChannelDAO)
         dao.channel.get_channel_from_unique_id.return_value = channel_to_intercept
@@ -723,14 +770,14 @@ class TestCurrentCallManager(_BaseTestCase):
         channel = u'%s-0000007b' % line
         transfer_channel = u'Local/1003@pcm-dev-00000021;1'
 
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             line: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: channel,
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
 
         self.manager.set_transfer_channel(channel, transfer_channel)
 
@@ -752,7 +799,7 @@ class TestCurrentCallManager(_BaseTestCase):
         transfer_channel = local_transfer_channel + u'1'
         transfered_channel = local_transfer_channel + u'2'
         user_id = 5
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: self.channel_1,
@@ -766,7 +813,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
         mock_get_line_identity.return_value = self.line_1
 
         self.manager.cancel_transfer(user_id)
@@ -776,7 +823,7 @@ class TestCurrentCallManager(_BaseTestCase):
     @patch('xivo_dao.user_line_dao.get_line_identity_by_user_id')
     def test_cancel_transfer_wrong_number(self, mock_get_line_identity):
         user_id = 5
-        self.manager._calls_per_line = {
+        self._set_calls_per_line({
             self.line_1: [
                 {PEER_CHANNEL: self.channel_2,
                  LINE_CHANNEL: self.channel_1,
@@ -789,7 +836,7 @@ class TestCurrentCallManager(_BaseTestCase):
                  BRIDGE_TIME: 1234,
                  ON_HOLD: False}
             ],
-        }
+        })
         mock_get_line_identity.return_value = self.line_1
 
         self.manager.cancel_transfer(user_id)
@@ -91,6 +91,7 @@ class MeetmeServiceManager(object):
         self.notifier = meetme_service_notifier
         self.ami = ami_class
         self._cache = {}
+        self._restored_start_times = {}
 
     def initialize(self):
         old_cache = deepcopy(self._cache)
@@ -103,6 +104,18 @@ class MeetmeServiceManager(object):
                 self._cache[room]['members'] = old_cache[room]['members']
         self._publish_change()
 
+    def get_room_states(self):
+        return dict((number, {'start_time': room['start_time']})
+                    for number, room in self._cache.iteritems()
+                    if room['members'] and room['start_time'] > 0)
+
+    def restore_room_states(self, room_states):
+        # the members are rebuilt from the MeetmeList events, only the start
+        # time of the rooms that are still in use is taken from the snapshot
+        self._restored_start_times = dict((number, room_state['start_time'])
+                                          for number, room_state in room_states.iteritems()
+                                          if room_state['start_time'] > 0)
+
     def invite(self, inviter_id, invitee_xid):
         invitee_id = IdConverter.xid_to_id(invitee_xid)
         invitee_line_iface = dao.user.get_line_identity(invitee_id)
@@ -137,6 +150,7 @@ class MeetmeServiceManager(object):
         self._set_room_config(conf_number)
         if not self._has_members(conf_number):
             self._cache[conf_number]['start_time'] = time.time()
+            self._restored_start_times.pop(conf_number, None)
         self._cache[conf_number]['members'][join_seq_number] = member_status
         self._publish_change()
 
@@ -171,7 +185,7 @@ class MeetmeServiceManager(object):
         member_status = _build_member_status(join_seq, cid_name, cid_num, channel, is_muted)
         self._set_room_config(conf_number)
         if 'start_time' not in self._cache[conf_number] or self._cache[conf_number]['start_time'] == 0:
-            self._cache[conf_number]['start_time'] = -1
+            self._cache[conf_number]['start_time'] = self._restored_start_times.pop(conf_number, -1)
         if not self._has_member(conf_number, join_seq, cid_name, cid_num):
             self._cache[conf_number]['members'][join_seq] = member_status
         self._publish_change()
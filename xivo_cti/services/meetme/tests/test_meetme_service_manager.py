@@ -456,6 +456,30 @@ class TestMeetmeServiceManager(unittest.TestCase):
 
         self.assertEqual(self.manager._cache, expected)
 
+    def test_get_room_states(self):
+        self.manager._add_room('Conference1', '9000', True, 'ctx')
+        self.manager._add_room('Conference2', '9001', False, 'ctx')
+        self.manager._cache['9000']['start_time'] = 1234.1235
+        self.manager._cache['9000']['members'] = {1: {'join_order': 1}}
+
+        room_states = self.manager.get_room_states()
+
+        self.assertEqual(room_states, {'9000': {'start_time': 1234.1235}})
+
+    def test_restore_room_states(self):
+        self.manager._add_room('Conference1', '9000', True, 'ctx')
+
+        self.manager.restore_room_states({'9000': {'start_time': 1234.1235},
+                                          '9001': {'start_time': 1234.5}})
+
+        self.assertEqual(self.manager._cache['9000']['members'], {})
+        self.assertEqual(self.manager._cache['9000']['start_time'], 0)
+
+        self.manager.refresh('SIP/abc-00000001', '9000', 1, 'Tester 1', '1002', False)
+
+        self.assertEqual(self.manager._cache['9000']['start_time'], 1234.1235)
+        self.assertEqual(self.manager._cache['9000']['members'].keys(), [1])
+
     @patch('xivo_dao.meetme_dao.get_configs')
     def test_initialize_configs_with_members(self, mock_get_configs):
         mock_get_configs.return_value = [('Conference2', '9001', False, 'test'),
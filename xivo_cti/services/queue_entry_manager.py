@@ -105,12 +105,12 @@ class QueueEntryManager(object):
                  queue_entry_notifier,
                  queue_entry_encoder,
                  statistics_notifier,
-                 ami_class):
+                 ami_action_tracker):
         self._queue_entries = {}
         self._notifier = queue_entry_notifier
         self._encoder = queue_entry_encoder
         self._statistics_notifier = statistics_notifier
-        self._ami = ami_class
+        self._ami_action_tracker = ami_action_tracker
 
     def join(self, queue_name, pos, count, name, number, unique_id):
         if not dao.queue.exists(queue_name):
@@ -153,10 +153,21 @@ class QueueEntryManager(object):
     def synchronize(self, queue_name=None):
         logger.info('Synchronizing QueueEntries on %s',
                     (queue_name if queue_name else 'all queues'))
-        if self._ami != None:
-            self._ami.sendqueuestatus(queue_name)
-        else:
-            logger.warning('QueueEntryManager cannot contact any AMI instance')
+        args = [('Queue', queue_name)] if queue_name else []
+        pending_action = self._ami_action_tracker.send('QueueStatus', args,
+                                                       complete_event='QueueStatusComplete')
+        pending_action.add_callback(lambda action: self._on_synchronized(queue_name, action))
+
+    def _on_synchronized(self, queue_name, pending_action):
+        # the entries are published by the QueueStatusComplete callback
+        if not pending_action.succeeded():
+            logger.warning('Failed to synchronize QueueEntries on %s: %s',
+                           queue_name if queue_name else 'all queues', pending_action.error_message())
+            return
+        queue_names = [queue_name] if queue_name else self._queue_entries.keys()
+        for name in queue_names:
+            if name in self._queue_entries:
+                self.publish_realtime_stats(name)
 
     def clear_data(self, queue_name):
         self._queue_entries.pop(queue_name, None)
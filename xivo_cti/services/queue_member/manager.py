@@ -26,6 +26,9 @@ class QueueMemberManager(object):
     def __init__(self, queue_member_notifier):
         self._queue_member_notifier = queue_member_notifier
         self._queue_members_by_id = {}
+        self._queue_members_by_member_name = {}
+        self._queue_members_by_queue_name = {}
+        self._paused_count_by_member_name = {}
 
     def get_queue_member(self, queue_member_id):
         return self._queue_members_by_id.get(queue_member_id)
@@ -45,20 +48,16 @@ class QueueMemberManager(object):
         return self.get_queue_members_by_member_name(member_name)
 
     def get_queue_members_by_member_name(self, member_name):
-        return [queue_member for
-                queue_member in self._queue_members_by_id.itervalues() if
-                queue_member.member_name == member_name]
+        return self._queue_members_by_member_name.get(member_name, {}).values()
+
+    def get_queue_members_by_queue_name(self, queue_name):
+        return self._queue_members_by_queue_name.get(queue_name, {}).values()
 
     def get_paused_count_by_member_name(self, member_name):
-        paused_count = 0
-        for queue_member in self.get_queue_members_by_member_name(member_name):
-            if queue_member.state.paused:
-                paused_count += 1
-        return paused_count
+        return self._paused_count_by_member_name.get(member_name, 0)
 
     def get_queue_count_by_member_name(self, member_name):
-        queue_count = len(self.get_queue_members_by_member_name(member_name))
-        return queue_count
+        return len(self._queue_members_by_member_name.get(member_name, {}))
 
     # package private method
     def _add_queue_member(self, queue_member):
@@ -67,6 +66,7 @@ class QueueMemberManager(object):
                            queue_member.id)
         else:
             self._queue_members_by_id[queue_member.id] = queue_member
+            self._index_queue_member(queue_member)
             self._queue_member_notifier._on_queue_member_added(queue_member)
 
     # package private method
@@ -76,6 +76,7 @@ class QueueMemberManager(object):
             logger.debug('not updating queue member %r: already up to date',
                          queue_member.id)
         else:
+            self._update_paused_count(queue_member.member_name, old_state.paused, new_state.paused)
             queue_member.state = new_state
             self._queue_member_notifier._on_queue_member_updated(queue_member)
 
@@ -86,6 +87,7 @@ class QueueMemberManager(object):
                            queue_member.id)
         else:
             del self._queue_members_by_id[queue_member.id]
+            self._unindex_queue_member(queue_member)
             self._queue_member_notifier._on_queue_member_removed(queue_member)
 
     # package private method
@@ -102,4 +104,33 @@ class QueueMemberManager(object):
                            queue_member_id)
         else:
             del self._queue_members_by_id[queue_member.id]
+            self._unindex_queue_member(queue_member)
             self._queue_member_notifier._on_queue_member_removed(queue_member)
+
+    def _index_queue_member(self, queue_member):
+        self._queue_members_by_member_name.setdefault(queue_member.member_name, {})[queue_member.id] = queue_member
+        self._queue_members_by_queue_name.setdefault(queue_member.queue_name, {})[queue_member.id] = queue_member
+        self._update_paused_count(queue_member.member_name, False, queue_member.state.paused)
+
+    def _unindex_queue_member(self, queue_member):
+        _discard(self._queue_members_by_member_name, queue_member.member_name, queue_member.id)
+        _discard(self._queue_members_by_queue_name, queue_member.queue_name, queue_member.id)
+        self._update_paused_count(queue_member.member_name, queue_member.state.paused, False)
+
+    def _update_paused_count(self, member_name, old_paused, new_paused):
+        if bool(old_paused) == bool(new_paused):
+            return
+        paused_count = self._paused_count_by_member_name.get(member_name, 0) + (1 if new_paused else -1)
+        if paused_count:
+            self._paused_count_by_member_name[member_name] = paused_count
+        else:
+            self._paused_count_by_member_name.pop(member_name, None)
+
+
+def _discard(index, name, queue_member_id):
+    queue_members = index.get(name)
+    if queue_members is None:
+        return
+    queue_members.pop(queue_member_id, None)
+    if not queue_members:
+        del index[name]
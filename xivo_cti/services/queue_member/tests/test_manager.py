@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from hamcrest import assert_that, contains_inanyorder, equal_to
+from mock import Mock
+from xivo_cti.services.queue_member.manager import QueueMemberManager
+from xivo_cti.services.queue_member.member import QueueMember
+from xivo_cti.services.queue_member.member import QueueMemberState
+from xivo_cti.services.queue_member.notifier import QueueMemberNotifier
+
+
+class TestQueueMemberManager(unittest.TestCase):
+
+    def setUp(self):
+        self.queue_member_notifier = Mock(QueueMemberNotifier)
+        self.queue_member_manager = QueueMemberManager(self.queue_member_notifier)
+        self.member_name = 'Agent/1234'
+
+    def _add_queue_member(self, queue_name, member_name, paused=False):
+        state = QueueMemberState()
+        state.paused = paused
+        queue_member = QueueMember(queue_name, member_name, state)
+        self.queue_member_manager._add_queue_member(queue_member)
+        return queue_member
+
+    def _new_state(self, paused):
+        state = QueueMemberState()
+        state.paused = paused
+        return state
+
+    def test_get_queue_members_by_member_name(self):
+        queue_member1 = self._add_queue_member('queue1', self.member_name)
+        queue_member2 = self._add_queue_member('queue2', self.member_name)
+        self._add_queue_member('queue1', 'SIP/abc')
+
+        result = self.queue_member_manager.get_queue_members_by_member_name(self.member_name)
+
+        assert_that(result, contains_inanyorder(queue_member1, queue_member2))
+
+    def test_get_queue_members_by_queue_name(self):
+        queue_member1 = self._add_queue_member('queue1', self.member_name)
+        queue_member2 = self._add_queue_member('queue1', 'SIP/abc')
+        self._add_queue_member('queue2', self.member_name)
+
+        result = self.queue_member_manager.get_queue_members_by_queue_name('queue1')
+
+        assert_that(result, contains_inanyorder(queue_member1, queue_member2))
+
+    def test_get_queue_count_by_member_name(self):
+        self._add_queue_member('queue1', self.member_name)
+        self._add_queue_member('queue2', self.member_name)
+        self.queue_member_manager._remove_queue_member_by_agent_number('queue1', '1234')
+
+        result = self.queue_member_manager.get_queue_count_by_member_name(self.member_name)
+
+        assert_that(result, equal_to(1))
+
+    def test_get_queue_count_by_member_name_unknown_member(self):
+        result = self.queue_member_manager.get_queue_count_by_member_name(self.member_name)
+
+        assert_that(result, equal_to(0))
+
+    def test_get_paused_count_by_member_name(self):
+        self._add_queue_member('queue1', self.member_name, paused=True)
+        queue_member2 = self._add_queue_member('queue2', self.member_name)
+        queue_member3 = self._add_queue_member('queue3', self.member_name, paused=True)
+
+        self.queue_member_manager._update_queue_member(queue_member2, self._new_state(paused=True))
+        self.queue_member_manager._update_queue_member(queue_member3, self._new_state(paused=False))
+
+        result = self.queue_member_manager.get_paused_count_by_member_name(self.member_name)
+
+        assert_that(result, equal_to(2))
+
+    def test_get_paused_count_by_member_name_after_remove(self):
+        queue_member = self._add_queue_member('queue1', self.member_name, paused=True)
+
+        self.queue_member_manager._remove_queue_member_by_id(queue_member.id)
+
+        result = self.queue_member_manager.get_paused_count_by_member_name(self.member_name)
+
+        assert_that(result, equal_to(0))
+        assert_that(self.queue_member_manager.get_queue_members_by_member_name(self.member_name), equal_to([]))
+        assert_that(self.queue_member_manager.get_queue_members_by_queue_name('queue1'), equal_to([]))
+
+    def test_remove_unknown_queue_member(self):
+        queue_member = QueueMember('queue1', self.member_name, QueueMemberState())
+
+        self.queue_member_manager._remove_queue_member(queue_member)
+
+        assert_that(self.queue_member_manager.get_queue_count_by_member_name(self.member_name), equal_to(0))
+        self.assertFalse(self.queue_member_notifier._on_queue_member_removed.called)
@@ -60,6 +60,18 @@ class TestQueueMemberUpdater(unittest.TestCase):
 
         self.assertFalse(self.ami_class.called)
 
+    def test_on_initialization_from_snapshot(self):
+        state = QueueMemberState()
+        state.status = '1'
+
+        self.queue_member_updater.on_initialization_from_snapshot([('queue1', 'Agent/1', state)])
+
+        queue_member = self.queue_member_manager._add_queue_member.call_args[0][0]
+        assert_that(queue_member.queue_name, equal_to('queue1'))
+        assert_that(queue_member.member_name, equal_to('Agent/1'))
+        assert_that(queue_member.state, equal_to(state))
+        self.assertFalse(self.ami_class.queuestatus.called)
+
     @patch('xivo_cti.services.queue_member.member.QueueMember.from_ami_agent_added_to_queue')
     def test_on_ami_agent_added_to_queue(self, from_ami_agent_added_to_queue):
         ami_event = {'QueueName': 'queue1', 'AgentNumber': '123'}
@@ -34,6 +34,11 @@ class QueueMemberUpdater(object):
         # we need to request QueueStatus of all asterisk queue members but this
         # is actually done in the AMIInitializer class
 
+    def on_initialization_from_snapshot(self, queue_members):
+        for queue_name, member_name, state in queue_members:
+            queue_member = QueueMember(queue_name, member_name, state)
+            self._queue_member_manager._add_queue_member(queue_member)
+
     def _add_dao_queue_members_on_init(self):
         for dao_queue_member in queue_member_dao.get_queue_members_for_queues():
             queue_member = QueueMember.from_dao_queue_member(dao_queue_member)
@@ -27,7 +27,8 @@ from xivo_cti.services import queue_entry_manager
 from xivo_cti.services.queue_entry_notifier import QueueEntryNotifier
 from xivo_cti.services.queue_entry_encoder import QueueEntryEncoder
 from xivo_cti.statistics.statistics_notifier import StatisticsNotifier
-from xivo_cti.xivo_ami import AMIClass
+from xivo_cti.ami.action_tracker import AMIActionTracker
+from xivo_cti.ami.action_tracker import PendingAction
 
 QUEUE_NAME = 'testqueue'
 QUEUE_ID = 77
@@ -97,11 +98,11 @@ class TestQueueEntryManager(unittest.TestCase):
         self.encoder = Mock(QueueEntryEncoder)
         self.notifier = Mock(QueueEntryNotifier)
         self.statistics_notifier = Mock(StatisticsNotifier)
-        ami_class = Mock(AMIClass)
+        self.ami_action_tracker = Mock(AMIActionTracker)
         self.manager = QueueEntryManager(self.notifier,
                                          self.encoder,
                                          self.statistics_notifier,
-                                         ami_class)
+                                         self.ami_action_tracker)
 
     def tearDown(self):
         QueueEntryManager._instance = None
@@ -315,23 +316,39 @@ class TestQueueEntryManager(unittest.TestCase):
         self.manager.clear_data.assert_called_once_with(QUEUE_NAME)
 
     def test_synchronize_queue_all(self):
-        ami_class = Mock(AMIClass)
-        self.manager._ami = ami_class
-
         self.manager.synchronize()
 
-        self.assertTrue(ami_class.sendqueuestatus.called)
-
-        self.manager._ami = None
+        self.ami_action_tracker.send.assert_called_once_with('QueueStatus', [],
+                                                             complete_event='QueueStatusComplete')
 
     def test_synchronize_queue(self):
-        ami_class = Mock()
+        self.manager.synchronize(QUEUE_NAME)
+
+        self.ami_action_tracker.send.assert_called_once_with('QueueStatus', [('Queue', QUEUE_NAME)],
+                                                             complete_event='QueueStatusComplete')
+
+    def test_synchronize_queue_publishes_the_stats_when_complete(self):
+        pending_action = PendingAction('cti-1-1', 'QueueStatusComplete')
+        self.ami_action_tracker.send.return_value = pending_action
+        self.manager._queue_entries[QUEUE_NAME] = {}
+        self.manager.publish_realtime_stats = Mock()
+
+        self.manager.synchronize(QUEUE_NAME)
+        self.assertFalse(self.manager.publish_realtime_stats.called)
+        pending_action._resolve(PendingAction.SUCCESS)
 
-        self.manager._ami = ami_class
+        self.manager.publish_realtime_stats.assert_called_once_with(QUEUE_NAME)
+
+    def test_synchronize_queue_timeout(self):
+        pending_action = PendingAction('cti-1-1', 'QueueStatusComplete')
+        self.ami_action_tracker.send.return_value = pending_action
+        self.manager._queue_entries[QUEUE_NAME] = {}
+        self.manager.publish_realtime_stats = Mock()
 
         self.manager.synchronize(QUEUE_NAME)
+        pending_action._resolve(PendingAction.TIMEOUT)
 
-        ami_class.sendqueuestatus.assert_called_once_with(QUEUE_NAME)
+        self.assertFalse(self.manager.publish_realtime_stats.called)
 
     @patch('xivo_dao.queue_dao.id_from_name', Mock())
     @patch('xivo_dao.queue_dao.queue_name', Mock())
@@ -19,7 +19,6 @@ import logging
 
 from functools import partial
 
-from xivo_cti.ami.ami_response_handler import AMIResponseHandler
 from xivo_dao import user_dao
 from xivo_dao.data_handler.func_key import services as func_key_services
 from xivo_cti import dao
@@ -28,10 +27,6 @@ from xivo_cti.cti.cti_message_formatter import CTIMessageFormatter
 
 logger = logging.getLogger(__name__)
 
-RESPONSE = 'Response'
-SUCCESS = 'Success'
-MESSAGE = 'Message'
-
 
 class UserServiceManager(object):
 
@@ -43,7 +38,8 @@ class UserServiceManager(object):
                  device_manager,
                  ami_class,
                  ami_callback_handler,
-                 call_manager):
+                 call_manager,
+                 ami_action_tracker):
         self.user_service_notifier = user_service_notifier
         self.agent_service_manager = agent_service_manager
         self.presence_service_manager = presence_service_manager
@@ -53,6 +49,7 @@ class UserServiceManager(object):
         self.ami_class = ami_class
         self._ami_callback_handler = ami_callback_handler
         self._call_manager = call_manager
+        self._ami_action_tracker = ami_action_tracker
 
     def call_destination(self, client_connection, user_id, url_or_exten):
         if DestinationFactory.is_destination_url(url_or_exten):
@@ -175,15 +172,14 @@ class UserServiceManager(object):
 
     def _register_originate_response_callback(self, action_id, client_connection, user_id, exten):
         callback = partial(self._on_originate_response_callback, client_connection, user_id, exten)
-        AMIResponseHandler.get_instance().register_callback(action_id, callback)
+        self._ami_action_tracker.track(action_id).add_callback(callback)
 
-    def _on_originate_response_callback(self, client_connection, user_id, exten, result):
-        response = result.get(RESPONSE)
-        if response == SUCCESS:
+    def _on_originate_response_callback(self, client_connection, user_id, exten, pending_action):
+        if pending_action.succeeded():
             line = self.dao.user.get_line(user_id)
             self._on_originate_success(client_connection, exten, line)
         else:
-            self._on_originate_error(client_connection, user_id, exten, result.get(MESSAGE))
+            self._on_originate_error(client_connection, user_id, exten, pending_action.error_message())
 
     def _on_originate_success(self, client_connection, exten, line):
         interface = '%(protocol)s/%(name)s' % line
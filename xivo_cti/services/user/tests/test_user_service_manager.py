@@ -38,7 +38,8 @@ from xivo_cti.services.device.manager import DeviceManager
 from xivo_cti.dao.user_dao import UserDAO
 from xivo_cti.xivo_ami import AMIClass
 from xivo_cti.interfaces.interface_cti import CTI
-from xivo_cti.ami.ami_response_handler import AMIResponseHandler
+from xivo_cti.ami.action_tracker import AMIActionTracker
+from xivo_cti.ami.action_tracker import PendingAction
 
 
 class _BaseTestCase(unittest.TestCase):
@@ -53,6 +54,7 @@ class _BaseTestCase(unittest.TestCase):
         self.ami_class = Mock(AMIClass)
         self._ami_cb_handler = Mock(AMICallbackHandler)
         self._call_manager = Mock(CallManager)
+        self._ami_action_tracker = AMIActionTracker(self.ami_class, Mock())
         self.user_service_manager = UserServiceManager(
             self.user_service_notifier,
             self.agent_service_manager,
@@ -62,6 +64,7 @@ class _BaseTestCase(unittest.TestCase):
             self.ami_class,
             self._ami_cb_handler,
             self._call_manager,
+            self._ami_action_tracker,
         )
         self.user_service_manager.presence_service_executor = self.presence_service_executor
         self.user_service_manager.dao.user = Mock(UserDAO)
@@ -104,18 +107,22 @@ class TestUserServiceManager(_BaseTestCase):
         action_id, user_id, exten = '8734534', '12', '324564'
         callback = Mock()
         self.user_service_manager._on_originate_response_callback = callback
-        response = {'ActionID': action_id}
+        response = {'ActionID': action_id, 'Response': 'Success'}
         connection = sentinel
 
         self.user_service_manager._register_originate_response_callback(action_id, connection, user_id, exten)
 
-        AMIResponseHandler.get_instance().handle_response(response)
-        callback.assert_called_once_with(connection, user_id, exten, response)
+        self._ami_action_tracker.handle_response(response)
+        pending_action = callback.call_args[0][3]
+        callback.assert_called_once_with(connection, user_id, exten, pending_action)
+        assert_that(pending_action.response, equal_to(response))
 
     def test_on_originate_response_callback_success(self):
         connection = Mock(CTI)
         connection.answer_cb = sentinel
-        response = {
+        pending_action = PendingAction('123423847')
+        pending_action.status = PendingAction.SUCCESS
+        pending_action.response = {
             'Response': 'Success',
             'ActionID': '123423847',
             'Message': 'Originate successfully queued',
@@ -124,7 +131,7 @@ class TestUserServiceManager(_BaseTestCase):
         self.user_service_manager.dao.user.get_line = Mock(return_value=sentinel.line)
 
         self.user_service_manager._on_originate_response_callback(
-            connection, sentinel.user_id, sentinel.exten, response,
+            connection, sentinel.user_id, sentinel.exten, pending_action,
         )
 
         self.user_service_manager._on_originate_success.assert_called_once_with(
@@ -135,17 +142,29 @@ class TestUserServiceManager(_BaseTestCase):
         exten = '543'
         msg = 'Extension does not exist.'
         connection = Mock(CTI)
-        response = {
+        pending_action = PendingAction('123456')
+        pending_action.status = PendingAction.ERROR
+        pending_action.response = {
             'Response': 'Error',
             'ActionID': '123456',
             'Message': msg,
         }
         self.user_service_manager._on_originate_error = Mock()
 
-        self.user_service_manager._on_originate_response_callback(connection, user_id, exten, response)
+        self.user_service_manager._on_originate_response_callback(connection, user_id, exten, pending_action)
 
         self.user_service_manager._on_originate_error.assert_called_once_with(connection, user_id, exten, msg)
 
+    def test_on_originate_response_callback_timeout(self):
+        connection = Mock(CTI)
+        pending_action = PendingAction('123456')
+        pending_action.status = PendingAction.TIMEOUT
+        self.user_service_manager._on_originate_error = Mock()
+
+        self.user_service_manager._on_originate_response_callback(connection, 1, '543', pending_action)
+
+        self.user_service_manager._on_originate_error.assert_called_once_with(connection, 1, '543', 'timeout')
+
     def test_on_originate_success(self):
         connection = Mock(CTI)
         line = {'protocol': 'SCCP', 'name': 'zzzz'}
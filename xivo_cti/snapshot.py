@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Snapshot of the state of the server, saved periodically and loaded on
+restart so the clients can be served before the lists are fetched from the
+database and the statuses are refreshed from the AMI.
+"""
+
+import cPickle
+import errno
+import logging
+import os
+import time
+
+logger = logging.getLogger('snapshot')
+
+SNAPSHOT_VERSION = 1
+
+_HEADER = 'xivo-ctid snapshot %d\n'
+
+
+class SnapshotStore(object):
+
+    def __init__(self, path):
+        self._path = path
+
+    def save(self, snapshot):
+        # written to a temporary file first so a crash never leaves a partial snapshot
+        tmp_path = '%s.tmp' % self._path
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER % SNAPSHOT_VERSION)
+            cPickle.dump(snapshot, f, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, self._path)
+
+    def load(self):
+        """
+        Returns the saved snapshot or None when there is no usable snapshot.
+        """
+        try:
+            with open(self._path, 'rb') as f:
+                header = f.readline()
+                if header != _HEADER % SNAPSHOT_VERSION:
+                    logger.info('Ignoring snapshot %s: unknown version %r', self._path, header.strip())
+                    return None
+                return cPickle.load(f)
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                logger.warning('Could not read snapshot %s: %s', self._path, e)
+            return None
+        except Exception:
+            logger.warning('Ignoring invalid snapshot %s', self._path, exc_info=True)
+            return None
+
+
+def take_snapshot(innerdata, queue_member_manager, meetme_service_manager):
+    return {
+        'time': time.time(),
+        'xod_config': dict((listname, config.keeplist) for listname, config in innerdata.xod_config.iteritems()),
+        'xod_status': innerdata.xod_status,
+        'queue_members': [(queue_member.queue_name, queue_member.member_name, queue_member.state)
+                          for queue_member in queue_member_manager.get_queue_members()],
+        'meetmes': meetme_service_manager.get_room_states(),
+    }
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import time
+
+
+class StartupProfile(object):
+    """
+    Measures the time spent in each phase of the startup.
+    """
+
+    def __init__(self):
+        self._start_time = self._last_time = time.time()
+        self._phases = []
+
+    def phase_done(self, name):
+        now = time.time()
+        self._phases.append((name, now - self._last_time))
+        self._last_time = now
+
+    def report(self):
+        total = self._last_time - self._start_time
+        lines = ['%-32s %8.3f s %5.1f%%' % (name, elapsed, 100 * elapsed / total if total else 0)
+                 for name, elapsed in self._phases]
+        lines.append('%-32s %8.3f s' % ('total', total))
+        return lines
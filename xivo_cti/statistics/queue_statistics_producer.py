@@ -48,11 +48,14 @@ def parse_queue_summary(queuesummary_event):
 
 class QueueStatisticsProducer(object):
 
-    def __init__(self, statistics_notifier):
+    def __init__(self, statistics_notifier, check_counters=False):
         self.notifier = statistics_notifier
         self.queues_of_agent = {}
         self.logged_agents = set()
         self.queues = set()
+        self.nb_of_logged_agents_by_queue = {}
+        # recount the logged agents on each notification to check the counters
+        self._check_counters = check_counters
 
     def on_queue_added(self, queueid):
         self.queues.add(queueid)
@@ -62,6 +65,7 @@ class QueueStatisticsProducer(object):
         self.queues.remove(queueid)
         for queues_of_current_agent in self.queues_of_agent.itervalues():
             queues_of_current_agent.discard(queueid)
+        self.nb_of_logged_agents_by_queue.pop(queueid, None)
 
     def on_queue_member_added(self, queue_member):
         if queue_member.is_agent():
@@ -72,7 +76,10 @@ class QueueStatisticsProducer(object):
     def _on_agent_added(self, queueid, agentid):
         if agentid not in self.queues_of_agent:
             self.queues_of_agent[agentid] = set()
-        self.queues_of_agent[agentid].add(queueid)
+        if queueid not in self.queues_of_agent[agentid]:
+            self.queues_of_agent[agentid].add(queueid)
+            if agentid in self.logged_agents:
+                self._update_nb_of_logged_agents(queueid, 1)
         self._notify_change(queueid)
 
     def on_queue_member_removed(self, queue_member):
@@ -84,28 +91,51 @@ class QueueStatisticsProducer(object):
     def _on_agent_removed(self, queueid, agentid):
         self.queues_of_agent[agentid].remove(queueid)
         if agentid in self.logged_agents:
+            self._update_nb_of_logged_agents(queueid, -1)
             self._notify_change(queueid)
         logger.debug('agent id %s removed from queue id %s', agentid, queueid)
 
     def on_agent_loggedon(self, agentid):
+        already_logged = agentid in self.logged_agents
         self.logged_agents.add(agentid)
         if agentid in self.queues_of_agent:
             for queueid in self.queues_of_agent[agentid]:
+                if not already_logged:
+                    self._update_nb_of_logged_agents(queueid, 1)
                 self._notify_change(queueid)
         else:
             self.queues_of_agent[agentid] = set()
 
     def on_agent_loggedoff(self, agentid):
+        was_logged = agentid in self.logged_agents
         self.logged_agents.discard(agentid)
         if agentid in self.queues_of_agent:
             for queueid in self.queues_of_agent[agentid]:
+                if was_logged:
+                    self._update_nb_of_logged_agents(queueid, -1)
                 self._notify_change(queueid)
 
     def on_queue_summary(self, queue_id, counters):
         message = {queue_id: {AVAILABLEAGENT_STATNAME: counters.available, EWT_STATNAME: counters.EWT, TALKINGAGENT_STATNAME: counters.Talking}}
         self.notifier.on_stat_changed(message)
 
+    def _update_nb_of_logged_agents(self, queueid, increment):
+        nb_of_agent_logged = self.nb_of_logged_agents_by_queue.get(queueid, 0) + increment
+        if nb_of_agent_logged:
+            self.nb_of_logged_agents_by_queue[queueid] = nb_of_agent_logged
+        else:
+            self.nb_of_logged_agents_by_queue.pop(queueid, None)
+
     def _compute_nb_of_logged_agents(self, queueid):
+        nb_of_agent_logged = self.nb_of_logged_agents_by_queue.get(queueid, 0)
+        if self._check_counters:
+            expected = self._count_logged_agents(queueid)
+            if nb_of_agent_logged != expected:
+                raise AssertionError('queue %s: %s logged agents counted, %s expected' %
+                                     (queueid, nb_of_agent_logged, expected))
+        return nb_of_agent_logged
+
+    def _count_logged_agents(self, queueid):
         nb_of_agent_logged = 0
         for agentid in self.logged_agents:
             if queueid in self.queues_of_agent[agentid]:
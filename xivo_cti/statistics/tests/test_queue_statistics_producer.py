@@ -48,7 +48,7 @@ class QueueStatBuilder(object):
 class TestQueueStatisticsProducer(unittest.TestCase):
 
     def setUp(self):
-        self.queue_statistics_producer = QueueStatisticsProducer(Mock(StatisticsNotifier))
+        self.queue_statistics_producer = QueueStatisticsProducer(Mock(StatisticsNotifier), check_counters=True)
         self.dependencies = {
             'queue_statistics_producer': self.queue_statistics_producer,
         }
@@ -372,6 +372,49 @@ class TestQueueStatisticsProducer(unittest.TestCase):
 
         mock_queue_dao.get_id_as_str_from_name.assert_called_once_with(queue_member.queue_name)
 
+    def test_log_agent_twice(self):
+        queueid = 32
+        agentid = 42
+        self._add_agent(queueid, agentid)
+        self._log_agent(agentid)
+
+        self.queue_statistics_producer.on_agent_loggedon(agentid)
+
+        self.queue_statistics_producer.notifier.on_stat_changed.assert_called_once_with(
+            _aQueueStat().in_queue(queueid).nb_of_logged_agents(1).build()
+        )
+
+    def test_add_logged_agent_twice_to_the_same_queue(self):
+        queueid = 32
+        agentid = 42
+        self._add_agent(queueid, agentid)
+        self._log_agent(agentid)
+
+        self.queue_statistics_producer._on_agent_added(queueid, agentid)
+
+        self.queue_statistics_producer.notifier.on_stat_changed.assert_called_once_with(
+            _aQueueStat().in_queue(queueid).nb_of_logged_agents(1).build()
+        )
+
+    def test_remove_queue_then_add_it_again(self):
+        queueid = 32
+        agentid = 42
+        self._add_agent(queueid, agentid)
+        self._log_agent(agentid)
+        self._remove_queue(queueid)
+
+        self._add_agent(queueid, agentid)
+
+        self.assertEqual(self.queue_statistics_producer._compute_nb_of_logged_agents(queueid), 1)
+
+    def test_check_counters(self):
+        queueid = 32
+        self._add_agent(queueid, 42)
+        self._log_agent(42)
+        self.queue_statistics_producer.nb_of_logged_agents_by_queue[queueid] = 2
+
+        self.assertRaises(AssertionError, self.queue_statistics_producer._compute_nb_of_logged_agents, queueid)
+
     def _log_agent(self, agentid):
         self.queue_statistics_producer.on_agent_loggedon(agentid)
         self.queue_statistics_producer.notifier.reset_mock()
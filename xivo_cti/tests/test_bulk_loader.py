@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from hamcrest import assert_that, equal_to
+from mock import Mock
+from xivo_cti import bulk_loader
+from xivo_cti.cti_anylist import AnyList
+
+
+class TestBulkLoader(unittest.TestCase):
+
+    def _new_list(self, keeplist):
+        anylist = Mock(AnyList)
+        anylist.fetch_data.return_value = keeplist
+        return anylist
+
+    def test_load_lists(self):
+        users = self._new_list({'1': {'firstname': 'Bob'}})
+        phones = self._new_list({'2': {'name': 'abc'}})
+
+        bulk_loader.load_lists({'users': users, 'phones': phones}, max_workers=2)
+
+        users.init_data.assert_called_once_with({'1': {'firstname': 'Bob'}})
+        phones.init_data.assert_called_once_with({'2': {'name': 'abc'}})
+
+    def test_load_lists_raises_the_errors_of_the_fetch(self):
+        users = self._new_list({})
+        phones = self._new_list({})
+        phones.fetch_data.side_effect = RuntimeError()
+
+        self.assertRaises(RuntimeError, bulk_loader.load_lists, {'users': users, 'phones': phones})
+
+    def test_load_no_lists(self):
+        bulk_loader.load_lists({})
+
+    def test_fetch(self):
+        anylist = self._new_list({'1': {}})
+
+        keeplist, _ = bulk_loader._fetch(anylist)
+
+        assert_that(keeplist, equal_to({'1': {}}))
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from hamcrest import assert_that, equal_to
+from xivo_cti.channel import Channel
+from xivo_cti.channel_store import ChannelStore
+
+
+class TestChannelStore(unittest.TestCase):
+
+    def setUp(self):
+        self.channels = ChannelStore()
+
+    def _add(self, name, unique_id):
+        channel = Channel(name, 'default', unique_id)
+        self.channels[name] = channel
+        return channel
+
+    def test_find_by_unique_id(self):
+        self._add('SIP/abc-00000001', '1234.1')
+
+        assert_that(self.channels.find_by_unique_id('1234.1'), equal_to('SIP/abc-00000001'))
+        assert_that(self.channels.find_by_unique_id('1234.2'), equal_to(None))
+
+    def test_find_by_identity(self):
+        self._add('SIP/abc-00000002', '1234.2')
+        self._add('SIP/abc-00000001', '1234.1')
+        self._add('SIP/abcd-00000003', '1234.3')
+
+        result = self.channels.find_by_identity('sip/abc')
+
+        assert_that(result, equal_to(['SIP/abc-00000001', 'SIP/abc-00000002']))
+
+    def test_find_by_relation(self):
+        channel = self._add('SIP/abc-00000001', '1234.1')
+
+        channel.addrelation('phone:1')
+        self.channels.reindex('SIP/abc-00000001')
+
+        assert_that(self.channels.find_by_relation('phone:1'), equal_to(['SIP/abc-00000001']))
+
+    def test_find_by_peer(self):
+        channel = self._add('SIP/abc-00000001', '1234.1')
+        self._add('SIP/def-00000002', '1234.2')
+
+        channel.peerchannel = 'SIP/def-00000002'
+        self.channels.reindex('SIP/abc-00000001')
+
+        assert_that(self.channels.find_by_peer('SIP/def-00000002'), equal_to(['SIP/abc-00000001']))
+
+    def test_delete(self):
+        channel = self._add('SIP/abc-00000001', '1234.1')
+        channel.addrelation('phone:1')
+        channel.peerchannel = 'SIP/def-00000002'
+        self.channels.reindex('SIP/abc-00000001')
+
+        del self.channels['SIP/abc-00000001']
+
+        assert_that(self.channels.find_by_unique_id('1234.1'), equal_to(None))
+        assert_that(self.channels.find_by_identity('sip/abc'), equal_to([]))
+        assert_that(self.channels.find_by_relation('phone:1'), equal_to([]))
+        assert_that(self.channels.find_by_peer('SIP/def-00000002'), equal_to([]))
+
+    def test_pop_and_rename(self):
+        channel = self._add('SIP/abc-00000001', '1234.1')
+
+        self.channels['SIP/abc-00000001<ZOMBIE>'] = self.channels.pop('SIP/abc-00000001')
+
+        assert_that(self.channels.pop('SIP/unknown', None), equal_to(None))
+        assert_that(self.channels.find_by_unique_id('1234.1'), equal_to('SIP/abc-00000001<ZOMBIE>'))
+        assert_that(self.channels['SIP/abc-00000001<ZOMBIE>'], equal_to(channel))
+
+    def test_replace(self):
+        self._add('SIP/abc-00000001', '1234.1')
+        self._add('SIP/abc-00000001', '1234.2')
+
+        assert_that(self.channels.find_by_unique_id('1234.1'), equal_to(None))
+        assert_that(self.channels.find_by_unique_id('1234.2'), equal_to('SIP/abc-00000001'))
+
+    def test_clear(self):
+        self._add('SIP/abc-00000001', '1234.1')
+
+        self.channels.clear()
+
+        assert_that(self.channels.find_by_unique_id('1234.1'), equal_to(None))
+        assert_that(len(self.channels), equal_to(0))
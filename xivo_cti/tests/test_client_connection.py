@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import errno
+import socket
+import unittest
+
+from mock import Mock
+from xivo_cti.client_connection import ClientConnection
+
+
+class TestClientConnection(unittest.TestCase):
+
+    def setUp(self):
+        self.sock = Mock(socket.socket)
+        self.observer = Mock()
+        self.connection = ClientConnection(self.sock)
+        self.connection.attach_observer(self.observer)
+
+    def test_append_queue_notifies_sending_once(self):
+        self.connection.append_queue('foo')
+        self.connection.append_queue('bar')
+
+        self.observer.assert_called_once_with(self.connection, ClientConnection.STATE_SENDING)
+
+    def test_append_queue_empty_data(self):
+        self.connection.append_queue('')
+
+        self.assertFalse(self.observer.called)
+
+    def test_process_sending_notifies_idle(self):
+        self.sock.send.side_effect = lambda data: len(data)
+        self.connection.append_queue('foo')
+        self.observer.reset_mock()
+
+        self.connection.process_sending()
+
+        self.observer.assert_called_once_with(self.connection, ClientConnection.STATE_IDLE)
+        self.assertFalse(self.connection.need_sending())
+
+    def test_process_sending_partial(self):
+        self.sock.send.side_effect = [1, socket.error(errno.EAGAIN, 'again')]
+        self.connection.append_queue('foo')
+        self.observer.reset_mock()
+
+        self.connection.process_sending()
+
+        self.assertFalse(self.observer.called)
+        self.assertTrue(self.connection.need_sending())
+
+        self.sock.send.side_effect = lambda data: len(data)
+        self.connection.process_sending()
+
+        self.assertEqual(str(self.sock.send.call_args[0][0]), 'oo')
+        self.assertFalse(self.connection.need_sending())
+
+    def test_process_sending_does_not_copy_big_messages(self):
+        data = 'x' * (ClientConnection.MAX_COALESCED_SIZE + 1)
+        self.sock.send.side_effect = lambda data: len(data)
+        self.connection.append_queue(data)
+        self.connection.append_queue('foo')
+
+        self.connection.process_sending()
+
+        self.assertTrue(self.sock.send.call_args_list[0][0][0] is data)
+        self.sock.send.assert_called_with('foo')
+
+    def test_process_sending_coalesces_small_messages(self):
+        self.sock.send.side_effect = lambda data: len(data)
+        self.connection.append_queue('foo')
+        self.connection.append_queue('bar')
+
+        self.connection.process_sending()
+
+        self.sock.send.assert_called_once_with('foobar')
+
+    def test_queued_bytes(self):
+        self.sock.send.side_effect = [2, socket.error(errno.EAGAIN, 'again')]
+        self.connection.append_queue('foo')
+        self.connection.append_queue('bar')
+
+        self.connection.process_sending()
+
+        self.assertEqual(self.connection.queued_bytes(), 4)
+
+    def test_drop_queue_keeps_partially_sent_data(self):
+        self.connection.MAX_COALESCED_SIZE = 0
+        self.sock.send.side_effect = [2, socket.error(errno.EAGAIN, 'again')]
+        self.connection.append_queue('foo')
+        self.connection.append_queue('bar')
+        self.connection.process_sending()
+
+        self.connection.drop_queue()
+
+        self.assertEqual(list(self.connection.sendqueue), ['foo'])
+        self.assertEqual(self.connection.queued_bytes(), 1)
+
+    def test_close_notifies_closed(self):
+        self.connection.close()
+        self.connection.close()
+
+        self.observer.assert_called_once_with(self.connection, ClientConnection.STATE_CLOSED)
+        self.sock.close.assert_called_once_with()
+
+    def test_detach_observer(self):
+        self.connection.detach_observer(self.observer)
+
+        self.connection.close()
+
+        self.assertFalse(self.observer.called)
+
+    def test_observers_are_notified_in_order(self):
+        calls = []
+        for i in range(5):
+            self.connection.attach_observer(lambda connection, state, i=i: calls.append(i))
+
+        self.connection.close()
+
+        self.assertEqual(calls, range(5))
+
+    def test_process_sending_notifies_sending_when_data_is_queued_on_idle(self):
+        self.sock.send.side_effect = lambda data: len(data)
+        self.connection.detach_observer(self.observer)
+        self.connection.attach_observer(self._flush_on_idle)
+        self.connection.attach_observer(self.observer)
+        self.connection.append_queue('foo')
+        self.observer.reset_mock()
+
+        self.connection.process_sending()
+
+        self.assertTrue(self.connection.need_sending())
+        self.assertEqual(self.observer.call_args_list[-1][0], (self.connection, ClientConnection.STATE_SENDING))
+
+    def _flush_on_idle(self, connection, state):
+        if state == ClientConnection.STATE_IDLE and connection.queued_bytes() == 0:
+            connection.append_queue('coalesced')
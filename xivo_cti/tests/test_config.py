@@ -17,6 +17,7 @@
 
 import unittest
 
+from xivo_cti import cti_config
 from xivo_cti.cti_config import _DbConfig as Config
 from mock import patch
 
@@ -132,3 +133,47 @@ class TestConfig(unittest.TestCase):
         mock_get_profiles_dao.assert_called_once_with()
 
         self.assertEquals(result, expected_result)
+
+
+@patch('xivo_cti.cti_config._DbConfig')
+class TestUpdateDbConfig(unittest.TestCase):
+
+    def setUp(self):
+        cti_config._db_config = {}
+        cti_config._db_config_hashes = {}
+
+    def tearDown(self):
+        cti_config._db_config = {}
+        cti_config._db_config_hashes = {}
+        cti_config._update_config()
+
+    def test_first_update_changes_every_section(self, db_config_class):
+        db_config_class.return_value.getconfig.return_value = {'displays': {'1': 'a'}, 'sheets': {}}
+
+        result = cti_config.update_db_config()
+
+        self.assertEqual(result, set(['displays', 'sheets']))
+
+    def test_only_changed_sections_are_returned(self, db_config_class):
+        db_config_class.return_value.getconfig.return_value = {'displays': {'1': 'a', '2': 'b'},
+                                                               'sheets': {'x': 1},
+                                                               'profiles': {}}
+        cti_config.update_db_config()
+        db_config_class.return_value.getconfig.return_value = {'displays': {'2': 'b', '1': 'a'},
+                                                               'sheets': {'x': 2}}
+
+        result = cti_config.update_db_config()
+
+        self.assertEqual(result, set(['sheets', 'profiles']))
+        self.assertEqual(cti_config._db_config['sheets'], {'x': 2})
+
+    def test_unchanged_config_is_kept(self, db_config_class):
+        db_config_class.return_value.getconfig.return_value = {'displays': {'1': 'a'}}
+        cti_config.update_db_config()
+        db_config = cti_config._db_config
+        db_config_class.return_value.getconfig.return_value = {'displays': {'1': 'a'}}
+
+        result = cti_config.update_db_config()
+
+        self.assertEqual(result, set())
+        self.assertTrue(cti_config._db_config is db_config)
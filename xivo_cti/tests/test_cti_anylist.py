@@ -21,6 +21,7 @@ from mock import Mock, patch
 from hamcrest import assert_that
 from hamcrest import equal_to
 
+from xivo_cti.cti_anylist import AnyList
 from xivo_cti.cti_anylist import ContextAwareAnyList
 from xivo_cti.ioc.context import context as cti_context
 
@@ -35,6 +36,65 @@ class ConcreteContextAwareAnyList(ContextAwareAnyList):
         self.get_contexts = Mock()
 
 
+class IndexedAnyList(AnyList):
+
+    unique_indexes = {'number': lambda item: item.get('number')}
+    multi_indexes = {'user_id': lambda item: item['user_id']}
+
+    def __init__(self):
+        self._innerdata = Mock()
+        super(IndexedAnyList, self).__init__('')
+        self.add_notifier = Mock()
+        self.edit_notifier = Mock()
+        self._send_message = Mock()
+
+
+class TestAnyListIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.listname_obj = Mock()
+        self.listname_obj.get_list.return_value = {
+            '1': {'number': '1001', 'user_id': 5},
+            '2': {'number': '1002', 'user_id': 5},
+            '3': {'user_id': 6},
+        }
+        self.list = IndexedAnyList()
+        self.list.listname_obj = self.listname_obj
+        self.list.init_data()
+
+    def test_init_data(self):
+        assert_that(self.list.find_by('number', '1001'), equal_to('1'))
+        assert_that(self.list.find_by('number', '1003'), equal_to(None))
+        assert_that(sorted(self.list.find_all_by('user_id', 5)), equal_to(['1', '2']))
+        assert_that(self.list.find_all_by('user_id', 7), equal_to([]))
+
+    def test_add(self):
+        self.listname_obj.get.return_value = {'4': {'number': '1004', 'user_id': 6}}
+
+        self.list.add('4')
+
+        assert_that(self.list.find_by('number', '1004'), equal_to('4'))
+        assert_that(sorted(self.list.find_all_by('user_id', 6)), equal_to(['3', '4']))
+
+    def test_edit(self):
+        self.listname_obj.get.return_value = {'1': {'number': '2001', 'user_id': 6}}
+
+        self.list.edit('1')
+
+        assert_that(self.list.find_by('number', '1001'), equal_to(None))
+        assert_that(self.list.find_by('number', '2001'), equal_to('1'))
+        assert_that(self.list.find_all_by('user_id', 5), equal_to(['2']))
+        assert_that(sorted(self.list.find_all_by('user_id', 6)), equal_to(['1', '3']))
+
+    def test_delete(self):
+        self.list.delete('1')
+        self.list.delete('3')
+
+        assert_that(self.list.find_by('number', '1001'), equal_to(None))
+        assert_that(self.list.find_all_by('user_id', 5), equal_to(['2']))
+        assert_that(self.list.find_all_by('user_id', 6), equal_to([]))
+
+
 class TestContextAwareAnyList(unittest.TestCase):
 
     item_id = '1'
@@ -110,6 +170,48 @@ class TestContextAwareAnyList(unittest.TestCase):
 
         self.list._ctiserver.send_cti_event.assert_called_once_with(message)
 
+    @patch('xivo_cti.cti_anylist.config', {'main': {'context_separation': False}})
+    def test_batched_messages_merges_added_and_deleted_ids(self):
+        self.list._ctiserver = Mock()
+        self.list.ipbxid = 'xivo'
+        self.list.listname = 'phones'
+        updated_message = {'class': 'getlist', 'function': 'updateconfig', 'tid': '2'}
+
+        with self.list.batched_messages():
+            self.list._send_message(self._message('addconfig', '1'), '1')
+            self.list._send_message(updated_message, '2')
+            self.list._send_message(self._message('addconfig', '3'), '3')
+            self.list._send_message(self._message('delconfig', '4'), '4')
+            self.assertEqual(self.list._ctiserver.send_cti_event.call_count, 1)
+
+        self.assertEqual(self.list._ctiserver.send_cti_event.call_args_list,
+                         [((updated_message,),),
+                          ((self._message('addconfig', '1', '3'),),),
+                          ((self._message('delconfig', '4'),),)])
+
+    @patch('xivo_cti.cti_anylist.config', {'main': {'context_separation': True}})
+    def test_batched_messages_with_context_separation(self):
+        self.list._ctiserver = Mock()
+        self.list._ctiserver.get_connected.side_effect = lambda filter: filter['contexts']
+        self.list.ipbxid = 'xivo'
+        self.list.listname = 'phones'
+        self.list.keeplist = {'1': {'context': 'a'}, '2': {'context': 'b'}, '3': {'context': 'a'}}
+
+        with self.list.batched_messages():
+            for item_id in ['1', '2', '3']:
+                self.list._send_message(self._message('addconfig', item_id), item_id)
+
+        self.assertEqual(self.list._ctiserver.send_message_to_connections.call_args_list,
+                         [((['a'], self._message('addconfig', '1', '3')),),
+                          ((['b'], self._message('addconfig', '2')),)])
+
+    def _message(self, function, *ids):
+        return {'class': 'getlist',
+                'listname': self.list.listname,
+                'function': function,
+                'tipbxid': self.list.ipbxid,
+                'list': list(ids)}
+
     @patch('xivo_cti.cti_anylist.config', {'main': {'context_separation': True}})
     def test_given_users_listname_when_send_message_then_get_contexts(self):
         self.listname_obj.get_list.return_value = self.keeplist
@@ -134,4 +236,4 @@ class TestContextAwareAnyList(unittest.TestCase):
 
         self.list.get_contexts.assert_called_once_with(message_id)
         self.list._ctiserver.get_connected.assert_called_once_with({'contexts': context})
-        mock_connection.append_msg.assert_called_once_with(message)
+        self.list._ctiserver.send_message_to_connections.assert_called_once_with([mock_connection], message)
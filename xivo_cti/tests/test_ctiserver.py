@@ -18,8 +18,13 @@
 import unittest
 
 from mock import Mock
+from xivo_cti.client_connection import ClientConnection
 from xivo_cti.ctiserver import CTIServer
+from xivo_cti.cti.connection_registry import ConnectionRegistry
 from xivo_cti.cti.cti_group import CTIGroup
+from xivo_cti.cti.cti_message_encoder import CTIMessageEncoder
+from xivo_cti.interfaces.interface_cti import CTI
+from xivo_cti.reactor import _SelectReactor
 
 
 class TestCTIServer(unittest.TestCase):
@@ -28,6 +33,12 @@ class TestCTIServer(unittest.TestCase):
         self.broadcast_cti_group = Mock(CTIGroup)
         self.cti_server = CTIServer()
         self.cti_server._broadcast_cti_group = self.broadcast_cti_group
+        self.encoded_msg = '{"class": "sheet"}\n'
+        self.cti_msg_encoder = Mock(CTIMessageEncoder)
+        self.cti_msg_encoder.encode.return_value = self.encoded_msg
+        self.cti_server._cti_msg_encoder = self.cti_msg_encoder
+        self.connection_registry = Mock(ConnectionRegistry)
+        self.cti_server._connection_registry = self.connection_registry
 
     def test_send_cti_event(self):
         event = {'event': 'My test event'}
@@ -35,3 +46,66 @@ class TestCTIServer(unittest.TestCase):
         self.cti_server.send_cti_event(event)
 
         self.broadcast_cti_group.send_message.assert_called_once_with(event)
+
+    def test_send_message_to_connections_encodes_once(self):
+        msg = {'class': 'sheet'}
+        interface_cti_1, interface_cti_2 = Mock(CTI), Mock(CTI)
+
+        self.cti_server.send_message_to_connections([interface_cti_1, interface_cti_2], msg)
+
+        self.cti_msg_encoder.encode.assert_called_once_with(msg)
+        for interface_cti in [interface_cti_1, interface_cti_2]:
+            interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg, [(msg, self.encoded_msg)])
+            self.assertFalse(interface_cti.send_message.called)
+
+    def test_send_message_to_connections_when_interface_closed(self):
+        msg = {'class': 'sheet'}
+        interface_cti_1, interface_cti_2 = Mock(CTI), Mock(CTI)
+        interface_cti_1.send_encoded_message.side_effect = ClientConnection.CloseException()
+
+        self.cti_server.send_message_to_connections([interface_cti_1, interface_cti_2], msg)
+
+        interface_cti_2.send_encoded_message.assert_called_once_with(self.encoded_msg, [(msg, self.encoded_msg)])
+
+    def test_send_message_to_connections_no_connections(self):
+        self.cti_server.send_message_to_connections([], {'class': 'sheet'})
+
+        self.assertFalse(self.cti_msg_encoder.encode.called)
+
+    def test_send_to_cti_client(self):
+        msg = {'class': 'people_search_result'}
+        interface_cti = Mock(CTI)
+        self.connection_registry.find_by_user_id.return_value = [interface_cti]
+
+        self.cti_server.send_to_cti_client('xivo/2', msg)
+
+        self.connection_registry.find_by_user_id.assert_called_once_with('2')
+        interface_cti.send_encoded_message.assert_called_once_with(self.encoded_msg, [(msg, self.encoded_msg)])
+
+    def test_get_connected(self):
+        tomatch = {'contexts': ['default']}
+        self.cti_server.safe = Mock()
+
+        result = self.cti_server.get_connected(tomatch)
+
+        self.connection_registry.find.assert_called_once_with(tomatch, self.cti_server.safe.user_match)
+        self.assertEqual(result, self.connection_registry.find.return_value)
+
+    def test_connection_stays_writable_when_data_is_queued_on_idle(self):
+        sock = Mock()
+        sock.send.side_effect = lambda data: len(data)
+        connection = ClientConnection(sock)
+        reactor = self.cti_server._reactor = _SelectReactor()
+        reactor.register(connection)
+
+        def flush_coalesced_on_idle(connection, state):
+            if state == ClientConnection.STATE_IDLE and not connection.need_sending():
+                connection.append_queue('coalesced')
+        connection.attach_observer(flush_coalesced_on_idle)
+        connection.attach_observer(self.cti_server._on_client_connection_update)
+        connection.append_queue('foo')
+
+        connection.process_sending()
+
+        self.assertTrue(connection.need_sending())
+        self.assertTrue(connection in reactor._writers)
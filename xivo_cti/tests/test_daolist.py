@@ -77,6 +77,82 @@ class TestDaoList(unittest.TestCase):
         self.daolist._get_agent.assert_called_once_with(agent_id)
         self.assertEquals(result, expected_result)
 
+    def test_get_many_with_few_items(self):
+        self.daolist.listname = 'users'
+        self.daolist._get_user = Mock(side_effect=lambda user_id: {user_id: {'id': user_id}})
+        self.daolist._get_users = Mock()
+
+        result = self.daolist.get_many(['1', '2'])
+
+        self.assertEqual(result, {'1': {'id': '1'}, '2': {'id': '2'}})
+        self.assertFalse(self.daolist._get_users.called)
+
+    def test_get_many_with_many_items(self):
+        ids = [str(i) for i in range(20)]
+        self.daolist.listname = 'users'
+        self.daolist._get_user = Mock()
+        self.daolist._get_users = Mock(return_value=dict((id, {'id': id}) for id in ids[:-1] + ['42']))
+
+        result = self.daolist.get_many(ids)
+
+        self.assertEqual(result, dict((id, {'id': id}) for id in ids[:-1]))
+        self.daolist._get_users.assert_called_once_with()
+        self.assertFalse(self.daolist._get_user.called)
+
+    def test_get_when_prefetched(self):
+        self.daolist.listname = 'users'
+        self.daolist._get_user = Mock(side_effect=lambda user_id: {user_id: {'id': user_id}} if user_id == '1' else {})
+
+        with self.daolist.prefetched(['1', '2']):
+            self.daolist._get_user.reset_mock()
+            result_1 = self.daolist.get('1')
+            result_2 = self.daolist.get('2')
+            self.assertFalse(self.daolist._get_user.called)
+
+        self.assertEqual(result_1, {'1': {'id': '1'}})
+        self.assertEqual(result_2, {})
+        self.assertEqual(self.daolist.get('1'), {'1': {'id': '1'}})
+        self.assertTrue(self.daolist._get_user.called)
+
+    def test_get_when_prefetched_with_items(self):
+        self.daolist.listname = 'users'
+        self.daolist._get_user = Mock()
+        self.daolist._get_users = Mock()
+
+        with self.daolist.prefetched(['1', '2'], {'1': {'id': '1'}, '3': {'id': '3'}}):
+            result_1 = self.daolist.get('1')
+            result_2 = self.daolist.get('2')
+
+        self.assertEqual(result_1, {'1': {'id': '1'}})
+        self.assertEqual(result_2, {})
+        self.assertFalse(self.daolist._get_user.called)
+        self.assertFalse(self.daolist._get_users.called)
+
+    def test_prefetched_with_an_id_not_set(self):
+        self.daolist.listname = 'users'
+        self.daolist._get_user = Mock(side_effect=lambda user_id: {user_id: {'id': user_id}})
+        self.daolist._get_users = Mock()
+
+        with self.daolist.prefetched(['1', None, '2']):
+            self.daolist._get_user.side_effect = Exception()
+            result_1 = self.daolist.get('1')
+            result_2 = self.daolist.get('2')
+
+        self.assertEqual(result_1, {'1': {'id': '1'}})
+        self.assertEqual(result_2, {'2': {'id': '2'}})
+
+    def test_prefetched_with_a_failing_id(self):
+        self.daolist.listname = 'users'
+        self.daolist._get_user = Mock(side_effect=[Exception(), {'2': {'id': '2'}}, {'1': {'id': '1'}}])
+
+        with self.daolist.prefetched(['1', '2']):
+            result_2 = self.daolist.get('2')
+            result_1 = self.daolist.get('1')
+
+        self.assertEqual(result_2, {'2': {'id': '2'}})
+        self.assertEqual(result_1, {'1': {'id': '1'}})
+        self.assertEqual(self.daolist._get_user.call_count, 3)
+
     def test_get_with_unknown_listname(self):
         self.daolist.listname = 'unknown'
 
@@ -136,6 +212,18 @@ class TestDaoList(unittest.TestCase):
 
         self.assertEquals(result, expected_result)
 
+    @patch('xivo_dao.user_line_dao.all_with_protocol')
+    def test_get_phones(self, mock_all_with_protocol):
+        line = self._generic_object(id=7, protocolid=12)
+        protocol = self._generic_object(id=12, name='abc', protocol='sip')
+        user = self._generic_object(id=76, firstname='Lord', lastname='Sanderson')
+        mock_all_with_protocol.side_effect = lambda protocol_name: [(line, protocol, user)] if protocol_name == 'sip' else []
+
+        result = self.daolist._get_phones()
+
+        self.assertEquals(result, self.daolist._format_line_data(line, protocol, user))
+        self.assertEquals(mock_all_with_protocol.call_count, 4)
+
     def test_format_group_data(self):
         group_id = 7
         name = 'test_group'
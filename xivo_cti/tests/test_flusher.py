@@ -44,3 +44,13 @@ class TestFlusher(unittest.TestCase):
         self.flusher.flush()
 
         self.flushable.flush.assert_called_once_with()
+
+    def test_flush_flushable_added_while_flushing(self):
+        other_flushable = Mock()
+        self.flushable.flush.side_effect = lambda: self.flusher.add(other_flushable)
+        self.flusher.add(self.flushable)
+        self.flusher.flush()
+
+        other_flushable.flush.assert_called_once_with()
+        self.flusher.flush()
+        self.flushable.flush.assert_called_once_with()
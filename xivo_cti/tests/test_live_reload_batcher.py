@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from mock import Mock
+from mock import patch
+from xivo_cti.innerdata import Safe
+from xivo_cti.live_reload_batcher import LiveReloadBatcher
+from xivo_cti.task_scheduler import _TaskScheduler
+
+
+class TestLiveReloadBatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.innerdata = Mock(Safe)
+        self.task_scheduler = Mock(_TaskScheduler)
+        self.batcher = LiveReloadBatcher(self.innerdata, self.task_scheduler, 0.5, 5)
+
+    @patch('time.time', Mock(return_value=100.0))
+    def test_add_schedules_a_flush(self):
+        self.batcher.add('users', 'add', '1')
+
+        self.task_scheduler.schedule.assert_called_once_with(0.5, self.batcher.flush)
+        self.assertFalse(self.innerdata.update_config_list_many.called)
+
+    def test_add_postpones_the_flush(self):
+        first_task = Mock()
+        self.task_scheduler.schedule.return_value = first_task
+
+        with patch('time.time', Mock(return_value=100.0)):
+            self.batcher.add('users', 'add', '1')
+        with patch('time.time', Mock(return_value=104.8)):
+            self.batcher.add('users', 'add', '2')
+
+        first_task.cancel.assert_called_once_with()
+        delay = self.task_scheduler.schedule.call_args[0][0]
+        self.assertAlmostEqual(delay, 0.2)
+
+    def test_flush_groups_by_list_and_state(self):
+        self.batcher.add('users', 'add', '1')
+        self.batcher.add('phones', 'delete', '3')
+        self.batcher.add('users', 'edit', '2')
+        self.batcher.add('users', 'add', '4')
+
+        self.batcher.flush()
+
+        self.assertEqual(self.innerdata.update_config_list_many.call_args_list,
+                         [(('users', 'add', ['1', '4']),),
+                          (('phones', 'delete', ['3']),),
+                          (('users', 'edit', ['2']),)])
+
+    def test_flush_keeps_the_add_of_an_edited_item(self):
+        self.batcher.add('users', 'add', '1')
+        self.batcher.add('users', 'edit', '1')
+        self.batcher.add('users', 'edit', '2')
+        self.batcher.add('users', 'delete', '2')
+
+        self.batcher.flush()
+
+        self.assertEqual(self.innerdata.update_config_list_many.call_args_list,
+                         [(('users', 'add', ['1']),),
+                          (('users', 'delete', ['2']),)])
+
+    def test_flush_drops_an_item_added_then_deleted(self):
+        self.batcher.add('users', 'add', '1')
+        self.batcher.add('users', 'edit', '1')
+        self.batcher.add('users', 'delete', '1')
+        self.batcher.add('users', 'add', '2')
+
+        self.batcher.flush()
+
+        self.assertEqual(self.innerdata.update_config_list_many.call_args_list,
+                         [(('users', 'add', ['2']),)])
+
+    def test_add_ignores_the_updates_without_id(self):
+        self.batcher.add('users', 'edit', '1')
+        self.batcher.add('users', 'edit', None)
+        self.batcher.add('users', 'edit', '2')
+
+        self.batcher.flush()
+
+        self.assertEqual(self.innerdata.update_config_list_many.call_args_list,
+                         [(('users', 'edit', ['1', '2']),)])
+
+    def test_flush_continues_after_an_error(self):
+        self.innerdata.update_config_list_many.side_effect = [Exception(), None]
+        self.batcher.add('users', 'add', '1')
+        self.batcher.add('phones', 'add', '2')
+
+        self.batcher.flush()
+
+        self.innerdata.update_config_list_many.assert_called_with('phones', 'add', ['2'])
+
+    def test_flush_empties_the_batch(self):
+        self.batcher.add('users', 'add', '1')
+        self.batcher.flush()
+        self.innerdata.reset_mock()
+
+        self.batcher.flush()
+
+        self.assertFalse(self.innerdata.update_config_list_many.called)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from hamcrest import assert_that, equal_to
+from mock import MagicMock
+from mock import patch
+from xivo_cti import membership_index
+from xivo_cti.membership_index import MembershipIndex
+
+
+class TestMembershipIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = MembershipIndex()
+        self.index.set_dest(membership_index.QUEUE, 42, 'sales')
+        self.index.set_dest(membership_index.GROUP, 42, 'support')
+        self.index.set_user_member_names('1', ['SIP/abc', 'Agent/1001'])
+        self.index.set_user_member_names(2, ['SIP/def'])
+
+    def test_is_member_queue(self):
+        self.index.add_member(membership_index.QUEUE, 'sales', 'Agent/1001')
+
+        assert_that(self.index.is_member(membership_index.QUEUE, '42', 1), equal_to(True))
+        assert_that(self.index.is_member(membership_index.QUEUE, 42, '2'), equal_to(False))
+        assert_that(self.index.is_member(membership_index.GROUP, 42, '1'), equal_to(False))
+
+    def test_is_member_group(self):
+        self.index.set_members(membership_index.GROUP, 'support', ['SIP/def'])
+
+        assert_that(self.index.is_member(membership_index.GROUP, 42, '2'), equal_to(True))
+        assert_that(self.index.is_member(membership_index.GROUP, 42, '1'), equal_to(False))
+
+    def test_is_member_unknown_dest_or_user(self):
+        self.index.add_member(membership_index.QUEUE, 'sales', 'SIP/abc')
+
+        assert_that(self.index.is_member(membership_index.QUEUE, 43, '1'), equal_to(False))
+        assert_that(self.index.is_member(membership_index.QUEUE, 42, '3'), equal_to(False))
+
+    def test_remove_member(self):
+        self.index.add_member(membership_index.QUEUE, 'sales', 'SIP/abc')
+        self.index.add_member(membership_index.QUEUE, 'sales', 'Agent/1001')
+
+        self.index.remove_member(membership_index.QUEUE, 'sales', 'SIP/abc')
+        assert_that(self.index.is_member(membership_index.QUEUE, 42, '1'), equal_to(True))
+        self.index.remove_member(membership_index.QUEUE, 'sales', 'Agent/1001')
+        assert_that(self.index.is_member(membership_index.QUEUE, 42, '1'), equal_to(False))
+
+    def test_remove_dest_and_user(self):
+        self.index.add_member(membership_index.QUEUE, 'sales', 'SIP/abc')
+        self.index.set_members(membership_index.GROUP, 'support', ['SIP/abc'])
+
+        self.index.remove_dest(membership_index.QUEUE, '42')
+        self.index.remove_user('1')
+
+        assert_that(self.index.is_member(membership_index.QUEUE, 42, '1'), equal_to(False))
+        assert_that(self.index.is_member(membership_index.GROUP, 42, '1'), equal_to(False))
+
+    def test_clear(self):
+        self.index.add_member(membership_index.QUEUE, 'sales', 'SIP/abc')
+
+        self.index.clear()
+
+        assert_that(self.index.is_member(membership_index.QUEUE, 42, '1'), equal_to(False))
+
+
+@patch('xivo_cti.membership_index.config', {'db_uri': 'postgresql://localhost/asterisk'})
+@patch('xivo_cti.db_connection_manager.DbConnectionPool')
+class TestGetGroupMemberNames(unittest.TestCase):
+
+    def test_get_group_member_names(self, db_connection_pool):
+        connection = db_connection_pool.return_value.__enter__.return_value = MagicMock()
+        connection['cur'].fetchall.return_value = [('support', 'SIP/abc'),
+                                                   ('support', 'Agent/1001'),
+                                                   ('sales', 'SIP/def')]
+
+        result = membership_index.get_group_member_names()
+
+        assert_that(result, equal_to({'support': set(['SIP/abc', 'Agent/1001']),
+                                      'sales': set(['SIP/def'])}))
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import select
+import socket
+import unittest
+
+from xivo_cti.reactor import _EpollReactor
+from xivo_cti.reactor import _SelectReactor
+
+
+class _BaseReactorTest(object):
+
+    def setUp(self):
+        self.reactor = self._new_reactor()
+        self.sock1, self.sock2 = socket.socketpair()
+
+    def tearDown(self):
+        self.sock1.close()
+        self.sock2.close()
+
+    def test_poll_readable(self):
+        self.reactor.register(self.sock1)
+        self.sock2.send('foo')
+
+        readables, writables = self.reactor.poll(0)
+
+        self.assertEqual(readables, [self.sock1])
+        self.assertEqual(writables, [])
+
+    def test_poll_nothing_to_read(self):
+        self.reactor.register(self.sock1)
+
+        readables, writables = self.reactor.poll(0)
+
+        self.assertEqual(readables, [])
+        self.assertEqual(writables, [])
+
+    def test_set_writable(self):
+        self.reactor.register(self.sock1)
+
+        self.reactor.set_writable(self.sock1, True)
+        _, writables = self.reactor.poll(0)
+
+        self.assertEqual(writables, [self.sock1])
+
+        self.reactor.set_writable(self.sock1, False)
+        _, writables = self.reactor.poll(0)
+
+        self.assertEqual(writables, [])
+
+    def test_set_writable_not_registered(self):
+        self.reactor.set_writable(self.sock1, True)
+
+        _, writables = self.reactor.poll(0)
+
+        self.assertEqual(writables, [])
+
+    def test_set_readable(self):
+        self.reactor.register(self.sock1)
+        self.sock2.send('foo')
+
+        self.reactor.set_readable(self.sock1, False)
+        readables, _ = self.reactor.poll(0)
+
+        self.assertEqual(readables, [])
+
+        self.reactor.set_readable(self.sock1, True)
+        readables, _ = self.reactor.poll(0)
+
+        self.assertEqual(readables, [self.sock1])
+
+    def test_set_readable_keeps_writable(self):
+        self.reactor.register(self.sock1)
+        self.reactor.set_writable(self.sock1, True)
+        self.sock2.send('foo')
+
+        self.reactor.set_readable(self.sock1, False)
+        readables, writables = self.reactor.poll(0)
+
+        self.assertEqual(readables, [])
+        self.assertEqual(writables, [self.sock1])
+
+    def test_unregister(self):
+        self.reactor.register(self.sock1)
+        self.sock2.send('foo')
+
+        self.reactor.unregister(self.sock1)
+        readables, _ = self.reactor.poll(0)
+
+        self.assertEqual(readables, [])
+        self.assertEqual(self.reactor.registered(), [])
+
+    def test_unregister_twice(self):
+        self.reactor.register(self.sock1)
+
+        self.reactor.unregister(self.sock1)
+        self.reactor.unregister(self.sock1)
+
+        self.assertEqual(self.reactor.registered(), [])
+
+    def test_clear(self):
+        self.reactor.register(self.sock1)
+        self.reactor.register(self.sock2)
+
+        self.reactor.clear()
+
+        self.assertEqual(self.reactor.registered(), [])
+
+
+class TestSelectReactor(_BaseReactorTest, unittest.TestCase):
+
+    def _new_reactor(self):
+        return _SelectReactor()
+
+
+@unittest.skipUnless(hasattr(select, 'epoll'), 'epoll is not available')
+class TestEpollReactor(_BaseReactorTest, unittest.TestCase):
+
+    def _new_reactor(self):
+        return _EpollReactor(select.epoll())
+
+    def test_unregister_closed_socket(self):
+        self.reactor.register(self.sock1)
+        self.sock1.close()
+
+        self.reactor.unregister(self.sock1)
+
+        self.assertEqual(self.reactor.registered(), [])
+
+    def test_unregister_closed_socket_does_not_unregister_reused_fd(self):
+        self.reactor.register(self.sock1)
+        self.sock1.close()
+        new_sock1, new_sock2 = socket.socketpair()
+        try:
+            self.reactor.register(new_sock1)
+            self.reactor.unregister(self.sock1)
+            new_sock2.send('foo')
+
+            readables, _ = self.reactor.poll(0)
+
+            self.assertEqual(readables, [new_sock1])
+        finally:
+            new_sock1.close()
+            new_sock2.close()
@@ -17,6 +17,7 @@
 
 import unittest
 
+from mock import MagicMock
 from mock import Mock
 from mock import patch
 from xivo_cti.channel import Channel
@@ -29,7 +30,6 @@ from xivo_cti.tools.weak_method import WeakCallable
 from xivo_cti.cti.commands.availstate import Availstate
 from xivo_cti.services.user.manager import UserServiceManager
 from xivo_cti.services.queue_member.cti.adapter import QueueMemberCTIAdapter
-from xivo_cti.lists.users_list import UsersList
 
 
 class TestSafe(unittest.TestCase):
@@ -73,7 +73,7 @@ class TestSafe(unittest.TestCase):
     def test_trunk_hangup(self):
         channel_name = 'SIP/mon_trunk-12345'
 
-        channel = Mock(Channel)
+        channel = Channel(channel_name, 'default')
         channel.relations = ['trunk:1']
         self.safe.channels[channel_name] = channel
         self.safe.xod_status['trunks'] = {}
@@ -84,52 +84,179 @@ class TestSafe(unittest.TestCase):
         self.assertTrue(channel_name not in self.safe.channels)
         self.assertTrue(channel_name not in self.safe.xod_status['trunks'][1]['channels'])
 
-    @patch('xivo_dao.queue_dao.is_user_member_of_queue')
-    def test_user_match_with_queue(self, mock_is_user_member_of_queue):
-        user_id = 1
-        queue_id = 42
-        tomatch = {
-            'desttype': 'queue',
-            'destid': queue_id
-        }
-        mock_is_user_member_of_queue.return_value = True
-        userlist = Mock(UsersList)
-        userlist.keeplist = {}
-        userlist.keeplist[user_id] = {
-            'cti_profile_id': 1,
-            'context': 'default',
-            'agentid': 22
-        }
-        self.safe.xod_config = {
-            'users': userlist
-        }
-
-        domatch = self.safe.user_match(user_id, tomatch)
-
-        mock_is_user_member_of_queue.assert_called_once_with(user_id, queue_id)
+    def _set_xod_config(self, users=None, phones=None, agents=None, queues=None, groups=None):
+        lists = {}
+        for listname, keeplist in [('users', users), ('phones', phones), ('agents', agents),
+                                   ('queues', queues), ('groups', groups)]:
+            lists[listname] = MagicMock()
+            lists[listname].keeplist = keeplist or {}
+        phones = lists['phones'].keeplist
+        lists['phones'].find_all_by.side_effect = lambda index, user_id: [
+            phone_id for phone_id, phone in phones.iteritems() if phone['iduserfeatures'] == user_id]
+        self.safe.xod_config = lists
+
+    def _set_default_xod_config(self):
+        self._set_xod_config(
+            users={'1': {'cti_profile_id': 1, 'context': 'default', 'agentid': 22}},
+            phones={'3': {'iduserfeatures': 1, 'identity': 'SIP/abc'}},
+            agents={'22': {'number': '1001'}},
+            queues={'42': {'name': 'sales'}},
+            groups={'42': {'name': 'support'}})
+
+    @patch('xivo_cti.membership_index.get_group_member_names', Mock(return_value={}))
+    def test_user_match_with_queue(self):
+        self._set_default_xod_config()
+        self.safe._init_memberships()
+        self.safe._on_queue_member_added(Mock(queue_name='sales', member_name='Agent/1001'))
+
+        domatch = self.safe.user_match('1', {'desttype': 'queue', 'destid': 42})
+
         self.assertTrue(domatch)
 
-    @patch('xivo_dao.group_dao.is_user_member_of_group')
-    def test_user_match_with_group(self, mock_is_user_member_of_group):
-        user_id = 1
-        group_id = 42
-        tomatch = {
-            'desttype': 'group',
-            'destid': group_id,
-        }
-        mock_is_user_member_of_group.return_value = True
-        userlist = Mock(UsersList)
-        userlist.keeplist = {}
-        userlist.keeplist[user_id] = {
-            'cti_profile_id': 1,
-            'context': 'default',
-            'agentid': 22
-        }
-        self.safe.xod_config = {
-            'users': userlist
-        }
-
-        domatch = self.safe.user_match(user_id, tomatch)
-
-        mock_is_user_member_of_group.assert_called_once_with(user_id, group_id)
+    @patch('xivo_cti.membership_index.get_group_member_names', Mock(return_value={'support': set(['SIP/abc'])}))
+    def test_user_match_with_group(self):
+        self._set_default_xod_config()
+        self.safe._init_memberships()
+
+        domatch = self.safe.user_match('1', {'desttype': 'group', 'destid': 42})
+
         self.assertTrue(domatch)
+
+    @patch('xivo_cti.membership_index.get_group_member_names', Mock(return_value={}))
+    def test_user_match_with_queue_member_removed(self):
+        self._set_default_xod_config()
+        self.safe._init_memberships()
+        queue_member = Mock(queue_name='sales', member_name='SIP/abc')
+        self.safe._on_queue_member_added(queue_member)
+
+        self.safe._on_queue_member_removed(queue_member)
+
+        self.assertFalse(self.safe.user_match('1', {'desttype': 'queue', 'destid': 42}))
+
+    @patch('xivo_cti.membership_index.get_group_member_names')
+    def test_init_memberships(self, get_group_member_names):
+        get_group_member_names.return_value = {'support': set(['Agent/1001'])}
+        self._set_default_xod_config()
+        queue_member_manager = Mock()
+        queue_member_manager.get_queue_members.return_value = [Mock(queue_name='sales', member_name='SIP/abc')]
+        self.safe._queue_member_manager = queue_member_manager
+
+        self.safe._init_memberships()
+
+        get_group_member_names.assert_called_once_with()
+        self.assertTrue(self.safe.membership_index.is_member('queue', '42', '1'))
+        self.assertTrue(self.safe.membership_index.is_member('group', '42', '1'))
+
+    @patch('xivo_cti.membership_index.get_group_member_names', Mock(return_value={}))
+    def test_update_config_list_updates_user_memberships(self):
+        self._set_default_xod_config()
+        self.safe._init_memberships()
+        self.safe._on_queue_member_added(Mock(queue_name='sales', member_name='SIP/def'))
+        phones = self.safe.xod_config['phones']
+        phones.add.side_effect = lambda phone_id: phones.keeplist.update(
+            {phone_id: {'iduserfeatures': 1, 'identity': 'SIP/def'}})
+
+        self.safe.update_config_list('phones', 'add', '4')
+
+        self.assertTrue(self.safe.membership_index.is_member('queue', '42', '1'))
+
+    @patch('xivo_cti.membership_index.get_group_member_names', Mock(return_value={}))
+    def test_update_config_list_removes_queue(self):
+        self._set_default_xod_config()
+        self.safe._init_memberships()
+        self.safe._on_queue_member_added(Mock(queue_name='sales', member_name='SIP/abc'))
+        queues = self.safe.xod_config['queues']
+        queues.delete.side_effect = lambda queue_id: queues.keeplist.pop(queue_id)
+
+        self.safe.update_config_list('queues', 'delete', '42')
+
+        self.assertFalse(self.safe.membership_index.is_member('queue', '42', '1'))
+
+    @patch('xivo_cti.membership_index.get_group_member_names')
+    def test_update_config_list_many_reloads_group_members_once(self, get_group_member_names):
+        get_group_member_names.return_value = {}
+        self._set_default_xod_config()
+        self.safe._init_memberships()
+        get_group_member_names.reset_mock()
+
+        self.safe.update_config_list_many('users', 'edit', ['1', '2'])
+
+        get_group_member_names.assert_called_once_with()
+
+    def test_update_config_list_unknown_list(self):
+        self.safe.xod_config = {}
+
+        self.safe.update_config_list('lines', 'edit', '1')
+
+    def test_restore_xod_status(self):
+        self.safe.xod_status = {'phones': {'1': {'hintstatus': 0, 'foo': 'a'}},
+                                'users': {'1': {'availstate': 'available'}}}
+
+        self.safe._restore_xod_status({'phones': {'1': {'hintstatus': 8, 'foo': 'b'},
+                                                  '2': {'hintstatus': 1}},
+                                       'users': {'1': {'availstate': 'away'}}})
+
+        self.assertEqual(self.safe.xod_status, {'phones': {'1': {'hintstatus': 8, 'foo': 'a'}},
+                                                'users': {'1': {'availstate': 'available'}}})
+
+    def test_reconcile_xod_config(self):
+        phones_list = Mock()
+        phones_list.keeplist = {'1': {'number': '1001'}, '2': {'number': '1002'}, '3': {'number': '1003'}}
+        phones_list.prepare_keeplist.side_effect = lambda keeplist: keeplist
+        self.safe.xod_config = {'phones': phones_list}
+        self.safe.update_config_list_many = Mock()
+        keeplist = {'2': {'number': '1002'},
+                    '3': {'number': '1103'},
+                    '4': {'number': '1004'}}
+
+        self.safe.reconcile_xod_config({'phones': keeplist})
+
+        self.assertEqual(self.safe.update_config_list_many.call_args_list,
+                         [(('phones', 'delete', ['1'], keeplist),),
+                          (('phones', 'add', ['4'], keeplist),),
+                          (('phones', 'edit', ['3'], keeplist),)])
+
+    def test_update_config_list_many(self):
+        users_list = MagicMock()
+        self.safe.xod_config = {'users': users_list}
+        self.safe.update_config_list = Mock()
+
+        self.safe.update_config_list_many('users', 'add', ['1', '2'])
+
+        users_list.listname_obj.prefetched.assert_called_once_with(['1', '2'], None)
+        self.assertTrue(users_list.batched_messages.called)
+        self.assertEqual(self.safe.update_config_list.call_args_list,
+                         [(('users', 'add', '1'),), (('users', 'add', '2'),)])
+
+    def test_update_config_list_many_unknown_list(self):
+        self.safe.xod_config = {'users': MagicMock()}
+        self.safe.update_config_list = Mock()
+
+        self.safe.update_config_list_many('devices', 'edit', ['1'])
+
+        self.assertFalse(self.safe.update_config_list.called)
+
+    def test_update_config_list_many_delete_does_not_fetch(self):
+        users_list = MagicMock()
+        self.safe.xod_config = {'users': users_list}
+        self.safe.update_config_list = Mock()
+
+        self.safe.update_config_list_many('users', 'delete', ['1'])
+
+        users_list.listname_obj.prefetched.assert_called_once_with([], None)
+
+    def test_find_users_channels_with_peer(self):
+        phones_list, agents_list = Mock(), Mock()
+        phones_list.get_main_line.return_value = {'id': 3, 'protocol': 'sip', 'name': 'abc'}
+        agents_list.get_agent_by_user.return_value = None
+        self.safe.xod_config = {'phones': phones_list, 'agents': agents_list}
+        talking, alone, holded = [Channel('SIP/abc-0000000%d' % i, 'default') for i in range(3)]
+        talking.peerchannel = holded.peerchannel = 'SIP/def-00000004'
+        holded.properties['holded'] = True
+        for channel in [talking, alone, holded]:
+            channel.addrelation('phone:3')
+            self.safe.channels[channel.channel] = channel
+
+        result = self.safe.find_users_channels_with_peer(5)
+
+        self.assertEqual(result, [talking.channel])
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock
+from xivo_cti.snapshot import SnapshotStore
+from xivo_cti.snapshot import take_snapshot
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'snapshot')
+        self.store = SnapshotStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_save_and_load(self):
+        snapshot = {'time': 42.0, 'xod_config': {'phones': {'1': {'number': '1001'}}}}
+
+        self.store.save(snapshot)
+
+        self.assertEqual(self.store.load(), snapshot)
+        self.assertFalse(os.path.exists('%s.tmp' % self.path))
+        self.assertEqual(os.stat(self.path).st_mode & 0777, 0600)
+
+    def test_load_missing_file(self):
+        self.assertEqual(self.store.load(), None)
+
+    def test_load_unknown_version(self):
+        with open(self.path, 'wb') as f:
+            f.write('xivo-ctid snapshot 0\n')
+
+        self.assertEqual(self.store.load(), None)
+
+    def test_load_invalid_file(self):
+        self.store.save({'time': 42.0})
+        with open(self.path, 'r+b') as f:
+            f.seek(-4, os.SEEK_END)
+            f.truncate()
+
+        self.assertEqual(self.store.load(), None)
+
+
+class TestTakeSnapshot(unittest.TestCase):
+
+    def test_take_snapshot(self):
+        innerdata = Mock()
+        innerdata.xod_config = {'phones': Mock(keeplist={'1': {'number': '1001'}})}
+        innerdata.xod_status = {'phones': {'1': {'hintstatus': 0}}}
+        queue_member = Mock(queue_name='queue1', member_name='Agent/1', state='state')
+        queue_member_manager = Mock()
+        queue_member_manager.get_queue_members.return_value = [queue_member]
+        meetme_service_manager = Mock()
+        meetme_service_manager.get_room_states.return_value = {'9000': {'start_time': 0, 'members': {}}}
+
+        snapshot = take_snapshot(innerdata, queue_member_manager, meetme_service_manager)
+
+        self.assertEqual(snapshot['xod_config'], {'phones': {'1': {'number': '1001'}}})
+        self.assertEqual(snapshot['xod_status'], {'phones': {'1': {'hintstatus': 0}}})
+        self.assertEqual(snapshot['queue_members'], [('queue1', 'Agent/1', 'state')])
+        self.assertEqual(snapshot['meetmes'], {'9000': {'start_time': 0, 'members': {}}})
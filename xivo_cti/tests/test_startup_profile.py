@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2014 Avencall
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+
+from mock import patch
+from xivo_cti.startup_profile import StartupProfile
+
+
+class TestStartupProfile(unittest.TestCase):
+
+    @patch('time.time')
+    def test_report(self, mock_time):
+        mock_time.return_value = 10.0
+        startup_profile = StartupProfile()
+        mock_time.return_value = 11.0
+        startup_profile.phase_done('lists')
+        mock_time.return_value = 14.0
+        startup_profile.phase_done('AMI connection')
+
+        result = startup_profile.report()
+
+        self.assertEqual(result, ['lists                               1.000 s  25.0%',
+                                  'AMI connection                      3.000 s  75.0%',
+                                  'total                               4.000 s'])
+
+    def test_report_no_phases(self):
+        result = StartupProfile().report()
+
+        self.assertEqual(len(result), 1)
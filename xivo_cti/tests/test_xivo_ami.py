@@ -15,6 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
+import errno
+import socket
 import unittest
 
 from xivo_cti.xivo_ami import AMIClass
@@ -81,3 +83,106 @@ class TestXivoAMI(unittest.TestCase):
 
         self.ami_class._exec_command.assert_called_once_with(
             'Hangup', [('Channel', channel)])
+
+
+class TestAMIClassWriter(unittest.TestCase):
+
+    def setUp(self):
+        with patch('xivo_cti.xivo_ami.config', {'ipbx_connection': {}}):
+            self.ami_class = AMIClass()
+        self.ami_class.sock = Mock()
+        self.observer = Mock()
+        self.ami_class.attach_observer(self.observer)
+
+    def test_sendcommand_does_not_write(self):
+        result = self.ami_class.sendcommand('Ping', [('Foo', 'bar')])
+
+        self.assertTrue(result)
+        self.assertFalse(self.ami_class.sock.send.called)
+        self.assertTrue(self.ami_class.need_sending())
+        self.assertEqual(self.ami_class.pending_actions(), 1)
+        self.assertEqual(self.ami_class.pending_bytes(), len('Action: Ping\r\nFoo: bar\r\n\r\n'))
+        self.observer.assert_called_once_with(self.ami_class, AMIClass.STATE_SENDING)
+
+    def test_sendcommand_actionid(self):
+        self.ami_class.setactionid('123')
+
+        self.ami_class.sendcommand('Ping', [])
+
+        self.ami_class.sock.send.side_effect = lambda data: len(data)
+        self.ami_class.flush()
+        self.ami_class.sock.send.assert_called_once_with('Action: Ping\r\nActionId: 123\r\n\r\n')
+        self.assertEqual(self.ami_class.actionid, None)
+
+    def test_flush_coalesces_actions(self):
+        self.ami_class.sock.send.side_effect = lambda data: len(data)
+        self.ami_class.sendcommand('Ping', [])
+        self.ami_class.sendcommand('Logoff', [])
+
+        self.ami_class.flush()
+
+        self.ami_class.sock.send.assert_called_once_with('Action: Ping\r\n\r\nAction: Logoff\r\n\r\n')
+        self.assertFalse(self.ami_class.need_sending())
+        self.assertEqual(self.ami_class.pending_bytes(), 0)
+        self.observer.assert_called_with(self.ami_class, AMIClass.STATE_IDLE)
+
+    def test_flush_partial_write(self):
+        self.ami_class.sock.send.return_value = 20
+        self.ami_class.sendcommand('Ping', [])
+        self.ami_class.sendcommand('Logoff', [])
+
+        self.ami_class.flush()
+
+        self.assertEqual(self.ami_class.sock.send.call_count, 1)
+        self.assertEqual(self.ami_class.pending_actions(), 1)
+        self.assertEqual(self.ami_class.pending_bytes(), len('on: Logoff\r\n\r\n'))
+
+        self.ami_class.sock.send.side_effect = lambda data: len(data)
+        self.ami_class.flush()
+
+        self.ami_class.sock.send.assert_called_with('on: Logoff\r\n\r\n')
+        self.assertFalse(self.ami_class.need_sending())
+
+    def test_flush_would_block(self):
+        self.ami_class.sock.send.side_effect = socket.error(errno.EAGAIN, 'Resource temporarily unavailable')
+        self.ami_class.sendcommand('Ping', [])
+
+        self.ami_class.flush()
+
+        self.assertEqual(self.ami_class.pending_actions(), 1)
+
+    def test_flush_broken_connection(self):
+        self.ami_class.sock.send.side_effect = socket.error(errno.EPIPE, 'Broken pipe')
+        self.ami_class.sendcommand('Ping', [])
+
+        self.assertRaises(socket.error, self.ami_class.flush)
+
+    def test_watermarks(self):
+        self.ami_class.HIGH_WATERMARK = 40
+        self.ami_class.LOW_WATERMARK = 20
+        self.ami_class.sock.send.return_value = 10
+
+        for _ in range(3):
+            self.ami_class.sendcommand('Ping', [])
+
+        self.observer.assert_called_with(self.ami_class, AMIClass.STATE_CONGESTED)
+
+        self.ami_class.flush()
+        self.ami_class.flush()
+
+        self.observer.assert_called_with(self.ami_class, AMIClass.STATE_CONGESTED)
+
+        self.ami_class.flush()
+
+        self.observer.assert_called_with(self.ami_class, AMIClass.STATE_SENDING)
+
+    def test_oldest_pending_age(self):
+        self.assertEqual(self.ami_class.oldest_pending_age(), 0.0)
+
+        with patch('time.time', Mock(return_value=100.0)):
+            self.ami_class.sendcommand('Ping', [])
+        with patch('time.time', Mock(return_value=102.5)):
+            self.ami_class.sendcommand('Ping', [])
+            age = self.ami_class.oldest_pending_age()
+
+        self.assertEqual(age, 2.5)
@@ -26,6 +26,7 @@ import subprocess
 import time
 import errno
 
+from collections import deque
 from copy import copy
 
 from xivo_cti import config
@@ -38,6 +39,17 @@ switch_originates = True
 
 
 class AMIClass(object):
+
+    STATE_IDLE = 'idle'
+    STATE_SENDING = 'sending'
+    STATE_CONGESTED = 'congested'
+
+    # the CTI clients are not read anymore above HIGH_WATERMARK pending bytes
+    # until less than LOW_WATERMARK bytes are pending
+    HIGH_WATERMARK = 1024 * 1024
+    LOW_WATERMARK = 256 * 1024
+    MAX_WRITE_SIZE = 64 * 1024
+
     class AMIError(Exception):
         pass
 
@@ -49,9 +61,13 @@ class AMIClass(object):
         self.loginname = ipbxconfig.get('username', 'xivouser')
         self.password = ipbxconfig.get('password', 'xivouser')
         self.actionid = None
+        self.fd = None
+        self._observers = set()
+        self._reset_outgoing()
 
     def connect(self):
         self.actionid = None
+        self._reset_outgoing()
         if os.environ.get('XIVO_CTID_AMI_PROXY'):
             logger.info('Connecting to AMI through ami-proxy...')
             try:
@@ -61,7 +77,7 @@ class AMIClass(object):
                 self.sock = self._new_connection()
         else:
             self.sock = self._new_connection()
-        self.sock.settimeout(30)
+        self.sock.setblocking(0)
         self.fd = self.sock.fileno()
 
     def _new_connection(self):
@@ -88,7 +104,6 @@ class AMIClass(object):
     def sendcommand(self, action, args, loopnum=0):
         ret = False
         try:
-            t0 = time.time()
             towritefields = ['Action: %s' % action]
             for (name, value) in args:
                 towritefields.append('%s: %s' % (name, value))
@@ -101,7 +116,7 @@ class AMIClass(object):
                 ustr = rawstr.encode('utf8')
             else:
                 ustr = rawstr
-            self.sock.sendall(ustr)
+            self._append_outgoing(ustr)
             ret = True
         except UnicodeEncodeError:
             logger.exception('(sendcommand UnicodeEncodeError (%s %s %s))',
@@ -111,29 +126,107 @@ class AMIClass(object):
             logger.exception('(sendcommand UnicodeDecodeError (%s %s %s))',
                              action, self.actionid, self.fd)
             ret = True
-        except socket.timeout:
-            t1 = time.time()
-            logger.exception('(sendcommand timeout (%s %s %s) timespent=%f)',
-                             action, self.actionid, self.fd, (t1 - t0))
-            ret = False
-        except socket.error, e:
-            t1 = time.time()
-            logger.exception('(sendcommand socket error (%s %s %s) timespent=%f)',
-                             action, self.actionid, self.fd, (t1 - t0))
-            ret = False
-        except IOError, e:
-            t1 = time.time()
-            if e.errno == errno.EPIPE:
-                logger.exception('(sendcommand I/O Error EPIPE (%s %s %s) timespent=%f)',
-                                 action, self.actionid, self.fd, (t1 - t0))
-            else:
-                logger.exception('(sendcommand I/O Error Other (%s %s %s) timespent=%f)',
-                                 action, self.actionid, self.fd, (t1 - t0))
-            ret = False
         if self.actionid:
             self.actionid = None
         return ret
 
+    def attach_observer(self, callback):
+        self._observers.add(callback)
+
+    def detach_observer(self, callback):
+        self._observers.discard(callback)
+
+    def need_sending(self):
+        return bool(self._outgoing)
+
+    def pending_actions(self):
+        return len(self._outgoing)
+
+    def pending_bytes(self):
+        return self._outgoing_len
+
+    def oldest_pending_age(self):
+        if not self._outgoing:
+            return 0.0
+        return time.time() - self._outgoing[0][0]
+
+    # to be called when the socket is ready for writing
+    def flush(self):
+        """
+        Writes as many of the pending actions as the socket accepts without
+        blocking. Raises socket.error if the connection is broken.
+        """
+        try:
+            while self._outgoing:
+                data = self._next_write()
+                try:
+                    sent = self.sock.send(data)
+                except socket.error, e:
+                    if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                        break
+                    logger.error('(flush socket error (%s %s) pending=%d)',
+                                 e, self.fd, self._outgoing_len)
+                    raise
+                self._consume_outgoing(sent)
+                if sent < len(data):
+                    break
+        finally:
+            self._update_state()
+
+    def _append_outgoing(self, data):
+        self._outgoing.append([time.time(), data])
+        self._outgoing_len += len(data)
+        self._update_state()
+
+    def _next_write(self):
+        # many small actions are coalesced into a single write
+        if len(self._outgoing) == 1:
+            return self._outgoing[0][1]
+        chunks = []
+        size = 0
+        for _, data in self._outgoing:
+            chunks.append(data)
+            size += len(data)
+            if size >= self.MAX_WRITE_SIZE:
+                break
+        return ''.join(chunks)
+
+    def _consume_outgoing(self, sent):
+        self._outgoing_len -= sent
+        while sent:
+            item = self._outgoing[0]
+            data = item[1]
+            if len(data) <= sent:
+                sent -= len(data)
+                self._outgoing.popleft()
+            else:
+                item[1] = data[sent:]
+                sent = 0
+
+    def _reset_outgoing(self):
+        self._outgoing = deque()
+        self._outgoing_len = 0
+        self._state = self.STATE_IDLE
+
+    def _update_state(self):
+        if not self._outgoing:
+            state = self.STATE_IDLE
+        elif (self._outgoing_len > self.HIGH_WATERMARK or
+              (self._state == self.STATE_CONGESTED and self._outgoing_len > self.LOW_WATERMARK)):
+            state = self.STATE_CONGESTED
+        else:
+            state = self.STATE_SENDING
+
+        if state != self._state:
+            if state == self.STATE_CONGESTED:
+                logger.warning('AMI writer congested: %d actions (%d bytes) pending',
+                               len(self._outgoing), self._outgoing_len)
+            elif self._state == self.STATE_CONGESTED:
+                logger.info('AMI writer not congested anymore')
+            self._state = state
+            for observer in list(self._observers):
+                observer(self, state)
+
     def setactionid(self, actionid):
         self.actionid = actionid
 